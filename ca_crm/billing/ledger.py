@@ -0,0 +1,138 @@
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from custom_auth.models import EmployeeProfile
+from employees.models import TimeTracking
+from expense.models import Expense
+from workflow.models import ClientWorkCategoryAssignment
+from .models import BillItems, ReceiptInvoice, TaskProfitability
+
+
+# Hourly cost used for employees without an hourly_cost on their profile
+DEFAULT_HOURLY_COST = Decimal(str(getattr(settings, "PROFITABILITY_DEFAULT_HOURLY_COST", 0)))
+LEDGER_FIELDS = (
+    "hours_spent", "billable_hours", "labour_cost", "expenses",
+    "billed_amount", "received_amount", "margin", "updated_date",
+)
+CENT = Decimal("0.01")
+
+_pending = threading.local()
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def billed_items():
+    """Bill items that count as billed: active items of active, non-proforma invoices."""
+    return BillItems.objects.filter(is_active=True, bill__is_active=True, bill__proforma_invoice=False)
+
+
+def refresh_ledger(assignment_ids):
+    """
+    Recompute the TaskProfitability rows of the given assignments: grouped
+    queries over time entries, expenses, bill items and receipts, then one
+    upsert. Receipts are settled per invoice, so each task is credited the
+    settled share (payment plus TDS over net amount) of its billed amount.
+    """
+    assignment_ids = list(
+        ClientWorkCategoryAssignment.objects.filter(assignment_id__in=set(assignment_ids))
+        .values_list("assignment_id", flat=True)
+    )
+    if not assignment_ids:
+        return
+
+    time_rows = list(
+        TimeTracking.objects.filter(work_id__in=assignment_ids)
+        .values("work_id", "employee_id")
+        .annotate(total=Sum("duration"), billable=Sum("duration", filter=Q(task_type="billable")))
+    )
+    rates = dict(
+        EmployeeProfile.objects.filter(
+            user_id__in={row["employee_id"] for row in time_rows}, hourly_cost__isnull=False
+        ).values_list("user_id", "hourly_cost")
+    )
+    hours = defaultdict(float)
+    billable_hours = defaultdict(float)
+    labour_cost = defaultdict(Decimal)
+    for row in time_rows:
+        spent = row["total"].total_seconds() / 3600 if row["total"] else 0
+        hours[row["work_id"]] += spent
+        billable_hours[row["work_id"]] += row["billable"].total_seconds() / 3600 if row["billable"] else 0
+        labour_cost[row["work_id"]] += Decimal(str(spent)) * rates.get(row["employee_id"], DEFAULT_HOURLY_COST)
+
+    expenses = dict(
+        Expense.objects.filter(work_id__in=assignment_ids)
+        .values("work_id")
+        .annotate(total=Sum("expense_amount"))
+        .values_list("work_id", "total")
+    )
+
+    items = list(
+        billed_items().filter(work_category_id__in=assignment_ids)
+        .values_list("work_category_id", "bill_id", "amount", "bill__net_amount")
+    )
+    settled = dict(
+        ReceiptInvoice.objects.filter(invoice_id__in={item[1] for item in items}, receipt__is_active=True)
+        .values("invoice_id")
+        .annotate(total=Sum("payment") + Sum("tds_deduction"))
+        .values_list("invoice_id", "total")
+    )
+    billed = defaultdict(Decimal)
+    received = defaultdict(Decimal)
+    for assignment_id, bill_id, amount, net_amount in items:
+        billed[assignment_id] += amount
+        if net_amount and settled.get(bill_id):
+            received[assignment_id] += amount * min(settled[bill_id] / net_amount, Decimal(1))
+
+    rows = []
+    for assignment_id in assignment_ids:
+        cost = _money(labour_cost[assignment_id])
+        expense = _money(expenses.get(assignment_id))
+        billed_amount = _money(billed[assignment_id])
+        rows.append(TaskProfitability(
+            assignment_id=assignment_id,
+            hours_spent=round(hours[assignment_id], 2),
+            billable_hours=round(billable_hours[assignment_id], 2),
+            labour_cost=cost,
+            expenses=expense,
+            billed_amount=billed_amount,
+            received_amount=_money(received[assignment_id]),
+            margin=billed_amount - cost - expense,
+        ))
+    with transaction.atomic():
+        TaskProfitability.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["assignment"],
+            update_fields=list(LEDGER_FIELDS),
+        )
+
+
+def _flush_pending():
+    assignment_ids = getattr(_pending, "ids", None)
+    if assignment_ids:
+        _pending.ids = set()
+        refresh_ledger(assignment_ids)
+
+
+def schedule_refresh(assignment_ids):
+    """
+    Refresh the ledger of the given assignments once the current transaction
+    commits (straight away outside one). Assignments changed several times
+    in one transaction are refreshed once.
+    """
+    assignment_ids = {assignment_id for assignment_id in assignment_ids if assignment_id is not None}
+    if not assignment_ids:
+        return
+    if getattr(_pending, "ids", None) is None:
+        _pending.ids = set()
+    _pending.ids.update(assignment_ids)
+    transaction.on_commit(_flush_pending)
+
+
+def invoice_assignments(invoice_ids):
+    return BillItems.objects.filter(bill_id__in=invoice_ids).values_list("work_category_id", flat=True)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from workflow.models import ClientWorkCategoryAssignment
+from billing.ledger import refresh_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild the profitability ledger of every assignment from time entries, expenses, bills and receipts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = ClientWorkCategoryAssignment.objects.order_by("assignment_id").values_list("assignment_id", flat=True)
+        batch, total = [], 0
+        for assignment_id in ids.iterator(chunk_size=options["batch_size"]):
+            batch.append(assignment_id)
+            if len(batch) >= options["batch_size"]:
+                refresh_ledger(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            refresh_ledger(batch)
+            total += len(batch)
+        self.stdout.write(f"Rebuilt the profitability ledger of {total} assignments")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from billing.ledger import invoice_assignments, schedule_refresh
+from billing.models import Billing
+from billing.tax import fix_invoices, verify_invoices
+
+
+class Command(BaseCommand):
+    help = "Recompute invoice totals from their items and report (or fix) the invoices that disagree."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--financial-year", default=None, help="Only check invoices of this financial year, e.g. 2024-25.")
+        parser.add_argument("--customer", type=int, default=None)
+        parser.add_argument("--include-inactive", action="store_true", help="Check deleted invoices as well.")
+        parser.add_argument("--fix", action="store_true", help="Write the recomputed totals back.")
+
+    def handle(self, *args, **options):
+        bills = Billing.objects.all()
+        if not options["include_inactive"]:
+            bills = bills.filter(is_active=True)
+        if options["financial_year"]:
+            bills = bills.filter(financial_year=options["financial_year"])
+        if options["customer"]:
+            bills = bills.filter(customer_id=options["customer"])
+
+        checked, mismatches = verify_invoices(bills)
+        for mismatch in mismatches:
+            changes = ", ".join(f"{field} {stored} -> {expected}" for field, (stored, expected) in mismatch["fields"].items())
+            self.stdout.write(f"Invoice {mismatch['id']}: {changes}")
+        self.stdout.write(f"Checked {checked} invoices, {len(mismatches)} with wrong totals")
+
+        if options["fix"] and mismatches:
+            with transaction.atomic():
+                ids = fix_invoices(mismatches)
+                # bulk_update skips the signals; task ledgers count net amounts
+                schedule_refresh(invoice_assignments(ids))
+            self.stdout.write(f"Fixed {len(ids)} invoices")
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0021_assignment_progress'),
+        ('billing', '0009_billitems_narration_alter_billitems_hsn_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskProfitability',
+            fields=[
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profitability', serialize=False, to='workflow.clientworkcategoryassignment')),
+                ('hours_spent', models.FloatField(default=0)),
+                ('billable_hours', models.FloatField(default=0)),
+                ('labour_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('billed_amount', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=12)),
+                ('received_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('margin', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=12)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0010_taskprofitability'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='billing',
+            index=models.Index(fields=['invoice_date', 'id'], name='billing_bil_invoice_a2a1a9_idx'),
+        ),
+    ]
@@ -68,6 +68,10 @@ class Billing(models.Model):
     class Meta:
         verbose_name = "Billing"
         verbose_name_plural = "Billings"
+        indexes = [
+            # Keyset pages of the invoice list
+            models.Index(fields=["invoice_date", "id"]),
+        ]
 
 
 class BillItems(models.Model):
@@ -84,6 +88,27 @@ class BillItems(models.Model):
         return f"{self.task_name}"
 
 
+class TaskProfitability(models.Model):
+    """
+    Per-assignment profitability ledger, kept up to date from time entries,
+    expenses, bill items and receipts by billing.ledger.
+    """
+    assignment = models.OneToOneField(
+        ClientWorkCategoryAssignment, on_delete=models.CASCADE, primary_key=True, related_name="profitability"
+    )
+    hours_spent = models.FloatField(default=0)
+    billable_hours = models.FloatField(default=0)
+    labour_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    billed_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, db_index=True)
+    received_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    margin = models.DecimalField(max_digits=12, decimal_places=2, default=0, db_index=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.assignment_id} - {self.margin}"
+
+
 class ExpenseItems(models.Model):
     id = models.AutoField(primary_key=True)
     bill = models.ForeignKey(Billing, on_delete=models.CASCADE, related_name='expense_items')
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from custom_auth.models import EmployeeProfile
+from employees.models import TimeTracking
+from expense.models import Expense
+from workflow.models import ClientWorkCategoryAssignment
+from .ledger import invoice_assignments, schedule_refresh
+from .models import Billing, BillItems, Receipt, ReceiptInvoice
+
+
+# Foreign key of each ledger source pointing at the assignment (or invoice) it counts towards
+LEDGER_KEYS = {
+    TimeTracking: "work_id",
+    Expense: "work_id",
+    BillItems: "work_category_id",
+    ReceiptInvoice: "invoice_id",
+}
+
+
+def _deleting_assignment(origin):
+    """True when a delete cascades from an assignment, whose ledger row goes with it."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is ClientWorkCategoryAssignment
+
+
+def _affected(sender, instance):
+    """Values of the ledger key before and after the change."""
+    key = LEDGER_KEYS[sender]
+    return {getattr(instance, key), getattr(instance, "_ledger_previous", None)}
+
+
+@receiver(pre_save, sender=TimeTracking)
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=BillItems)
+@receiver(pre_save, sender=ReceiptInvoice)
+def remember_ledger_key(sender, instance, **kwargs):
+    # A row moved to another task or invoice changes the ledger of both
+    if instance.pk:
+        key = LEDGER_KEYS[sender]
+        instance._ledger_previous = sender.objects.filter(pk=instance.pk).values_list(key, flat=True).first()
+
+
+@receiver(post_save, sender=TimeTracking)
+@receiver(post_delete, sender=TimeTracking)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=BillItems)
+@receiver(post_delete, sender=BillItems)
+def refresh_task_ledger(sender, instance, origin=None, **kwargs):
+    if origin is not None and _deleting_assignment(origin):
+        return
+    schedule_refresh(_affected(sender, instance))
+
+
+@receiver(post_save, sender=ReceiptInvoice)
+@receiver(post_delete, sender=ReceiptInvoice)
+def refresh_invoice_ledger(sender, instance, **kwargs):
+    schedule_refresh(invoice_assignments(_affected(sender, instance)))
+
+
+@receiver(post_save, sender=Billing)
+def refresh_bill_ledger(sender, instance, created, **kwargs):
+    if not created:
+        schedule_refresh(invoice_assignments([instance.id]))
+
+
+@receiver(post_save, sender=Receipt)
+def refresh_receipt_ledger(sender, instance, created, **kwargs):
+    if not created:
+        schedule_refresh(invoice_assignments(instance.receipt_invoice.values("invoice_id")))
+
+
+def _cost(value):
+    return None if value in (None, "") else Decimal(str(value))
+
+
+@receiver(pre_save, sender=EmployeeProfile)
+def remember_hourly_cost(sender, instance, **kwargs):
+    if instance.pk:
+        instance._ledger_previous_cost = (
+            sender.objects.filter(pk=instance.pk).values_list("hourly_cost", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def refresh_employee_ledger(sender, instance, created, **kwargs):
+    # Only the hourly cost feeds the ledger; other profile edits leave it alone
+    if created or _cost(getattr(instance, "_ledger_previous_cost", None)) == _cost(instance.hourly_cost):
+        return
+    schedule_refresh(
+        TimeTracking.objects.filter(employee_id=instance.user_id, work__isnull=False)
+        .values_list("work_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_save, sender=ClientWorkCategoryAssignment)
+def add_task_ledger(sender, instance, created, **kwargs):
+    if created:
+        schedule_refresh([instance.assignment_id])
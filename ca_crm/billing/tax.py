@@ -0,0 +1,305 @@
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import Sum
+from company_profile.models import Company
+from .models import Billing, BillItems, ExpenseItems
+
+
+# GST rate (percent) of invoices that do not give one
+BILLING_GST_RATE = Decimal(str(getattr(settings, "BILLING_GST_RATE", 18)))
+# Supplier state for billing companies without a GST state on their profile
+BILLING_HOME_STATE_CODE = getattr(settings, "BILLING_HOME_STATE_CODE", None)
+# Exports and SEZ / deemed exports without payment of tax
+ZERO_RATED_SUPPLIES = ("sezwop", "expwop", "dexp")
+CENT = Decimal("0.01")
+RUPEE = Decimal("1")
+
+# Amounts the engine owns; `gst` and `discount` are the requested rates
+TOTAL_FIELDS = (
+    "sub_total", "discount_amount", "gst_amount", "sgst", "sgst_amount",
+    "cgst", "cgst_amount", "total", "round_off", "net_amount",
+)
+
+GST_STATES = {
+    "01": "Jammu and Kashmir", "02": "Himachal Pradesh", "03": "Punjab", "04": "Chandigarh",
+    "05": "Uttarakhand", "06": "Haryana", "07": "Delhi", "08": "Rajasthan", "09": "Uttar Pradesh",
+    "10": "Bihar", "11": "Sikkim", "12": "Arunachal Pradesh", "13": "Nagaland", "14": "Manipur",
+    "15": "Mizoram", "16": "Tripura", "17": "Meghalaya", "18": "Assam", "19": "West Bengal",
+    "20": "Jharkhand", "21": "Odisha", "22": "Chhattisgarh", "23": "Madhya Pradesh", "24": "Gujarat",
+    "26": "Dadra and Nagar Haveli and Daman and Diu", "27": "Maharashtra", "29": "Karnataka",
+    "30": "Goa", "31": "Lakshadweep", "32": "Kerala", "33": "Tamil Nadu", "34": "Puducherry",
+    "35": "Andaman and Nicobar Islands", "36": "Telangana", "37": "Andhra Pradesh", "38": "Ladakh",
+    "97": "Other Territory",
+}
+STATE_ALIASES = {"orissa": "21", "pondicherry": "34", "newdelhi": "07", "damananddiu": "26", "dadraandnagarhaveli": "26"}
+_STATE_NAMES = {**{re.sub(r"[^a-z]", "", name.lower()): code for code, name in GST_STATES.items()}, **STATE_ALIASES}
+# A bare code or a leading one ("27-Maharashtra", "27 Maharashtra"); other
+# numbers in a free-text place of supply (flat numbers, PIN codes) are not codes
+_STATE_NUMBER = re.compile(r"^(\d{1,2})(?:$|\s*-|\s)")
+
+
+def state_code(value):
+    """
+    The two digit GST state code of a place of supply, state code or GSTIN
+    ("27", "27-Maharashtra", "Maharashtra", "27AAAPS1234C1Z5"), or None.
+    """
+    text = str(value or "").strip()
+    if not text:
+        return None
+    if re.match(r"^\d{2}[A-Z]{5}\d{4}[A-Z]", text.upper()):
+        return text[:2] if text[:2] in GST_STATES else None
+    number = _STATE_NUMBER.match(text)
+    if number and number.group(1).zfill(2) in GST_STATES:
+        return number.group(1).zfill(2)
+    return _STATE_NAMES.get(re.sub(r"[^a-z]", "", text.lower()))
+
+
+def company_state(company):
+    return (
+        state_code(company.state_code_gst) or state_code(company.gst_no) or state_code(company.place_of_supply)
+    )
+
+
+def supplier_states():
+    """{billing company name: state code} of every company profile with a known state."""
+    states = {}
+    for company in Company.objects.only("name", "state_code_gst", "gst_no", "place_of_supply"):
+        code = company_state(company)
+        if code:
+            states[company.name] = code
+    return states
+
+
+def is_intra_state(supplier, place_of_supply):
+    """CGST/SGST when both states are known and equal or either is unknown; IGST otherwise."""
+    return supplier is None or place_of_supply is None or supplier == place_of_supply
+
+
+def _cents(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _decimal(value, default=Decimal("0")):
+    if value in (None, ""):
+        return default
+    return Decimal(str(value))
+
+
+def percent(value, name, default=Decimal("0")):
+    """
+    A discount or GST rate from request data as a Decimal percent rounded to
+    the stored two places, `default` when blank. Raises ValueError unless it
+    is a number from 0 to 100.
+    """
+    try:
+        rate = _decimal(value, default)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not rate.is_finite() or not Decimal("0") <= rate <= Decimal("100"):
+        raise ValueError(f"{name} must be between 0 and 100")
+    return _cents(rate)
+
+
+def calculate_totals(items_total, expenses_total, discount, gst_rate, taxable_supply=True, intra_state=True):
+    """
+    Invoice totals from the item and expense sums, the discount and GST rates
+    (percent), whether tax is charged at all and the intra/inter state split.
+    Every amount is rounded half up to the paisa and the net amount to the
+    rupee, with the difference as round_off.
+    """
+    sub_total = _cents(_decimal(items_total) + _decimal(expenses_total))
+    discount_amount = _cents(sub_total * _decimal(discount) / 100)
+    taxable = sub_total - discount_amount
+    rate = _decimal(gst_rate, BILLING_GST_RATE) if taxable_supply else Decimal("0")
+    if intra_state:
+        half = _cents(taxable * rate / 200)
+        # The split rate is stored to two places like the amounts
+        cgst = sgst = _cents(rate / 2)
+        cgst_amount = sgst_amount = half
+        gst_amount = half * 2
+    else:
+        cgst = sgst = Decimal("0")
+        cgst_amount = sgst_amount = Decimal("0.00")
+        gst_amount = _cents(taxable * rate / 100)
+    total = taxable + gst_amount
+    net_amount = total.quantize(RUPEE, rounding=ROUND_HALF_UP)
+    return {
+        "sub_total": sub_total,
+        "discount_amount": discount_amount,
+        "gst_amount": gst_amount,
+        "sgst": sgst,
+        "sgst_amount": sgst_amount,
+        "cgst": cgst,
+        "cgst_amount": cgst_amount,
+        "total": total,
+        "round_off": net_amount - total,
+        "net_amount": net_amount,
+    }
+
+
+def taxable_supply(bill):
+    """Zero-rated supplies and reverse charge invoices collect no GST."""
+    return bill.type_of_supply not in ZERO_RATED_SUPPLIES and not bill.reverse_charges
+
+
+def invoice_totals(bill):
+    """The totals of a saved invoice from its active bill and expense items."""
+    items_total = BillItems.objects.filter(bill=bill, is_active=True).aggregate(total=Sum("amount"))["total"]
+    expenses_total = None
+    if bill.include_expense:
+        expenses_total = ExpenseItems.objects.filter(bill=bill, is_active=True).aggregate(total=Sum("amount"))["total"]
+    company = Company.objects.filter(name=bill.billing_company).first()
+    supplier = (company_state(company) if company else None) or state_code(BILLING_HOME_STATE_CODE)
+    place = state_code(bill.place_of_supply) or state_code(bill.customer.gst_state_code)
+    return calculate_totals(
+        items_total, expenses_total, bill.discount, bill.gst,
+        taxable_supply(bill), is_intra_state(supplier, place),
+    )
+
+
+def apply_invoice_totals(bill):
+    """
+    Set the computed totals on `bill` (not saved). The unpaid amount moves
+    by the change in net amount, so payments already recorded still count.
+    """
+    totals = invoice_totals(bill)
+    change = totals["net_amount"] - _decimal(bill.net_amount)
+    for field, value in totals.items():
+        setattr(bill, field, value)
+    bill.unpaid_amount = max(_decimal(bill.unpaid_amount) + change, Decimal("0"))
+    return totals
+
+
+# Batch mode: the same rules as numpy column arithmetic in integer paise and
+# basis points, which is exact, so results match calculate_totals to the paisa.
+
+def _round_div(numerator, denominator):
+    """Integer division rounding half away from zero, like ROUND_HALF_UP."""
+    return np.sign(numerator) * ((np.abs(numerator) + denominator // 2) // denominator)
+
+
+def _column_decimal(value, default=Decimal("0")):
+    return default if value is None or pd.isna(value) else Decimal(str(value))
+
+
+def _paise(values):
+    return np.array([int(_cents(_column_decimal(value)) * 100) for value in values], dtype=np.int64)
+
+
+def _basis_points(values, default=Decimal("0")):
+    return np.array([int(_column_decimal(value, default) * 100) for value in values], dtype=np.int64)
+
+
+def invoice_frame(bills):
+    """
+    One row per invoice of the queryset with its stored totals and the inputs
+    of the calculation, in four queries whatever the number of invoices.
+    """
+    rows = list(bills.order_by("id").values(
+        "id", "billing_company", "type_of_supply", "place_of_supply", "customer__gst_state_code",
+        "include_expense", "reverse_charges", "discount", "gst", "unpaid_amount", *TOTAL_FIELDS,
+    ))
+    frame = pd.DataFrame(rows, columns=[
+        "id", "billing_company", "type_of_supply", "place_of_supply", "customer__gst_state_code",
+        "include_expense", "reverse_charges", "discount", "gst", "unpaid_amount", *TOTAL_FIELDS,
+    ])
+    ids = frame["id"].tolist()
+    items = dict(
+        BillItems.objects.filter(bill_id__in=ids, is_active=True)
+        .values("bill_id").annotate(total=Sum("amount")).values_list("bill_id", "total")
+    )
+    expenses = dict(
+        ExpenseItems.objects.filter(bill_id__in=ids, is_active=True)
+        .values("bill_id").annotate(total=Sum("amount")).values_list("bill_id", "total")
+    )
+    frame["items_total"] = frame["id"].map(items)
+    frame["expenses_total"] = frame["id"].map(expenses).where(frame["include_expense"].astype(bool), None)
+
+    suppliers = supplier_states()
+    home = state_code(BILLING_HOME_STATE_CODE)
+    frame["supplier_state"] = frame["billing_company"].map(lambda name: suppliers.get(name, home))
+    places = {value: state_code(value) for value in frame["place_of_supply"].dropna().unique()}
+    customer_states = {value: state_code(value) for value in frame["customer__gst_state_code"].dropna().unique()}
+    frame["place_state"] = frame["place_of_supply"].map(places).fillna(frame["customer__gst_state_code"].map(customer_states))
+    return frame
+
+
+def recompute_frame(frame):
+    """Expected totals of every row of an invoice_frame, as Decimal columns prefixed "expected_"."""
+    items = _paise(frame["items_total"])
+    expenses = _paise(frame["expenses_total"])
+    discount = _basis_points(frame["discount"])
+    rate = _basis_points(frame["gst"], BILLING_GST_RATE)
+    taxable_supply = ~(frame["type_of_supply"].isin(ZERO_RATED_SUPPLIES) | frame["reverse_charges"].astype(bool)).to_numpy()
+    rate = np.where(taxable_supply, rate, 0)
+    intra = (
+        frame["supplier_state"].isna() | frame["place_state"].isna() | (frame["supplier_state"] == frame["place_state"])
+    ).to_numpy()
+
+    sub_total = items + expenses
+    discount_amount = _round_div(sub_total * discount, 10000)
+    taxable = sub_total - discount_amount
+    half = _round_div(taxable * rate, 20000)
+    gst_amount = np.where(intra, half * 2, _round_div(taxable * rate, 10000))
+    split_amount = np.where(intra, half, 0)
+    split_rate = np.where(intra, rate, 0)
+    total = taxable + gst_amount
+    net_amount = _round_div(total, 100) * 100
+
+    columns = {
+        "sub_total": sub_total, "discount_amount": discount_amount, "gst_amount": gst_amount,
+        "sgst_amount": split_amount, "cgst_amount": split_amount,
+        "total": total, "round_off": net_amount - total, "net_amount": net_amount,
+    }
+    for field, paise in columns.items():
+        frame[f"expected_{field}"] = [Decimal(int(value)) / 100 for value in paise]
+    # Half of a rate in basis points, as a percent to two places like calculate_totals
+    for field in ("sgst", "cgst"):
+        frame[f"expected_{field}"] = [_cents(Decimal(int(value)) / 200) for value in split_rate]
+    return frame
+
+
+def verify_invoices(bills):
+    """
+    Recompute every invoice of the queryset in one pass and return
+    (number checked, mismatches). Each mismatch is {"id", "fields": {field:
+    (stored, expected)}, "expected": {field: value}} plus the stored
+    net_amount and unpaid_amount.
+    """
+    frame = recompute_frame(invoice_frame(bills))
+    if frame.empty:
+        return 0, []
+    differs = np.zeros(len(frame), dtype=bool)
+    field_differs = {}
+    for field in TOTAL_FIELDS:
+        stored = frame[field].map(_column_decimal)
+        field_differs[field] = (stored != frame[f"expected_{field}"]).to_numpy()
+        differs |= field_differs[field]
+    mismatches = []
+    for position in np.flatnonzero(differs):
+        row = frame.iloc[position]
+        mismatches.append({
+            "id": int(row["id"]),
+            "fields": {
+                field: (row[field], row[f"expected_{field}"]) for field in TOTAL_FIELDS if field_differs[field][position]
+            },
+            "expected": {field: row[f"expected_{field}"] for field in TOTAL_FIELDS},
+            "net_amount": row["net_amount"],
+            "unpaid_amount": row["unpaid_amount"],
+        })
+    return len(frame), mismatches
+
+
+def fix_invoices(mismatches, batch_size=500):
+    """Write the expected totals of verify_invoices mismatches back; returns the ids changed."""
+    bills = []
+    for mismatch in mismatches:
+        bill = Billing(id=mismatch["id"], **mismatch["expected"])
+        change = mismatch["expected"]["net_amount"] - _column_decimal(mismatch["net_amount"])
+        bill.unpaid_amount = max(_column_decimal(mismatch["unpaid_amount"]) + change, Decimal("0"))
+        bills.append(bill)
+    Billing.objects.bulk_update(bills, [*TOTAL_FIELDS, "unpaid_amount"], batch_size=batch_size)
+    return [bill.id for bill in bills]
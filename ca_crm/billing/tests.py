@@ -1,3 +1,177 @@
-from django.test import TestCase
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from ca_crm.testing import auth_headers
+from clients.models import Customer
+from custom_auth.models import CustomUser, EmployeeProfile
+from employees.models import TimeTracking
+from workflow.instantiation import instantiate_assignments
+from workflow.models import Department, WorkCategory
+from .models import Billing, BillItems, TaskProfitability
+from .tax import calculate_totals, percent, state_code, verify_invoices, apply_invoice_totals
 
-# Create your tests here.
+
+class StateCodeTests(SimpleTestCase):
+    def test_codes_names_and_gstins(self):
+        self.assertEqual(state_code("27"), "27")
+        self.assertEqual(state_code("7"), "07")
+        self.assertEqual(state_code("27-Maharashtra"), "27")
+        self.assertEqual(state_code("27 Maharashtra"), "27")
+        self.assertEqual(state_code("maharashtra"), "27")
+        self.assertEqual(state_code("Orissa"), "21")
+        self.assertEqual(state_code("29AAAPS1234C1Z5"), "29")
+
+    def test_numbers_inside_free_text_are_not_codes(self):
+        self.assertIsNone(state_code("Flat 7, Bandra"))
+        self.assertIsNone(state_code("400001"))
+        self.assertIsNone(state_code("99"))
+        self.assertIsNone(state_code(""))
+
+
+class CalculateTotalsTests(SimpleTestCase):
+    def test_intra_state_splits_cgst_and_sgst(self):
+        totals = calculate_totals("1000.00", "250.50", "10", "18", intra_state=True)
+        self.assertEqual(totals["sub_total"], Decimal("1250.50"))
+        self.assertEqual(totals["discount_amount"], Decimal("125.05"))
+        self.assertEqual(totals["cgst_amount"], Decimal("101.29"))
+        self.assertEqual(totals["sgst_amount"], Decimal("101.29"))
+        self.assertEqual(totals["gst_amount"], Decimal("202.58"))
+        self.assertEqual(totals["cgst"], Decimal("9"))
+        self.assertEqual(totals["total"], Decimal("1328.03"))
+        self.assertEqual(totals["net_amount"], Decimal("1328"))
+        self.assertEqual(totals["round_off"], Decimal("-0.03"))
+
+    def test_inter_state_charges_igst_only(self):
+        totals = calculate_totals("1125.45", None, "0", "18", intra_state=False)
+        self.assertEqual(totals["gst_amount"], Decimal("202.58"))
+        self.assertEqual(totals["cgst_amount"], Decimal("0.00"))
+        self.assertEqual(totals["cgst"], Decimal("0"))
+        self.assertEqual(totals["net_amount"], Decimal("1328"))
+
+    def test_zero_rated_supply_collects_no_tax(self):
+        totals = calculate_totals("999.50", None, "0", "18", taxable_supply=False)
+        self.assertEqual(totals["gst_amount"], Decimal("0.00"))
+        self.assertEqual(totals["net_amount"], Decimal("1000"))
+        self.assertEqual(totals["round_off"], Decimal("0.50"))
+
+    def test_half_paisa_rounds_up(self):
+        # 0.50 * 9% = 0.045 per half; banker's rounding would give 0.04
+        totals = calculate_totals("0.50", None, "0", "18")
+        self.assertEqual(totals["cgst_amount"], Decimal("0.05"))
+        self.assertEqual(totals["gst_amount"], Decimal("0.10"))
+
+    def test_split_rate_fits_two_places(self):
+        totals = calculate_totals("1000.00", None, "0", "0.25")
+        self.assertEqual(totals["cgst"], Decimal("0.13"))
+        self.assertEqual(totals["cgst_amount"], Decimal("1.25"))
+
+    def test_rates_must_be_percentages(self):
+        self.assertEqual(percent(None, "gst", Decimal("18")), Decimal("18.00"))
+        self.assertEqual(percent("12.5", "gst"), Decimal("12.50"))
+        for value in ("-1", "100.01", "abc", "NaN"):
+            with self.assertRaises(ValueError):
+                percent(value, "discount")
+
+
+class InvoiceTotalsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="biller", email="biller@example.com", password="x")
+        self.customer = Customer.objects.create(
+            name_of_business="Acme Traders", customer_code="ACME", gst_state_code="27", created_by=self.user
+        )
+
+    def make_bill(self, amounts, **values):
+        bill = Billing.objects.create(
+            billing_company="Firm", bank="Bank", financial_year="2026-27", customer=self.customer,
+            billing_description="Services", fees=0, invoice_date=date(2026, 4, 1), requested_by="Partner",
+            sub_total=0, discount=values.pop("discount", 0), discount_amount=0, gst=values.pop("gst", 18), gst_amount=0,
+            total=0, round_off=0, net_amount=0, unpaid_amount=0, **values,
+        )
+        for amount in amounts:
+            BillItems.objects.create(bill=bill, task_name="Work", amount=amount)
+        return bill
+
+    def test_apply_moves_unpaid_amount_by_the_change(self):
+        bill = self.make_bill(["1000.00"])
+        bill.net_amount, bill.unpaid_amount = Decimal("1000"), Decimal("400")
+        apply_invoice_totals(bill)
+        self.assertEqual(bill.net_amount, Decimal("1180"))
+        self.assertEqual(bill.unpaid_amount, Decimal("580"))
+
+    def test_batch_verification_matches_the_scalar_engine(self):
+        bills = [
+            self.make_bill(["1000.00", "250.50"], discount=10),
+            self.make_bill(["333.33"], place_of_supply="Karnataka"),
+            self.make_bill(["999.99"], type_of_supply="expwop"),
+            self.make_bill(["1000.00"], gst="0.25"),
+        ]
+        checked, mismatches = verify_invoices(Billing.objects.all())
+        self.assertEqual(checked, 4)
+        self.assertEqual({mismatch["id"] for mismatch in mismatches}, {bill.id for bill in bills})
+        for bill in bills:
+            apply_invoice_totals(bill)
+            bill.save()
+        self.assertEqual(verify_invoices(Billing.objects.all()), (4, []))
+
+    def test_update_rejects_bad_rates_and_ignores_payment_fields(self):
+        bill = self.make_bill(["1000.00"])
+        apply_invoice_totals(bill)
+        bill.save()
+        headers = auth_headers(self.user)
+        url = reverse("billing-update", args=[bill.id])
+        for field, value in (("discount", "-5"), ("gst", "150")):
+            response = self.client.put(url, {field: value}, content_type="application/json", **headers)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.put(
+            url, {"paid_amount": "1180", "unpaid_amount": "0", "bill_items": [{"task_name": "Work", "amount": "1000.00"}]},
+            content_type="application/json", **headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        bill.refresh_from_db()
+        self.assertEqual(bill.paid_amount, Decimal("0"))
+        self.assertEqual(bill.unpaid_amount, Decimal("1180"))
+
+    def test_create_rejects_a_discount_over_100(self):
+        response = self.client.post(reverse("billing-create"), {
+            "billing_company": "Firm", "bank": "Bank", "financial_year": "2026-27", "customer": self.customer.id,
+            "billing_description": "Services", "fees": 0, "invoice_date": "2026-04-01", "requested_by": "Partner",
+            "discount": "101",
+        }, content_type="application/json", **auth_headers(self.user))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Billing.objects.exists())
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="staff", email="staff@example.com", password="x")
+        self.profile = EmployeeProfile.objects.create(user=self.user, hourly_cost=100)
+        customer = Customer.objects.create(name_of_business="Acme Traders", customer_code="ACME", created_by=self.user)
+        department = Department.objects.create(name="Tax", created_by=self.user)
+        category = WorkCategory.objects.create(name="GST return", department=department, created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            (self.assignment,), _ = instantiate_assignments(category, [{"customer_id": customer.id}])
+            TimeTracking.objects.create(
+                employee=self.user, client=customer, work=self.assignment, task_type="billable",
+                date=date(2026, 4, 1), start_time=datetime(2026, 4, 1, 10), end_time=datetime(2026, 4, 1, 12),
+            )
+
+    def ledger(self):
+        return TaskProfitability.objects.get(assignment=self.assignment)
+
+    def test_time_entries_are_costed(self):
+        self.assertEqual((self.ledger().hours_spent, self.ledger().labour_cost), (2.0, Decimal("200.00")))
+
+    def test_only_hourly_cost_changes_refresh_the_ledger(self):
+        with mock.patch("billing.signals.schedule_refresh") as refresh:
+            self.profile.designation = "Senior"
+            self.profile.save()
+            self.profile.hourly_cost = "100.00"
+            self.profile.save()
+        refresh.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.hourly_cost = Decimal("150")
+            self.profile.save()
+        self.assertEqual(self.ledger().labour_cost, Decimal("300.00"))
@@ -2,7 +2,6 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.core.files.storage import FileSystemStorage
 from decimal import Decimal
 import os
 from django.db import transaction
@@ -21,7 +20,9 @@ from .models import (Billing,
                      DebitNoteItem,
                      ReceiptInvoice)
 from workflow.views import ModifiedApiview
-from ca_crm.email_service import send_email
+from .tax import apply_invoice_totals, percent, BILLING_GST_RATE, TOTAL_FIELDS
+from ca_crm.email_service import enqueue_email
+from ca_crm.pagination import paginate_keyset, InvalidCursor
 from django.db.models.functions import Coalesce
 from django.db.models import Value
 
@@ -51,18 +52,12 @@ class BillingCreateView(ModifiedApiview):
             hrs_spent = request.data.get('hrs_spent')
             task = request.data.get('task')
             include_expense = request.data.get('include_expense', False)
-            sub_total = request.data.get('sub_total')
-            discount = request.data.get('discount')
-            discount_amount = request.data.get('discount_amount')
-            gst = request.data.get('gst')
-            gst_amount = request.data.get('gst_amount')
-            sgst = request.data.get('sgst',0)
-            sgst_amount = request.data.get('sgst_amount',0)
-            cgst = request.data.get('cgst',0)
-            cgst_amount = request.data.get('cgst_amount',0)
-            total = request.data.get('total')
-            round_off = request.data.get('round_off')
-            net_amount = request.data.get('net_amount')
+            # Amounts are computed from the items by billing.tax; only the rates are taken
+            try:
+                discount = percent(request.data.get('discount'), "discount")
+                gst = percent(request.data.get('gst'), "gst", BILLING_GST_RATE)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             reverse_charges = request.data.get('reverse_charges', False)
             payment_status="unpaid"
             bill_items = request.data.get('bill_items', [])
@@ -75,7 +70,7 @@ class BillingCreateView(ModifiedApiview):
                         customer_id, 
                         billing_description, 
                         fees, 
-                        invoice_date, requested_by, sub_total, total, net_amount]):
+                        invoice_date, requested_by]):
                 return Response(
                     {"error": "Required fields are missing."},
                     status=status.HTTP_400_BAD_REQUEST
@@ -104,20 +99,11 @@ class BillingCreateView(ModifiedApiview):
                     include_expense=include_expense,
                     requested_by=requested_by,
                     narration=narration,
-                    sub_total=sub_total,
                     discount=discount,
-                    discount_amount=discount_amount,
                     gst=gst,
-                    gst_amount=gst_amount,
-                    sgst=sgst,
-                    sgst_amount=sgst_amount,
-                    cgst=cgst,
-                    cgst_amount=cgst_amount,
-                    total=total,
-                    round_off=round_off,
-                    net_amount=net_amount,
                     paid_amount=0,
-                    unpaid_amount=net_amount,
+                    **{field: 0 for field in TOTAL_FIELDS},
+                    unpaid_amount=0,
                     reverse_charges=reverse_charges,
                     payment_status=payment_status,
                     created_by=user,
@@ -150,7 +136,13 @@ class BillingCreateView(ModifiedApiview):
                             hsn_code=expense.get('hsn_code'),
                             amount=expense.get('amount')
                         )
-            return Response({"message":"bill_created_successfully", "bill_id":billing_obj.id}, status=status.HTTP_201_CREATED)
+
+                totals = apply_invoice_totals(billing_obj)
+                billing_obj.save(update_fields=[*TOTAL_FIELDS, "unpaid_amount", "updated_date"])
+            return Response(
+                {"message":"bill_created_successfully", "bill_id":billing_obj.id, **totals},
+                status=status.HTTP_201_CREATED
+            )
 
         except Exception as e:
             return Response(
@@ -175,9 +167,12 @@ class BillingListView(ModifiedApiview):
             ).values(
                 'id', 'bill_type', 'billing_company', 'customer__name_of_business', 'invoice_date', "due_date", 'total', 'payment_status'
             )
+            page = paginate_keyset(request, bills, sort_key="invoice_date")
 
-            return Response(bills, status=status.HTTP_200_OK)
-        
+            return Response(page.items, status=status.HTTP_200_OK, headers=page.headers())
+
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -272,20 +267,13 @@ class BillingUpdateView(ModifiedApiview):
             task = request.data.get('task', billing_obj.task)
             hrs_spent = request.data.get('hrs_spent', billing_obj.hrs_spent)
             include_expense = request.data.get('include_expense', billing_obj.include_expense)
-            sub_total = request.data.get('sub_total', billing_obj.sub_total)
-            discount = request.data.get('discount', billing_obj.discount)
-            discount_amount = request.data.get('discount_amount', billing_obj.discount_amount)
-            gst = request.data.get('gst', billing_obj.gst)
-            gst_amount = request.data.get('gst_amount', billing_obj.gst_amount)
-            sgst = request.data.get('sgst', billing_obj.sgst)
-            sgst_amount = request.data.get('sgst_amount', billing_obj.sgst_amount)
-            cgst = request.data.get('cgst', billing_obj.cgst)
-            cgst_amount = request.data.get('cgst_amount', billing_obj.cgst_amount)
-            total = request.data.get('total', billing_obj.total)
-            round_off = request.data.get('round_off', billing_obj.round_off)
-            net_amount = request.data.get('net_amount', billing_obj.net_amount)
-            paid_amount = request.data.get('paid_amount', billing_obj.paid_amount)
-            unpaid_amount = request.data.get('unpaid_amount', billing_obj.unpaid_amount)
+            # Amounts are recomputed from the items by billing.tax and payments
+            # come from receipts; only the rates are taken
+            try:
+                discount = percent(request.data.get('discount', billing_obj.discount), "discount")
+                gst = percent(request.data.get('gst', billing_obj.gst), "gst", BILLING_GST_RATE)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             reverse_charges = request.data.get('reverse_charges', billing_obj.reverse_charges)
             bill_items = request.data.get('bill_items', [])
             expense_items = request.data.get('expense_items', [])
@@ -309,23 +297,11 @@ class BillingUpdateView(ModifiedApiview):
                 billing_obj.proforma_invoice = proforma_invoice
                 billing_obj.requested_by = requested_by
                 billing_obj.narration = narration
-                billing_obj.sub_total = sub_total
                 billing_obj.hrs_spent = hrs_spent
                 billing_obj.task = task
                 billing_obj.include_expense = include_expense
                 billing_obj.discount = discount
-                billing_obj.discount_amount = discount_amount
                 billing_obj.gst = gst
-                billing_obj.gst_amount = gst_amount
-                billing_obj.sgst = sgst
-                billing_obj.sgst_amount = sgst_amount
-                billing_obj.cgst = cgst
-                billing_obj.cgst_amount = cgst_amount
-                billing_obj.total = total
-                billing_obj.round_off = round_off
-                billing_obj.net_amount = net_amount
-                billing_obj.paid_amount = paid_amount
-                billing_obj.unpaid_amount = unpaid_amount
                 billing_obj.reverse_charges = reverse_charges
                 billing_obj.updated_by = user
                 billing_obj.save()
@@ -394,8 +370,11 @@ class BillingUpdateView(ModifiedApiview):
                     if expense_id not in requested_expense_item_ids:
                         expense_item.delete()
 
+                totals = apply_invoice_totals(billing_obj)
+                billing_obj.save(update_fields=[*TOTAL_FIELDS, "unpaid_amount", "updated_date"])
+
             # Serialize the updated billing object
-            return Response({"message":"Invoice Updated successfully"}, status=status.HTTP_200_OK)
+            return Response({"message":"Invoice Updated successfully", **totals}, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response(
@@ -691,16 +670,13 @@ class SendInvoiceAPIView(ModifiedApiview):
                 to_email = to_email.split(",")
             else:
                 to_email = to_email
-            print(to_email)
-            email = send_email(subject=email_subject,
-                               body=email_body,
-                               to_emails=to_email,
-                               attachment=attachments
-                               )
-            if email:
-                return Response({"message":"Invoice Email sent successfully"}, status=status.HTTP_200_OK)
-            else:
-                return Response({"message":"Error while sending email"}, status=status.HTTP_400_BAD_REQUEST)
+            email = enqueue_email(subject=email_subject,
+                                  body=email_body,
+                                  to_emails=to_email,
+                                  attachment=attachments,
+                                  created_by=user
+                                  )
+            return Response({"message":"Invoice Email queued successfully", "email_id": email.id}, status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response({"error": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -42,4 +42,18 @@ def send_email(subject, body, to_emails, attachment=None, html_body=None):
         return True
     except Exception as e:
         logger.error(f"Failed to send email to {to_emails}. Error: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def enqueue_email(subject, body, to_emails, attachment=None, html_body=None, created_by=None, send_at=None):
+    """
+    Queue an email in the outbox instead of sending it inside the request.
+    It is delivered by the `send_queued_emails` management command, not
+    before `send_at` when given.
+
+    Returns:
+        OutboundEmail: The queued email.
+    """
+    from mailer.outbox import enqueue_email as enqueue
+
+    return enqueue(subject, body, to_emails, attachments=attachment, html_body=html_body, created_by=created_by,
+                   send_at=send_at)
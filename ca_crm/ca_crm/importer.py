@@ -0,0 +1,325 @@
+import os
+import pandas as pd
+from django.db import transaction
+from ca_crm.spreadsheet import iter_sheet_chunks
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+TRUE_VALUES = {"true", "yes", "y", "1"}
+FALSE_VALUES = {"false", "no", "n", "0"}
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Column:
+    """
+    One column of an import sheet.
+
+    `source` is the header in the file and `field` the model attribute it is
+    written to (defaults to `source`). `kind` is one of "str", "int", "float",
+    "date", "bool" or "fk"; fk columns resolve values against `model` (by
+    `to_field`, default pk) and write the primary key to `field`.
+    """
+
+    def __init__(self, source, field=None, kind="str", required=False, default=None,
+                 choices=None, unique=False, model=None, to_field="pk", date_format=None):
+        self.source = source
+        self.field = field or source
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.choices = set(choices) if choices is not None else None
+        self.unique = unique
+        self.model = model
+        self.to_field = to_field
+        self.date_format = date_format
+
+
+class ImportSchema:
+    """
+    Declarative description of an import: the target model, its columns and
+    how conflicts with existing rows are handled.
+
+    `on_conflict` is "error" (existing unique values are reported), "skip"
+    (existing rows are left untouched) or "update" (existing rows are
+    updated from the sheet). `row_checks` are (message, func) pairs where func
+    takes the validated chunk DataFrame and returns a boolean mask of bad rows.
+    `prepare` can adjust each record dict before the instance is built, and
+    `after_create(objs, records, defaults)` writes dependent rows.
+    """
+
+    def __init__(self, model, columns, on_conflict="error", unique_fields=None,
+                 row_checks=(), prepare=None, after_create=None):
+        self.model = model
+        self.columns = columns
+        self.on_conflict = on_conflict
+        self.unique_fields = unique_fields or [column.field for column in columns if column.unique]
+        self.row_checks = row_checks
+        self.prepare = prepare
+        self.after_create = after_create
+
+    def required_headers(self):
+        return [column.source for column in self.columns if column.required]
+
+
+class ImportResult:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.total_rows = 0
+        self.valid_rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.objects = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def add_error(self, row, column, message):
+        self.errors.append({"row": row, "column": column, "error": message})
+
+    def report(self):
+        return {
+            "dry_run": self.dry_run,
+            "total_rows": self.total_rows,
+            "valid_rows": self.valid_rows,
+            "created": self.created,
+            "skipped": self.skipped,
+            "errors": sorted(self.errors, key=lambda error: error["row"] or 0),
+        }
+
+
+def iter_file_chunks(file, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Yield DataFrame chunks of an uploaded .xlsx or .csv file. The index of
+    each chunk is the row number in the file (header is row 1).
+    """
+    extension = os.path.splitext(file.name)[1].lower()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    if extension == ".csv":
+        # read_csv keeps counting the index across chunks
+        for chunk in pd.read_csv(file, chunksize=chunk_size, dtype=object):
+            chunk.index = chunk.index + 2
+            chunk.columns = [str(column).strip() for column in chunk.columns]
+            yield chunk
+    elif extension in (".xlsx", ".xlsm"):
+        for rows in iter_sheet_chunks(file, chunk_size):
+            yield pd.DataFrame.from_records(
+                [row for _, row in rows], index=[row_number for row_number, _ in rows]
+            )
+    else:
+        raise ImportFileError("Unsupported file format. Please upload an Excel (.xlsx) or CSV (.csv) file.")
+
+
+def _map_object(series, func):
+    # Series.map would turn ints into floats as soon as a None shows up
+    return pd.Series([func(value) for value in series], index=series.index, dtype=object)
+
+
+def _blank(series):
+    return series.isna() | series.astype(str).str.strip().eq("")
+
+
+def _as_str(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = _as_str(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return None
+
+
+class Importer:
+    def __init__(self, schema, chunk_size=IMPORT_CHUNK_SIZE):
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self._seen_unique = {field: set() for field in schema.unique_fields}
+
+    def _coerce(self, chunk, result):
+        """
+        Validate and convert one chunk column by column. Returns the cleaned
+        DataFrame (keyed by model field), a mask of rows that failed and a
+        mask of rows that already exist and are to be skipped.
+        """
+        bad = pd.Series(False, index=chunk.index)
+        skip = pd.Series(False, index=chunk.index)
+        cleaned = pd.DataFrame(index=chunk.index)
+
+        def fail(mask, column, message):
+            for row in mask[mask].index:
+                result.add_error(int(row), column.source, message)
+            return bad | mask
+
+        for column in self.schema.columns:
+            raw = chunk[column.source] if column.source in chunk.columns else pd.Series(None, index=chunk.index, dtype=object)
+            blank = _blank(raw)
+            if column.required:
+                bad = fail(blank, column, f"{column.source} is required")
+
+            present = raw[~blank]
+            if column.kind in ("int", "float", "fk") and not (column.kind == "fk" and column.to_field != "pk"):
+                values = pd.to_numeric(present, errors="coerce")
+                invalid = values.isna()
+                if column.kind in ("int", "fk"):
+                    invalid |= values.notna() & (values % 1 != 0)
+                bad = fail(invalid.reindex(chunk.index, fill_value=False), column, f"{column.source} must be a number")
+                values = values.where(~invalid).astype(object)
+                if column.kind in ("int", "fk"):
+                    values = _map_object(values, lambda value: int(value) if pd.notna(value) else None)
+            elif column.kind == "date":
+                values = pd.to_datetime(present, errors="coerce", format=column.date_format)
+                invalid = values.isna()
+                bad = fail(invalid.reindex(chunk.index, fill_value=False), column, f"{column.source} must be a valid date")
+                values = values.dt.date.astype(object).where(~invalid)
+            elif column.kind == "bool":
+                values = present.map(_as_bool)
+                invalid = values.isna()
+                bad = fail(invalid.reindex(chunk.index, fill_value=False), column, f"{column.source} must be true or false")
+            else:
+                values = present.map(_as_str)
+
+            values = values.reindex(chunk.index)
+            if column.default is not None:
+                values = values.where(values.notna(), column.default)
+
+            if column.choices is not None:
+                invalid = values.notna() & ~values.isin(column.choices)
+                bad = fail(invalid, column, f"Invalid {column.source}")
+
+            if column.kind == "fk" and len(values.dropna()):
+                lookup = {}
+                wanted = set(values.dropna())
+                for key, pk in column.model.objects.filter(**{f"{column.to_field}__in": wanted}).values_list(column.to_field, "pk"):
+                    lookup[key] = pk
+                missing = values.notna() & ~values.isin(list(lookup))
+                bad = fail(missing, column, f"{column.source} does not exist")
+                values = _map_object(values, lambda value: lookup.get(value))
+
+            cleaned[column.field] = values.astype(object).where(values.notna(), None)
+
+        for field in self.schema.unique_fields:
+            column = next(column for column in self.schema.columns if column.field == field)
+            values = cleaned[field]
+            duplicate = values.notna() & (values.duplicated(keep="first") | values.isin(self._seen_unique[field]))
+            bad = fail(duplicate, column, f"Duplicate {column.source} in file")
+            self._seen_unique[field].update(values.dropna())
+            if self.schema.on_conflict in ("error", "skip") and len(values.dropna()):
+                existing = set(
+                    self.schema.model.objects.filter(**{f"{field}__in": list(values.dropna())}).values_list(field, flat=True)
+                )
+                if self.schema.on_conflict == "error":
+                    bad = fail(values.isin(existing), column, f"{column.source} already exists")
+                else:
+                    skip = skip | values.isin(existing)
+
+        for message, check in self.schema.row_checks:
+            mask = check(cleaned).reindex(chunk.index, fill_value=False) & ~bad
+            for row in mask[mask].index:
+                result.add_error(int(row), None, message)
+            bad = bad | mask
+
+        return cleaned, bad, skip & ~bad
+
+    def _write(self, records, defaults, result, collect):
+        schema = self.schema
+        objs = []
+        for record in records:
+            if schema.prepare:
+                record = schema.prepare(record)
+            objs.append(schema.model(**defaults, **record))
+
+        options = {}
+        if schema.on_conflict == "skip":
+            options["ignore_conflicts"] = True
+        elif schema.on_conflict == "update":
+            options.update(
+                update_conflicts=True,
+                unique_fields=schema.unique_fields,
+                update_fields=[
+                    column.field for column in schema.columns if column.field not in schema.unique_fields
+                ],
+            )
+        created = schema.model.objects.bulk_create(objs, batch_size=self.chunk_size, **options)
+        if schema.after_create:
+            schema.after_create(created, records, defaults)
+        result.created += len(created)
+        if collect:
+            result.objects.extend(created)
+
+    def _check_headers(self, chunk, result):
+        missing = [header for header in self.schema.required_headers() if header not in chunk.columns]
+        for header in missing:
+            result.add_error(None, header, f"{header} column is missing in the file")
+        return not missing
+
+    def run(self, file, defaults=None, dry_run=False, partial=False, collect=False):
+        """
+        Import `file` into the schema's model.
+
+        By default the whole file is validated first and nothing is written
+        unless every row is valid; the write pass then re-reads the file
+        chunk by chunk inside one transaction. With `partial=True` valid rows
+        are written and invalid ones reported. `dry_run` only validates.
+        """
+        defaults = defaults or {}
+        result = ImportResult(dry_run)
+
+        if not partial or dry_run:
+            for index, chunk in enumerate(iter_file_chunks(file, self.chunk_size)):
+                if index == 0 and not self._check_headers(chunk, result):
+                    return result
+                _, bad, skip = self._coerce(chunk, result)
+                result.total_rows += len(chunk)
+                result.valid_rows += int((~bad).sum())
+                result.skipped += int(skip.sum())
+            if dry_run or not result.ok:
+                return result
+            self._seen_unique = {field: set() for field in self.schema.unique_fields}
+            result.skipped = 0
+
+        try:
+            with transaction.atomic():
+                for index, chunk in enumerate(iter_file_chunks(file, self.chunk_size)):
+                    if index == 0 and not self._check_headers(chunk, result):
+                        raise _Rollback
+                    cleaned, bad, skip = self._coerce(chunk, result)
+                    if partial:
+                        result.total_rows += len(chunk)
+                        result.valid_rows += int((~bad).sum())
+                    elif bad.any():
+                        # The data changed since the validation pass
+                        raise _Rollback
+                    result.skipped += int(skip.sum())
+                    records = cleaned[~(bad | skip)].to_dict(orient="records")
+                    if records:
+                        self._write(records, defaults, result, collect)
+        except _Rollback:
+            result.created = 0
+            result.objects = []
+        return result
+
+
+def run_import(schema, file, defaults=None, dry_run=False, partial=False, collect=False, chunk_size=IMPORT_CHUNK_SIZE):
+    return Importer(schema, chunk_size).run(file, defaults, dry_run=dry_run, partial=partial, collect=collect)
+
+
+def is_dry_run(request):
+    value = request.query_params.get("dry_run") or request.data.get("dry_run")
+    return str(value).lower() in TRUE_VALUES
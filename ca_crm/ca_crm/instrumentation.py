@@ -0,0 +1,197 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from loguru import logger
+
+
+METRICS_ENABLED = getattr(settings, "METRICS_ENABLED", True)
+# Number of most recent requests per endpoint the percentiles and histogram are computed over
+METRICS_WINDOW = getattr(settings, "METRICS_WINDOW", 500)
+METRICS_SLOW_REQUEST_MS = getattr(settings, "METRICS_SLOW_REQUEST_MS", 2000)
+# Maximum queries per request, keyed by URL name
+QUERY_BUDGETS = getattr(settings, "QUERY_BUDGETS", {})
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+MAX_DUPLICATE_SIGNATURES = 20
+
+_IN_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+
+
+def query_signature(sql):
+    """SQL with parameters left out and IN lists collapsed, so repeats of one query match."""
+    return _IN_LIST.sub("(...)", sql)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting the queries, time spent in the
+    database and how often each query signature ran.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.count += 1
+            self.signatures[query_signature(sql)] += 1
+
+    def duplicates(self):
+        """Signatures executed more than once (likely N+1 loops), most frequent first."""
+        return [(sql, count) for sql, count in self.signatures.most_common() if count > 1]
+
+    def report(self):
+        lines = [f"{self.count} queries, {self.db_time * 1000:.1f} ms in the database"]
+        for sql, count in self.duplicates():
+            lines.append(f"  {count}x {sql}")
+        return "\n".join(lines)
+
+    def watch(self, stack, aliases=None):
+        for alias in aliases or connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class EndpointStats:
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.budget_exceeded = 0
+        self.duplicates = Counter()
+
+    def add(self, wall_ms, queries, db_ms, size, status_code, duplicates, over_budget):
+        self.samples.append((wall_ms, queries, db_ms, size))
+        self.requests += 1
+        self.errors += status_code >= 500
+        self.budget_exceeded += over_budget
+        for sql, count in duplicates:
+            self.duplicates[sql] += count
+        if len(self.duplicates) > MAX_DUPLICATE_SIGNATURES * 5:
+            self.duplicates = Counter(dict(self.duplicates.most_common(MAX_DUPLICATE_SIGNATURES)))
+
+    def snapshot(self):
+        wall = [sample[0] for sample in self.samples]
+        queries = [sample[1] for sample in self.samples]
+        db = [sample[2] for sample in self.samples]
+        sizes = [sample[3] for sample in self.samples]
+        window = len(self.samples) or 1
+        histogram = {f"le_{bound}": sum(1 for value in wall if value <= bound) for bound in LATENCY_BUCKETS_MS}
+        histogram["le_inf"] = len(wall)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "budget_exceeded": self.budget_exceeded,
+            "window": len(self.samples),
+            "wall_ms": {
+                "avg": round(sum(wall) / window, 2),
+                "p50": round(_percentile(wall, 50), 2),
+                "p95": round(_percentile(wall, 95), 2),
+                "p99": round(_percentile(wall, 99), 2),
+                "max": round(max(wall, default=0), 2),
+            },
+            "queries": {"avg": round(sum(queries) / window, 2), "max": max(queries, default=0)},
+            "db_ms": {"avg": round(sum(db) / window, 2), "p95": round(_percentile(db, 95), 2)},
+            "response_bytes": {"avg": round(sum(sizes) / window), "max": max(sizes, default=0)},
+            "latency_histogram": histogram,
+            "duplicate_queries": [
+                {"sql": sql, "count": count} for sql, count in self.duplicates.most_common(MAX_DUPLICATE_SIGNATURES)
+            ],
+        }
+
+
+class MetricsRegistry:
+    """Process-local, rolling request metrics per endpoint."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.started = time.time()
+
+    def record(self, endpoint, wall_ms, recorder, size, status_code, over_budget=False):
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats(self.window)
+            stats.add(
+                wall_ms, recorder.count, recorder.db_time * 1000, size, status_code,
+                recorder.duplicates(), over_budget,
+            )
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "since": self.started,
+                "endpoints": {endpoint: stats.snapshot() for endpoint, stats in sorted(self.endpoints.items())},
+            }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.started = time.time()
+
+
+registry = MetricsRegistry()
+
+
+def endpoint_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.route
+
+
+def _response_size(response):
+    if getattr(response, "streaming", False):
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+class InstrumentationMiddleware:
+    """
+    Records wall time, query count, database time, repeated queries and
+    response size for every request in `registry`, keyed by URL name, and
+    logs requests that go over their QUERY_BUDGETS entry.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not METRICS_ENABLED:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            recorder.watch(stack)
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        endpoint = endpoint_name(request)
+        budget = QUERY_BUDGETS.get(endpoint)
+        over_budget = budget is not None and recorder.count > budget
+        registry.record(endpoint, wall_ms, recorder, _response_size(response), response.status_code, over_budget)
+
+        if over_budget:
+            logger.warning(f"{endpoint} ran {recorder.count} queries (budget {budget})\n{recorder.report()}")
+        if wall_ms > METRICS_SLOW_REQUEST_MS:
+            logger.warning(f"Slow request {request.method} {request.path} ({endpoint}): {wall_ms:.0f} ms, {recorder.count} queries")
+        return response
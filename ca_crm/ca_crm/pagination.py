@@ -0,0 +1,102 @@
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+
+
+DEFAULT_PAGE_LIMIT = getattr(settings, "DEFAULT_PAGE_LIMIT", 100)
+MAX_PAGE_LIMIT = getattr(settings, "MAX_PAGE_LIMIT", 500)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, limit):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def meta(self):
+        return {"next_cursor": self.next_cursor, "has_next": self.has_next, "limit": self.limit}
+
+    def headers(self):
+        headers = {"X-Has-Next": "true" if self.has_next else "false"}
+        if self.next_cursor:
+            headers["X-Next-Cursor"] = self.next_cursor
+        return headers
+
+
+def _encode_cursor(value, pk):
+    raw = json.dumps({"k": value, "id": pk}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor, field, pk_field):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return field.to_python(data["k"]), pk_field.to_python(data["id"])
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def _parse_limit(request, default_limit, max_limit):
+    limit = request.query_params.get("limit")
+    if limit in (None, ""):
+        return default_limit
+    if not str(limit).isdigit() or int(limit) < 1:
+        raise InvalidCursor("limit must be a positive integer")
+    return min(int(limit), max_limit)
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def paginate_keyset(request, queryset, sort_key="id", descending=True,
+                    default_limit=DEFAULT_PAGE_LIMIT, max_limit=MAX_PAGE_LIMIT):
+    """
+    Return one page of `queryset` ordered by (sort_key, pk).
+
+    The client passes back `cursor` (taken from the previous page) instead of
+    an offset, so every page is a single indexed range scan no matter how deep
+    it is. `sort_key` must be a non-null concrete field of the model; for
+    values() querysets both it and the primary key must be among the values.
+    """
+    model = queryset.model
+    field = model._meta.get_field(sort_key)
+    pk_field = model._meta.pk
+    sort_name, pk_name = field.attname, pk_field.attname
+    limit = _parse_limit(request, default_limit, max_limit)
+
+    if sort_name == pk_name:
+        ordering = [f"-{pk_name}" if descending else pk_name]
+    else:
+        ordering = [f"-{sort_name}", f"-{pk_name}"] if descending else [sort_name, pk_name]
+    queryset = queryset.order_by(*ordering)
+
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        value, pk = _decode_cursor(cursor, field, pk_field)
+        op = "lt" if descending else "gt"
+        if sort_name == pk_name:
+            queryset = queryset.filter(**{f"{pk_name}__{op}": pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{sort_name}__{op}": value}) | Q(**{sort_name: value, f"{pk_name}__{op}": pk})
+            )
+
+    # One extra row tells us whether another page exists without a COUNT
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(_row_value(last, sort_name), _row_value(last, pk_name))
+    return KeysetPage(rows, next_cursor, limit)
@@ -0,0 +1,12 @@
+from datetime import datetime
+
+
+def date_param(params, name):
+    """The YYYY-MM-DD date in params[name] (query params or request data), or None when blank."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
@@ -55,9 +55,12 @@ INSTALLED_APPS = [
     'billing',
     'company_profile',
     "reminders",
+    "mailer",
+    "search",
 ]
 
 MIDDLEWARE = [
+    'ca_crm.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,6 +73,23 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'ca_crm.urls'
 
+# Request metrics (ca_crm.instrumentation), served at /metrics/
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+METRICS_WINDOW = 500
+METRICS_SLOW_REQUEST_MS = 2000
+# Maximum queries per request by URL name (including the user lookup on a
+# principal cache miss); exceeding one is logged and counted
+QUERY_BUDGETS = {
+    "task-board-summary": 2,
+    "consolidate-task-details": 3,
+    "reminder-get": 3,
+    "customer-detail": 3,
+    "schedule-calendar": 2,
+    "reminder-upcoming": 2,
+    "global-search": 2,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'custom_auth.authentication.JWTAuthentication',  # Replace 'yourapp' with your actual app name
@@ -84,6 +104,26 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(hours=2),
 }
 
+# Role permission sets, cached principals and the work category template
+# version are invalidated through this cache. LocMemCache is per process and
+# only right for a single worker: with several, set CACHE_BACKEND to a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache or
+# django.core.cache.backends.db.DatabaseCache with CACHE_LOCATION its table).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'ca-crm'),
+    }
+}
+
+# Seconds an authenticated user stays in the principal cache (custom_auth.principal).
+# Invalidation only reaches other workers through a shared CACHE_BACKEND; with
+# the per-process LocMemCache the shorter local TTL bounds how stale a user gets
+PRINCIPAL_CACHE_TTL = 300
+PRINCIPAL_LOCAL_CACHE_TTL = 30
+# Seconds a compiled role permission set stays in the cache (custom_auth.role_permissions)
+ROLE_PERMISSION_CACHE_TTL = 300
+
 
 TEMPLATES = [
     {
@@ -141,6 +181,10 @@ CORS_ALLOWED_ORIGINS = [
     "https://erpapi.vatsalsharma.com"
 ]
 CORS_ALLOW_CREDENTIALS = True
+# Keyset pagination (ca_crm.pagination) returns the next page cursor in these headers
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor", "X-Has-Next"]
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -163,6 +207,27 @@ STATICFILES_DIRS = [
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# File storage service (ca_crm.storage): default backend for uploads ("local" or
+# "cloudinary") and the local LRU cache of remote files, sizes in bytes
+STORAGE_BACKEND = "local"
+STORAGE_CACHE_DIR = os.path.join(BASE_DIR, 'storage_cache')
+STORAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+STORAGE_CACHE_MAX_FILE_BYTES = 50 * 1024 * 1024
+# Remote files are only ever fetched from these (Cloudinary delivery) hosts
+STORAGE_CLOUDINARY_HOSTS = ("res.cloudinary.com",)
+# Background checklist file uploads (`manage.py process_file_uploads`); sizes in bytes
+UPLOAD_STAGING_DIR = os.path.join(BASE_DIR, 'upload_staging')
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+UPLOAD_MAX_ATTEMPTS = 5
+# Most activity report PDFs one archive download renders (serially, in the request)
+ACTIVITY_REPORT_BATCH_LIMIT = 100
+# Longest range, in days, the schedule calendar serves in one request
+SCHEDULE_CALENDAR_MAX_DAYS = 62
+# Global search (search app): "fts5" (SQLite) or "table"; unset picks FTS5 when available
+# SEARCH_BACKEND = "fts5"
+SEARCH_DEFAULT_RESULTS = 20
+SEARCH_MAX_RESULTS = 100
 
 EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND")
 EMAIL_HOST = os.environ.get("EMAIL_HOST")
@@ -171,6 +236,43 @@ EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS")
 EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL")
+# Outbox delivered by `manage.py send_queued_emails` (mailer app)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE = 60
+EMAIL_OUTBOX_RETRY_MAX = 3600
+# URL attachments are downloaded this many at a time and zipped above the total size in bytes
+EMAIL_ATTACHMENT_FETCH_WORKERS = 4
+EMAIL_ATTACHMENT_FETCH_TIMEOUT = 30
+EMAIL_ATTACHMENT_ZIP_THRESHOLD = 10 * 1024 * 1024
+# Bulk reminder campaigns (`manage.py send_reminder_campaigns`); rate limit is emails per minute
+REMINDER_CAMPAIGN_CONCURRENCY = 4
+REMINDER_CAMPAIGN_MAX_CONCURRENCY = 8
+REMINDER_CAMPAIGN_RATE_LIMIT = 120
+# Due reminder digests (`manage.py send_due_reminders`) and the upcoming list range in days
+REMINDER_DISPATCH_BATCH_SIZE = 200
+REMINDER_UPCOMING_DAYS = 30
+REMINDER_UPCOMING_MAX_DAYS = 366
+# Invoice totals (billing.tax): GST percent when an invoice gives none, and the
+# supplier's GST state code for billing companies without one on their profile
+BILLING_GST_RATE = 18
+BILLING_HOME_STATE_CODE = None
+# Recurring work generator (`manage.py generate_recurring_work`)
+RECURRING_WORK_LEAD_DAYS = 7
+RECURRING_WORK_LOOKBACK_DAYS = 31
+# Longest range, in days, of the recurring work forecast
+RECURRING_WORK_FORECAST_MAX_DAYS = 366
+# Seconds the task board summary is cached per filter set
+TASK_BOARD_SUMMARY_TTL = 30
+# Capacity planner (employees.capacity): hours per working day, working
+# days as a Monday-first weekmask and the allocation ratios that flag a week
+CAPACITY_WORKDAY_HOURS = 8
+CAPACITY_WEEKMASK = "1111100"
+CAPACITY_OVER_ALLOCATION_RATIO = 1.0
+CAPACITY_UNDER_ALLOCATION_RATIO = 0.5
+# Task profitability ledger (`manage.py rebuild_task_profitability`); used for
+# employees without an hourly_cost on their profile
+PROFITABILITY_DEFAULT_HOURLY_COST = 0
 
 cloudinary.config( 
     cloud_name=os.environ.get("CLOUD_NAME"), 
@@ -0,0 +1,36 @@
+from openpyxl import load_workbook
+
+
+SHEET_CHUNK_SIZE = 1000
+
+
+def _header(value):
+    return str(value).strip() if value is not None else ""
+
+
+def iter_sheet_chunks(file, chunk_size=SHEET_CHUNK_SIZE):
+    """
+    Stream the first worksheet of an uploaded .xlsx file in chunks.
+
+    The workbook is opened in read-only mode straight from the upload, so
+    memory stays bounded by `chunk_size` rows whatever the sheet size.
+    Yields lists of (row_number, row_dict) pairs, where row_number is the
+    Excel row number (the header is row 1) and row_dict maps header to value.
+    Completely empty rows are skipped.
+    """
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [_header(value) for value in next(rows, ())]
+        chunk = []
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None or value == "" for value in values):
+                continue
+            chunk.append((row_number, dict(zip(headers, values))))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
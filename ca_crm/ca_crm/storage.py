@@ -0,0 +1,300 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import tempfile
+import threading
+from urllib.parse import unquote, urlsplit
+from urllib.request import urlopen
+import cloudinary.api
+import cloudinary.uploader
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Backend used by save() when none is given: "local" or "cloudinary"
+STORAGE_BACKEND = getattr(settings, "STORAGE_BACKEND", "local")
+# Local copies of remote files, evicted least recently used first
+STORAGE_CACHE_DIR = getattr(settings, "STORAGE_CACHE_DIR", os.path.join(settings.BASE_DIR, "storage_cache"))
+STORAGE_CACHE_MAX_BYTES = getattr(settings, "STORAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+# Larger downloads are streamed to the caller but not kept
+STORAGE_CACHE_MAX_FILE_BYTES = getattr(settings, "STORAGE_CACHE_MAX_FILE_BYTES", 50 * 1024 * 1024)
+STORAGE_FETCH_TIMEOUT = getattr(settings, "STORAGE_FETCH_TIMEOUT", 30)
+# Cloudinary uploads above this size are sent in chunks
+STORAGE_CHUNKED_UPLOAD_BYTES = getattr(settings, "STORAGE_CHUNKED_UPLOAD_BYTES", 20 * 1024 * 1024)
+# The only hosts remote files are fetched from
+STORAGE_CLOUDINARY_HOSTS = getattr(settings, "STORAGE_CLOUDINARY_HOSTS", ("res.cloudinary.com",))
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+CLOUDINARY_CACHE_PREFIX = "storage:cloudinary"
+
+
+class StoredFile:
+    """An open, readable file from storage. Close it (or use it as a context manager) when done."""
+
+    def __init__(self, file, name, size, content_type):
+        self.file = file
+        self.name = name
+        self.size = size
+        self.content_type = content_type
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _chunks(file):
+    if hasattr(file, "chunks"):
+        return file.chunks(CHUNK_SIZE)
+    return iter(lambda: file.read(CHUNK_SIZE), b"")
+
+
+def _copy(source, target):
+    """Stream `source` into `target`; returns (sha256 hex digest, size)."""
+    digest, size = hashlib.sha256(), 0
+    for chunk in _chunks(source):
+        digest.update(chunk)
+        target.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _extension(file):
+    return os.path.splitext(getattr(file, "name", "") or "")[1].lower()
+
+
+def _content_type(name):
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+class LocalBackend:
+    """
+    Files under MEDIA_ROOT/<folder>/, named by the SHA-256 of their content,
+    so the same upload is only stored once. Paths look like
+    "media/<folder>/<hash><ext>".
+    """
+    name = "local"
+
+    def __init__(self, root=None, prefix=None):
+        self.root = root or settings.MEDIA_ROOT
+        self.prefix = prefix or settings.MEDIA_URL.strip("/")
+
+    def save(self, file, folder):
+        directory = os.path.join(self.root, folder)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                digest, _ = _copy(file, target)
+            name = f"{digest}{_extension(file)}"
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(temporary)
+            else:
+                os.replace(temporary, os.path.join(directory, name))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return posixpath.join(self.prefix, folder, name)
+
+    def owns(self, path):
+        return path.lstrip("/").startswith(f"{self.prefix}/")
+
+    def local_path(self, path):
+        relative = path.lstrip("/")[len(self.prefix) + 1:]
+        full = os.path.normpath(os.path.join(self.root, unquote(relative)))
+        if not full.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"{path} is outside the media directory")
+        return full
+
+    def open(self, path):
+        full = self.local_path(path)
+        return StoredFile(open(full, "rb"), os.path.basename(full), os.path.getsize(full), _content_type(full))
+
+
+class CloudinaryBackend:
+    """
+    Files on Cloudinary with the SHA-256 of their content as public id. The
+    URL of every hash already uploaded is remembered in the cache, so a
+    repeated upload does not leave the server.
+    """
+    name = "cloudinary"
+
+    def save(self, file, folder):
+        if isinstance(file, str):
+            # A remote URL or data URI; Cloudinary fetches it itself
+            return cloudinary.uploader.upload(file, folder=folder, resource_type="auto")["secure_url"]
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spooled:
+            digest, size = _copy(file, spooled)
+            key = f"{CLOUDINARY_CACHE_PREFIX}:{folder}:{digest}"
+            url = cache.get(key)
+            if url:
+                return url
+            spooled.seek(0)
+            upload = cloudinary.uploader.upload_large if size > STORAGE_CHUNKED_UPLOAD_BYTES else cloudinary.uploader.upload
+            result = upload(
+                spooled, folder=folder, public_id=digest, resource_type="auto",
+                overwrite=False, unique_filename=False,
+            )
+        cache.set(key, result["secure_url"], None)
+        return result["secure_url"]
+
+    def owns(self, url):
+        """Whether `url` is a delivery URL of the configured Cloudinary account."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.hostname not in STORAGE_CLOUDINARY_HOSTS:
+            return False
+        cloud_name = cloudinary.config().cloud_name
+        return not cloud_name or parts.path.startswith(f"/{cloud_name}/")
+
+    def resolve(self, public_id):
+        """The delivery URL of a public id (with or without its extension)."""
+        public_id = os.path.splitext(public_id.strip("/"))[0]
+        key = f"{CLOUDINARY_CACHE_PREFIX}:resource:{public_id}"
+        url = cache.get(key)
+        if not url:
+            url = cloudinary.api.resource(public_id)["secure_url"]
+            cache.set(key, url, None)
+        return url
+
+
+class ReadCache:
+    """
+    Remote files kept on local disk under a total size limit, evicting the
+    least recently read first. Entries are named by the SHA-256 of their URL
+    and written through a temporary file, so concurrent readers never see
+    half a download.
+    """
+
+    def __init__(self, directory=STORAGE_CACHE_DIR, max_bytes=STORAGE_CACHE_MAX_BYTES,
+                 max_file_bytes=STORAGE_CACHE_MAX_FILE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        path = os.path.join(self.directory, key)
+        return path, f"{path}.type"
+
+    def open(self, url, timeout=STORAGE_FETCH_TIMEOUT):
+        name = os.path.basename(unquote(urlsplit(url).path)) or "file"
+        path, type_path = self._paths(url)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return self._download(url, name, path, type_path, timeout)
+        try:
+            # mtime is the recency used for eviction
+            os.utime(path)
+            with open(type_path) as saved:
+                content_type = saved.read()
+        except FileNotFoundError:
+            # Evicted since it was opened; the open handle still reads
+            content_type = _content_type(name)
+        return StoredFile(file, name, os.fstat(file.fileno()).st_size, content_type)
+
+    def _download(self, url, name, path, type_path, timeout):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix=".download-")
+        try:
+            with urlopen(url, timeout=timeout) as response, os.fdopen(fd, "wb") as target:
+                _, size = _copy(response, target)
+                header = (response.headers.get("Content-Type") or "").split(";")[0].strip()
+            content_type = header if header and header != "application/octet-stream" else _content_type(name)
+            file = open(temporary, "rb")
+        except BaseException:
+            os.remove(temporary)
+            raise
+        if size > self.max_file_bytes:
+            # Too big to keep; the open handle stays readable after the unlink
+            os.remove(temporary)
+            return StoredFile(file, name, size, content_type)
+        with open(type_path, "w") as saved:
+            saved.write(content_type)
+        os.replace(temporary, path)
+        self.evict()
+        return StoredFile(file, name, size, content_type)
+
+    def evict(self):
+        """Remove the least recently read entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith(".") and not entry.name.endswith(".type"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for stale in (path, f"{path}.type"):
+                    try:
+                        os.remove(stale)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+
+BACKENDS = {backend.name: backend for backend in (LocalBackend(), CloudinaryBackend())}
+_read_cache = ReadCache()
+
+
+def get_backend(name=None):
+    name = name or STORAGE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {name}")
+    return BACKENDS[name]
+
+
+def save(file, folder, backend=None):
+    """
+    Store an uploaded file (streamed in chunks) under `folder` and return
+    the path or URL to keep on the record. Identical content is stored once.
+    """
+    return get_backend(backend).save(file, folder)
+
+
+def check_source(source):
+    """
+    Raise ValueError unless `source` is something save() returns: a
+    "media/..." path inside MEDIA_ROOT, a Cloudinary delivery URL or a bare
+    Cloudinary public id. Nothing else is read, so records cannot point the
+    server at its own files or at other hosts.
+    """
+    if not isinstance(source, str) or not source.strip():
+        raise ValueError("A stored file path is required")
+    parts = urlsplit(source)
+    if parts.scheme or parts.netloc:
+        if not BACKENDS["cloudinary"].owns(source):
+            raise ValueError(f"{source} is not a stored file")
+    elif BACKENDS["local"].owns(source):
+        BACKENDS["local"].local_path(source)
+    elif source.startswith("/") or ".." in source.split("/"):
+        raise ValueError(f"{source} is not a stored file")
+
+
+def open_file(source, timeout=STORAGE_FETCH_TIMEOUT):
+    """
+    Open a stored file for reading as a StoredFile. `source` must pass
+    check_source(). Cloudinary files are served from the local read cache
+    after the first download.
+    """
+    check_source(source)
+    if urlsplit(source).scheme:
+        return _read_cache.open(source, timeout)
+    if BACKENDS["local"].owns(source):
+        return BACKENDS["local"].open(source)
+    return _read_cache.open(BACKENDS["cloudinary"].resolve(source), timeout)
@@ -0,0 +1,93 @@
+import io
+import tempfile
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlsplit
+import jwt
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import resolve
+from ca_crm import storage
+from ca_crm.instrumentation import QueryRecorder, QUERY_BUDGETS
+from custom_auth.principal import get_principal
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(budget, using=DEFAULT_DB_ALIAS, label="Block"):
+    """
+    Fail if the block runs more than `budget` queries. The error lists the
+    repeated queries to point at N+1 loops.
+    """
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        recorder.watch(stack, [using])
+        yield recorder
+    if recorder.count > budget:
+        raise QueryBudgetExceeded(f"{label} is over its query budget of {budget}: {recorder.report()}")
+
+
+def assert_query_budget(client, method, path, budget=None, **kwargs):
+    """
+    Call an endpoint with a test client and fail if it runs more queries
+    than its budget (by default the QUERY_BUDGETS entry for its URL name).
+    Returns the response.
+    """
+    name = resolve(urlsplit(path).path).view_name
+    if budget is None:
+        if name not in QUERY_BUDGETS:
+            raise ValueError(f"No query budget configured for {name}")
+        budget = QUERY_BUDGETS[name]
+    with assert_max_queries(budget, label=name):
+        response = getattr(client, method.lower())(path, **kwargs)
+    return response
+
+
+def auth_headers(user):
+    """
+    Test client keyword arguments authenticating as `user` with a short-lived
+    access token. The user is put in the principal cache, as on a warm
+    worker, so query budgets count only the endpoint's own queries.
+    """
+    get_principal(user.id)
+    token = jwt.encode(
+        {"user_id": user.id, "exp": datetime.now(timezone.utc) + timedelta(minutes=5)},
+        settings.SECRET_KEY, algorithm="HS256",
+    )
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+class _Response(io.BytesIO):
+    def __init__(self, content, content_type):
+        super().__init__(content)
+        self.headers = {"Content-Type": content_type}
+
+
+@contextmanager
+def cloudinary_stand_in(files, cloud_name="firm"):
+    """
+    Serve `files` ({url: bytes, or an exception to raise}) in place of
+    Cloudinary for ca_crm.storage, with the read cache in a temporary
+    directory. Yields the list of URLs fetched, in order.
+    """
+    fetched = []
+
+    def urlopen(url, timeout=None):
+        fetched.append(url)
+        content = files[url]
+        if isinstance(content, Exception):
+            raise content
+        return _Response(content, "application/octet-stream")
+
+    with tempfile.TemporaryDirectory() as directory, ExitStack() as stack:
+        stack.enter_context(mock.patch.object(storage, "urlopen", urlopen))
+        stack.enter_context(mock.patch.object(storage, "_read_cache", storage.ReadCache(directory)))
+        stack.enter_context(
+            mock.patch.object(storage.cloudinary, "config", return_value=SimpleNamespace(cloud_name=cloud_name))
+        )
+        yield fetched
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from ca_crm import storage
+from ca_crm.testing import cloudinary_stand_in
+
+
+CLOUD = "https://res.cloudinary.com/firm/raw/upload"
+
+
+class LocalStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.backend = storage.LocalBackend(root=directory.name, prefix="media")
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.backend.save(SimpleUploadedFile("a.pdf", b"same"), "docs")
+        second = self.backend.save(SimpleUploadedFile("b.PDF", b"same"), "docs")
+        other = self.backend.save(SimpleUploadedFile("c.pdf", b"other"), "docs")
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.startswith("media/docs/") and first.endswith(".pdf"))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.backend.root, "docs"))), sorted(
+            os.path.basename(path) for path in (first, other)
+        ))
+        with self.backend.open(first) as stored:
+            self.assertEqual((stored.read(), stored.content_type), (b"same", "application/pdf"))
+
+
+class CheckSourceTests(SimpleTestCase):
+    def test_stored_paths_and_own_cloudinary_urls_pass(self):
+        with cloudinary_stand_in({}):
+            for source in ("media/docs/a.pdf", f"{CLOUD}/a.pdf", "folder/public-id"):
+                storage.check_source(source)
+
+    def test_traversal_and_foreign_hosts_are_rejected(self):
+        sources = (
+            "media/../ca_crm/settings.py", "media/docs/%2e%2e/%2e%2e/db.sqlite3", "/etc/passwd", "docs/../../etc",
+            "file:///etc/passwd", "https://example.com/a.pdf", "http://169.254.169.254/latest",
+            "https://res.cloudinary.com/other-account/raw/upload/a.pdf", "",
+        )
+        with cloudinary_stand_in({}):
+            for source in sources:
+                with self.subTest(source=source), self.assertRaises(ValueError):
+                    storage.check_source(source)
+
+
+class ReadCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = storage.ReadCache(directory.name, max_bytes=25, max_file_bytes=15)
+        self.files = {f"{CLOUD}/{name}.pdf": name.encode() * 10 for name in ("a", "b", "c")}
+        self.files[f"{CLOUD}/big.pdf"] = b"z" * 20
+
+    def read(self, name):
+        with self.cache.open(f"{CLOUD}/{name}.pdf") as stored:
+            return stored.read()
+
+    def cached(self, name):
+        return os.path.exists(self.cache._paths(f"{CLOUD}/{name}.pdf")[0])
+
+    def test_repeat_reads_are_served_locally(self):
+        with cloudinary_stand_in(self.files) as fetched:
+            self.assertEqual(self.read("a"), b"a" * 10)
+            self.assertEqual(self.read("a"), b"a" * 10)
+        self.assertEqual(fetched, [f"{CLOUD}/a.pdf"])
+
+    def test_least_recently_read_entries_are_evicted(self):
+        with cloudinary_stand_in(self.files):
+            self.read("a")
+            self.read("b")
+            os.utime(self.cache._paths(f"{CLOUD}/a.pdf")[0], (100, 100))
+            os.utime(self.cache._paths(f"{CLOUD}/b.pdf")[0], (200, 200))
+            # Reading "a" makes it the most recent, so "b" goes first
+            self.read("a")
+            self.read("c")
+        self.assertEqual([self.cached(name) for name in ("a", "b", "c")], [True, False, True])
+
+    def test_files_over_the_entry_limit_are_not_kept(self):
+        with cloudinary_stand_in(self.files):
+            self.assertEqual(self.read("big"), b"z" * 20)
+        self.assertFalse(self.cached("big"))
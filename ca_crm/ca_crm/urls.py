@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from ca_crm.views import MetricsView
 
 urlpatterns = [
     path('auth/', include('custom_auth.urls')),
@@ -30,6 +31,8 @@ urlpatterns = [
     path('billing/', include('billing.urls')),
     path('manage/', include('company_profile.urls')),
     path('reminder/', include('reminders.urls')),
+    path('search/', include('search.urls')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     
 ]
 
@@ -0,0 +1,45 @@
+import hmac
+from django.conf import settings
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from workflow.views import ModifiedApiview
+from ca_crm.instrumentation import registry
+
+
+METRICS_PERMISSION = getattr(settings, "METRICS_PERMISSION", "view_metrics")
+
+
+class MetricsView(ModifiedApiview):
+    """
+    Request metrics collected by InstrumentationMiddleware for this process.
+    Readable with the METRICS_TOKEN (X-Metrics-Token header, for scrapers)
+    or by a user with the view_metrics permission.
+    """
+    # Access is checked in has_metrics_access so scrapers can use the token
+    permission_classes = [AllowAny]
+
+    def has_metrics_access(self, request):
+        token = getattr(settings, "METRICS_TOKEN", None)
+        supplied = request.headers.get("X-Metrics-Token")
+        if token and supplied and hmac.compare_digest(token, supplied):
+            return True
+        user = self.get_user_from_token(request)
+        return bool(user and user.has_access(METRICS_PERMISSION))
+
+    def get(self, request):
+        try:
+            if not self.has_metrics_access(request):
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            return Response(registry.snapshot(), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request):
+        try:
+            if not self.has_metrics_access(request):
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            registry.reset()
+            return Response({"message": "Metrics reset successfully"}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
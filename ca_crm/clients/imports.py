@@ -0,0 +1,45 @@
+from ca_crm.importer import Column, ImportSchema
+from search.index import index_objects
+from .models import Customer
+
+
+CUSTOMER_IMPORT = ImportSchema(
+    Customer,
+    columns=[
+        Column("name_of_business", required=True),
+        Column("customer_code", required=True, unique=True),
+        Column("file_no", required=True),
+        Column("status", required=True, choices=[value for value, _ in Customer.status_choices]),
+        Column("business_pan_no", required=True),
+        Column("mobile", required=True),
+        Column("address"),
+        Column("road"),
+        Column("state"),
+        Column("city"),
+        Column("country"),
+        Column("pin"),
+        Column("contact_number"),
+        Column("email"),
+        Column("additional_contact_number"),
+        Column("secondary_email_id"),
+        Column("gst_no"),
+        Column("gst_state_code"),
+        Column("cin_number"),
+        Column("llipin_number"),
+        Column("din_number"),
+        Column("date_of_birth", kind="date"),
+        Column("pan_no"),
+        Column("enable_account", kind="bool", default=True),
+        Column("accountant_name"),
+        Column("accountant_phone"),
+        Column("dsc", choices=[value for value, _ in Customer.DSC_CHOICES], default="na"),
+    ],
+    row_checks=[
+        (
+            "CIN number is required for Private Limited status",
+            lambda df: (df["status"] == "private_limited") & df["cin_number"].isna(),
+        ),
+    ],
+    # bulk_create sends no post_save
+    after_create=lambda objs, records, defaults: index_objects(objs),
+)
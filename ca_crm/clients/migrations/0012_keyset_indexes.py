@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0011_alter_customer_dsc'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['created_at', 'id'], name='clients_inq_created_da5a46_idx'),
+        ),
+    ]
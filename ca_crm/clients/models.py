@@ -163,6 +163,12 @@ class Inquiry(models.Model):
     other_services = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pages of the inquiry list
+            models.Index(fields=["created_at", "id"]),
+        ]
+
     def __str__(self):
         return self.full_name
 
@@ -1,3 +1,64 @@
+from types import SimpleNamespace
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from ca_crm.pagination import paginate_keyset, InvalidCursor
+from ca_crm.testing import assert_query_budget, auth_headers
+from custom_auth.models import CustomUser
+from .models import Customer
 
-# Create your tests here.
+
+def page_request(**params):
+    return SimpleNamespace(query_params=params)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="admin", email="admin@example.com", password="x")
+        # Repeated names make ties the primary key has to break
+        for index in range(7):
+            Customer.objects.create(
+                name_of_business=f"Business {index % 3}", customer_code=f"C{index}", created_by=self.user
+            )
+
+    def walk(self, queryset, **options):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": "2", **({"cursor": cursor} if cursor else {})}
+            page = paginate_keyset(page_request(**params), queryset, **options)
+            seen.extend(customer.id for customer in page.items)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        customers = Customer.objects.all()
+        expected = list(customers.order_by("-name_of_business", "-id").values_list("id", flat=True))
+        self.assertEqual(self.walk(customers, sort_key="name_of_business"), expected)
+        self.assertEqual(
+            self.walk(customers, descending=False), list(customers.order_by("id").values_list("id", flat=True))
+        )
+
+    def test_rejects_bad_cursor_and_limit(self):
+        with self.assertRaises(InvalidCursor):
+            paginate_keyset(page_request(cursor="not-a-cursor"), Customer.objects.all())
+        with self.assertRaises(InvalidCursor):
+            paginate_keyset(page_request(limit="0"), Customer.objects.all())
+
+    def test_customer_list_endpoint(self):
+        cache.clear()
+        url = reverse("customer-detail")
+        headers = auth_headers(self.user)
+        response = self.client.get(url, {"limit": 5}, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+        self.assertEqual(response["X-Has-Next"], "true")
+        response = self.client.get(url, {"limit": 5, "cursor": response["X-Next-Cursor"]}, **headers)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(response["X-Has-Next"], "false")
+        self.assertEqual(self.client.get(url, {"cursor": "x"}, **headers).status_code, 400)
+
+    def test_customer_list_query_budget(self):
+        cache.clear()
+        response = assert_query_budget(self.client, "get", reverse("customer-detail"), **auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
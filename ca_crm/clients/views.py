@@ -14,9 +14,12 @@ from .models import (Customer,
                      Inquiry
                      )
 from custom_auth.models import CustomUser  # Update with your user model path
-import pandas as pd
 from django.db import transaction
 from workflow.views import ModifiedApiview 
+from ca_crm.pagination import paginate_keyset, InvalidCursor
+from ca_crm.importer import run_import, is_dry_run, ImportFileError
+from .imports import CUSTOMER_IMPORT
+from search.index import index_objects
 
 logger = logging.getLogger(__name__)
 
@@ -208,9 +211,12 @@ class CustomerListAPIView(ModifiedApiview):
                 "created_date"
 
             )
-            logger.info("Successfully retrieved all active customers")
-            return Response(list(customers))
-        
+            page = paginate_keyset(request, customers, sort_key="id", descending=False)
+            logger.info("Successfully retrieved active customers")
+            return Response(page.items, headers=page.headers())
+
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error retrieving customers: {str(e)}")
             return Response(
@@ -379,6 +385,8 @@ class CustomerUpdateAPIView(ModifiedApiview):
                         designation=contact.get("designation"),
                         updated_by=request.user,
                     )
+                # update() sends no post_save
+                index_objects(CustomerContacts.objects.filter(id__in=[contact.get("id") for contact in updated_contacts]))
             deleted_contacts = data.get("deleted_contacts", [])
             if deleted_contacts:
                 for contact_id in deleted_contacts:
@@ -487,110 +495,32 @@ class CustomerBulkCreateExcelAPIView(ModifiedApiview):
             return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Read excel file into DataFrame
-            df = pd.read_excel(excel_file)
-        except Exception as e:
-            logger.error(f"Error reading Excel file: {e}")
-            return Response({"error": "Invalid Excel file."}, status=status.HTTP_400_BAD_REQUEST)
-
-        required_fields = [
-            "name_of_business", "customer_code", "file_no",
-            "status", "business_pan_no", "mobile"
-        ]
-        for field in required_fields:
-            if field not in df.columns or df[field].isnull().any():
-                return Response(
-                    {"error": f"Missing required field '{field}' in one or more rows."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        valid_statuses = [
-            "proprietor", "firm", "private_limited", "public_limited",
-            "bank", "aop_or_boi", "huf", "ajp", "society",
-        ]
-        if not df["status"].isin(valid_statuses).all():
-            return Response(
-                {"error": "One or more rows have an invalid status."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Validate DSC status if column exists
-        if "dsc" in df.columns:
-            if not df["dsc"].isin(["new_dsc", "received", "not_received", "na"]).all():
-                return Response(
-                    {"error": "One or more rows have an invalid DSC status."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        # For rows with status 'private_limited', ensure 'cin_number' is provided.
-        mask = df["status"] == "private_limited"
-        if mask.any() and (("cin_number" not in df.columns) or df.loc[mask, "cin_number"].isnull().any()):
-            return Response(
-                {"error": "CIN number is required for all rows with Private Limited status."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Check for duplicate customer_code in DB
-        customer_codes = df["customer_code"].tolist()
-        if Customer.objects.filter(customer_code__in=customer_codes).exists():
-            return Response(
-                {"error": "One or more customer codes already exist in the database."},
-                status=status.HTTP_400_BAD_REQUEST,
+            result = run_import(
+                CUSTOMER_IMPORT, excel_file, defaults={"created_by": user},
+                dry_run=is_dry_run(request), collect=True,
             )
-
-        customers_to_create = []
-        for row in df.to_dict(orient="records"):
-            customers_to_create.append(
-                Customer(
-                    name_of_business=row.get("name_of_business"),
-                    customer_code=row.get("customer_code"),
-                    file_no=row.get("file_no"),
-                    business_pan_no=row.get("business_pan_no"),
-                    status=row.get("status"),
-                    address=row.get("address"),
-                    road=row.get("road"),
-                    state=row.get("state"),
-                    city=row.get("city"),
-                    country=row.get("country"),
-                    pin=row.get("pin"),
-                    contact_number=row.get("contact_number"),
-                    email=row.get("email"),
-                    mobile=row.get("mobile"),
-                    additional_contact_number=row.get("additional_contact_number"),
-                    secondary_email_id=row.get("secondary_email_id"),
-                    gst_no=row.get("gst_no"),
-                    gst_state_code=row.get("gst_state_code"),
-                    cin_number=row.get("cin_number"),
-                    llipin_number=row.get("llipin_number"),
-                    din_number=row.get("din_number"),
-                    first_name=row.get("first_name"),
-                    last_name=row.get("last_name"),
-                    date_of_birth=row.get("date_of_birth"),
-                    pan_no=row.get("pan_no"),
-                    enable_account=row.get("enable_account", True),
-                    accountant_name=row.get("accountant_name"),
-                    accountant_phone=row.get("accountant_phone"),
-                    created_by=request.user,
-                )
-            )
-
-        try:
-            with transaction.atomic():
-                created_customers = Customer.objects.bulk_create(customers_to_create)
-            logger.info(f"Bulk customer creation successful. Created {len(created_customers)} customers.")
-            result = [
-                {
-                    "id": customer.id,
-                    "name_of_business": customer.name_of_business,
-                    "customer_code": customer.customer_code,
-                }
-                for customer in created_customers
-            ]
-            return Response(result, status=status.HTTP_201_CREATED)
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error during bulk customer creation: {e}")
             return Response({"error": "Failed to create customers"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        if not result.ok:
+            return Response({"error": "One or more rows are invalid.", **result.report()}, status=status.HTTP_400_BAD_REQUEST)
+        if result.dry_run:
+            return Response(result.report(), status=status.HTTP_200_OK)
+
+        logger.info(f"Bulk customer creation successful. Created {result.created} customers.")
+        data = [
+            {
+                "id": customer.id,
+                "name_of_business": customer.name_of_business,
+                "customer_code": customer.customer_code,
+            }
+            for customer in result.objects
+        ]
+        return Response(data, status=status.HTTP_201_CREATED)
+
 # CustomerBranch Views
 
 class CustomerBranchCreateView(ModifiedApiview):
@@ -814,32 +744,38 @@ class InquiryListView(APIView):
 
             start_index = (page - 1) * per_page
 
-            # Fetch only required fields with limit & offset for efficiency
-            inquiries = list(
-                Inquiry.objects.filter()
-                .order_by("-created_at")
-                .values("id", "full_name", "mobile_no", "email_id", "selected_services", "created_at", "address", "other_services", "remark", "reference_full_name")
-                [start_index : start_index + per_page]
-            )
+            inquiries = Inquiry.objects.values("id", "full_name", "mobile_no", "email_id", "selected_services", "created_at", "address", "other_services", "remark", "reference_full_name")
+
+            next_cursor = None
+            if request.GET.get("cursor") or request.GET.get("limit"):
+                # Keyset mode: constant cost however deep the client pages
+                keyset_page = paginate_keyset(request, inquiries, sort_key="created_at")
+                inquiries, next_cursor, per_page = keyset_page.items, keyset_page.next_cursor, keyset_page.limit
+                has_next = keyset_page.has_next
+            else:
+                # Fetch one extra row to know if there is a next page
+                inquiries = list(inquiries.order_by("-created_at", "-id")[start_index : start_index + per_page + 1])
+                has_next = len(inquiries) > per_page
+                inquiries = inquiries[:per_page]
 
             for inquiry in inquiries:
                 inquiry["selected_services"] = inquiry["selected_services"].split(",") if inquiry["selected_services"] else []
                 inquiry["other_services"] = inquiry["other_services"].split(",") if inquiry["other_services"] else []
 
-            # Check if there is a next page
-            has_next = Inquiry.objects.filter().order_by("-created_at")[start_index + per_page : start_index + per_page + 1].exists()
-
             # If no inquiries found
             if not inquiries:
-                return Response({"message": "No inquiries found", "current_page": page, "per_page": per_page, "has_next": False, "data": []}, status=status.HTTP_200_OK)
+                return Response({"message": "No inquiries found", "current_page": page, "per_page": per_page, "has_next": False, "next_cursor": None, "data": []}, status=status.HTTP_200_OK)
 
             return Response({
                 "current_page": page,
                 "per_page": per_page,
                 "has_next": has_next,
+                "next_cursor": next_cursor,
                 "data": inquiries
             }, status=status.HTTP_200_OK)
 
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": f"Something went wrong: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -4,19 +4,7 @@ from rest_framework import status
 from django.core.exceptions import ObjectDoesNotExist
 from .models import Company, BankDetails
 from workflow.views import ModifiedApiview
-import posixpath
-from django.core.files.storage import FileSystemStorage
-import os
-import uuid
-import time
-from django.conf import settings
-
-
-def generate_short_unique_filename(extension):
-    # Shortened UUID (6 characters) + Unix timestamp for uniqueness
-    unique_id = uuid.uuid4().hex[:6]  # Get the first 6 characters of UUID
-    timestamp = str(int(time.time()))  # Unix timestamp as a string
-    return f"{unique_id}_{timestamp}{extension}"
+from ca_crm import storage
 
 
 # ============== COMPANY APIS ==============
@@ -60,32 +48,20 @@ class CompanyCreateAPI(ModifiedApiview):
             # Handle logo if present
             logo_url = request.FILES.get('logo')
             if logo_url:
-                extension = os.path.splitext(logo_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'logo_urls'))
-                logo_path = fs.save(short_unique_filename, logo_url)
-                logo_url = posixpath.join('media/logo_urls', logo_path)
+                logo_url = storage.save(logo_url, 'logo_urls')
             else:
                 logo_url = None
 
 
             signature_url = request.FILES.get('signature')
             if signature_url:
-                extension = os.path.splitext(signature_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'signature_urls'))
-                signature_path = fs.save(short_unique_filename, signature_url)
-                signature_url = posixpath.join('media/signature_urls', signature_path)
+                signature_url = storage.save(signature_url, 'signature_urls')
             else:
                 signature_url = None
 
             qr_code_url = request.FILES.get('qr_code')
             if qr_code_url:
-                extension = os.path.splitext(qr_code_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'qr_code_urls'))
-                qr_code_path = fs.save(short_unique_filename, qr_code_url)
-                qr_code_url = posixpath.join('media/qr_code_urls', qr_code_path)
+                qr_code_url = storage.save(qr_code_url, 'qr_code_urls')
             else:
                 qr_code_url = None
 
@@ -230,11 +206,7 @@ class CompanyUpdateAPI(ModifiedApiview):
             # Handle logo update if present
             logo_url = request.FILES.get('updated_logo', None)
             if logo_url:
-                extension = os.path.splitext(logo_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'logo_urls'))
-                logo_path = fs.save(short_unique_filename, logo_url)
-                logo_url = posixpath.join('media/logo_urls', logo_path)
+                logo_url = storage.save(logo_url, 'logo_urls')
             else:
                 logo_url = data.get('logo', None)
                 if logo_url:
@@ -244,11 +216,7 @@ class CompanyUpdateAPI(ModifiedApiview):
                 
             signature_url = request.FILES.get('updated_signature', None)
             if signature_url:
-                extension = os.path.splitext(signature_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'signature_urls'))
-                signature_path = fs.save(short_unique_filename, signature_url)
-                signature_url = posixpath.join('media/signature_urls', signature_path)
+                signature_url = storage.save(signature_url, 'signature_urls')
             else:
                 signature_url = data.get('signature', None)
                 if signature_url:
@@ -258,11 +226,7 @@ class CompanyUpdateAPI(ModifiedApiview):
                 
             qr_code_url = request.FILES.get('updated_qr_code', None)
             if qr_code_url:
-                extension = os.path.splitext(qr_code_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'qr_code_urls'))
-                qr_code_path = fs.save(short_unique_filename, qr_code_url)
-                qr_code_url = posixpath.join('media/qr_code_urls', qr_code_path)
+                qr_code_url = storage.save(qr_code_url, 'qr_code_urls')
             else:
                 qr_code_url = data.get('qr_code', None)
                 if qr_code_url:
@@ -0,0 +1,68 @@
+from django.contrib.auth.hashers import make_password
+from ca_crm.importer import Column, ImportSchema
+from .models import CustomUser, Role, EmployeeProfile, ReportingUser
+
+
+USER_FIELDS = (
+    "username", "email", "password", "first_name", "last_name", "gender",
+    "phone_number", "employee_code", "address", "photo_url", "role_id",
+)
+
+
+def _prepare_employee(record):
+    user = {field: record[field] for field in USER_FIELDS}
+    user["password"] = make_password(record["password"])
+    return user
+
+
+def _create_employee_details(users, records, defaults):
+    EmployeeProfile.objects.bulk_create([
+        EmployeeProfile(
+            user=user,
+            date_of_joining=record["date_of_joining"],
+            date_of_leaving=record["date_of_leaving"],
+            referred_by=record["referred_by"],
+            designation=record["designation"],
+            is_active=record["profile_is_active"],
+            login_enabled=record["login_enabled"],
+        )
+        for user, record in zip(users, records)
+    ])
+    ReportingUser.objects.bulk_create([
+        ReportingUser(
+            user=user,
+            reporting_to_id=record["reporting_to"],
+            working_under_id=record["working_under"],
+            is_active=True,
+        )
+        for user, record in zip(users, records)
+        if record["reporting_to"] and record["working_under"]
+    ])
+
+
+EMPLOYEE_IMPORT = ImportSchema(
+    CustomUser,
+    columns=[
+        Column("username", required=True, unique=True),
+        Column("email", required=True, unique=True),
+        Column("password", required=True),
+        Column("first_name", default=""),
+        Column("last_name", default=""),
+        Column("gender", default=""),
+        Column("phone_number", default=""),
+        Column("employee_code", default=""),
+        Column("address", default=""),
+        Column("photo_url", default=""),
+        Column("role", field="role_id", kind="fk", model=Role, to_field="name", default="employee"),
+        Column("date_of_joining", kind="date"),
+        Column("date_of_leaving", kind="date"),
+        Column("referred_by", default=""),
+        Column("designation", default=""),
+        Column("is_active", field="profile_is_active", kind="bool", default=True),
+        Column("login_enabled", kind="bool", default=True),
+        Column("reporting_to", kind="fk", model=CustomUser),
+        Column("working_under", kind="fk", model=CustomUser),
+    ],
+    prepare=_prepare_employee,
+    after_create=_create_employee_details,
+)
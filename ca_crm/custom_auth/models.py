@@ -73,14 +73,30 @@ class CustomUser(models.Model):
         Check if the user has a specific permission.
         """
         def check(permission_name):
-            if not self.role or not self.role.is_active:
-                return False
-            return self.role.permissions.filter(
-                permission__name=permission_name, is_active=True
-            ).exists()
-        
+            return permission_name in self.permission_names
+
         return check
 
+    @property
+    def permission_names(self):
+        """
+        Compiled set of active permission names granted through the user's role.
+        """
+        from .role_permissions import get_role_permissions
+        return get_role_permissions(self.role_id)
+
+    def has_any(self, *permission_names):
+        """
+        Check if the user has at least one of the given permissions.
+        """
+        return not self.permission_names.isdisjoint(permission_names)
+
+    def has_all(self, *permission_names):
+        """
+        Check if the user has every one of the given permissions.
+        """
+        return self.permission_names.issuperset(permission_names)
+
 
 class EmployeeProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="employee_profile")
@@ -88,6 +104,8 @@ class EmployeeProfile(models.Model):
     date_of_leaving = models.DateField(null=True, blank=True)
     referred_by = models.CharField(max_length=150, null=True, blank=True)
     designation = models.CharField(max_length=50, null=True, blank=True)
+    # Internal cost of an hour of this employee's time, for task profitability
+    hourly_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     is_active = models.BooleanField(default=True)
     login_enabled = models.BooleanField(default=True)
 
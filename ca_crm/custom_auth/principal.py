@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache, caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.locmem import LocMemCache
+from .models import CustomUser
+import jwt
+
+
+PRINCIPAL_CACHE_PREFIX = "principal:user"
+# The invalidation below (run by custom_auth.signals) only reaches other
+# processes when CACHES is shared (Redis, Memcached, database), and bulk
+# QuerySet.update() calls send no signals at all. Until an entry expires a
+# worker keeps serving the user as it was: deactivated, or with its old role.
+# With a shared cache that window is PRINCIPAL_CACHE_TTL after a bulk update;
+# with the per-process LocMemCache it is every change, so the TTL is cut to
+# PRINCIPAL_LOCAL_CACHE_TTL there, trading a query per user every few
+# seconds for a short stale window.
+PRINCIPAL_CACHE_TTL = getattr(settings, "PRINCIPAL_CACHE_TTL", 300)
+PRINCIPAL_LOCAL_CACHE_TTL = getattr(settings, "PRINCIPAL_LOCAL_CACHE_TTL", 30)
+
+
+def _cache_key(user_id):
+    return f"{PRINCIPAL_CACHE_PREFIX}:{user_id}"
+
+
+def principal_cache_ttl():
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return min(PRINCIPAL_CACHE_TTL, PRINCIPAL_LOCAL_CACHE_TTL)
+    return PRINCIPAL_CACHE_TTL
+
+
+def decode_token(token):
+    """
+    Decode and verify an access token. Raises jwt exceptions on failure.
+    """
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+
+def get_principal(user_id):
+    """
+    Return the user (with its role already loaded) for the given id.
+    The user is served from the cache and only hits the database on a miss,
+    so it can be up to principal_cache_ttl() seconds stale (see above).
+    """
+    key = _cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = CustomUser.objects.select_related("role").get(id=user_id)
+        cache.set(key, user, principal_cache_ttl())
+    return user
+
+
+def resolve_principal(token):
+    """
+    Decode the token and return the user it belongs to.
+    """
+    payload = decode_token(token)
+    return get_principal(payload["user_id"])
+
+
+def invalidate_principal(user_id):
+    # Call after bulk updates of users, which skip the post_save signal
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_role_principals(role_id):
+    user_ids = CustomUser.objects.filter(role_id=role_id).values_list("id", flat=True)
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
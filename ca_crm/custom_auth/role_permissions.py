@@ -0,0 +1,87 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import Role, RolePermission
+
+
+ROLE_PERMISSION_CACHE_PREFIX = "role_permissions"
+# How long a worker trusts its own copy before re-reading the shared cache
+ROLE_PERMISSION_LOCAL_TTL = getattr(settings, "ROLE_PERMISSION_LOCAL_TTL", 30)
+# Upper bound on how stale the shared entry can get. Rebuilds reach other
+# processes straight away only when CACHES is shared (Redis, database);
+# with a per-process cache this TTL is the only thing that expires them.
+ROLE_PERMISSION_CACHE_TTL = getattr(settings, "ROLE_PERMISSION_CACHE_TTL", 300)
+
+_local_cache = {}
+_local_lock = threading.Lock()
+
+
+def _cache_key(role_id):
+    return f"{ROLE_PERMISSION_CACHE_PREFIX}:{role_id}"
+
+
+def compile_role_permissions(role_id):
+    """
+    Build the frozenset of active permission names granted to a role.
+    An inactive (or missing) role grants nothing, and neither does an
+    inactive Permission. The per-request RolePermission query this replaced
+    only checked RolePermission.is_active, so deactivating a role or a
+    permission now revokes it everywhere, CheckPermissionView included.
+    """
+    if not Role.objects.filter(id=role_id, is_active=True).exists():
+        return frozenset()
+    return frozenset(
+        RolePermission.objects.filter(
+            role_id=role_id, is_active=True, permission__is_active=True
+        ).values_list("permission__name", flat=True)
+    )
+
+
+def get_role_permissions(role_id):
+    """
+    Return the compiled permission names of a role. Served from the
+    process-local copy, then the shared cache, and only compiled from the
+    database when both miss.
+    """
+    if role_id is None:
+        return frozenset()
+
+    now = time.monotonic()
+    entry = _local_cache.get(role_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    permissions = cache.get(_cache_key(role_id))
+    if permissions is None:
+        permissions = compile_role_permissions(role_id)
+        cache.set(_cache_key(role_id), permissions, ROLE_PERMISSION_CACHE_TTL)
+
+    with _local_lock:
+        _local_cache[role_id] = (now + ROLE_PERMISSION_LOCAL_TTL, permissions)
+    return permissions
+
+
+def rebuild_role_permissions(role_ids):
+    """
+    Recompile the given roles and publish them to both cache levels.
+    """
+    for role_id in set(role_ids):
+        permissions = compile_role_permissions(role_id)
+        cache.set(_cache_key(role_id), permissions, ROLE_PERMISSION_CACHE_TTL)
+        with _local_lock:
+            _local_cache[role_id] = (time.monotonic() + ROLE_PERMISSION_LOCAL_TTL, permissions)
+
+
+def forget_role_permissions(role_id):
+    cache.delete(_cache_key(role_id))
+    with _local_lock:
+        _local_cache.pop(role_id, None)
+
+
+def role_has_any(role_id, permission_names):
+    return not get_role_permissions(role_id).isdisjoint(permission_names)
+
+
+def role_has_all(role_id, permission_names):
+    return get_role_permissions(role_id).issuperset(permission_names)
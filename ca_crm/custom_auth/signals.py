@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CustomUser, Role, Permission, RolePermission
+from .principal import invalidate_principal, invalidate_role_principals
+from .role_permissions import rebuild_role_permissions, forget_role_permissions
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def clear_cached_user(sender, instance, **kwargs):
+    invalidate_principal(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Role)
+def clear_cached_role_users(sender, instance, **kwargs):
+    invalidate_role_principals(instance.id)
+
+
+@receiver(post_save, sender=Role)
+def rebuild_role(sender, instance, **kwargs):
+    rebuild_role_permissions([instance.id])
+
+
+@receiver(post_delete, sender=Role)
+def forget_role(sender, instance, **kwargs):
+    forget_role_permissions(instance.id)
+
+
+@receiver([post_save, post_delete], sender=RolePermission)
+def rebuild_role_permission(sender, instance, **kwargs):
+    rebuild_role_permissions([instance.role_id])
+
+
+@receiver([post_save, post_delete], sender=Permission)
+def rebuild_permission_roles(sender, instance, **kwargs):
+    role_ids = RolePermission.objects.filter(permission_id=instance.id).values_list("role_id", flat=True)
+    rebuild_role_permissions(role_ids)
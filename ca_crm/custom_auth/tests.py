@@ -1,3 +1,74 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ca_crm.testing import auth_headers
+from .models import CustomUser, Permission, Role, RolePermission
+from .principal import get_principal, invalidate_principal, principal_cache_ttl, PRINCIPAL_LOCAL_CACHE_TTL
+from .role_permissions import get_role_permissions
 
-# Create your tests here.
+
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name="Manager")
+        self.user = CustomUser.objects.create(username="manager", email="manager@example.com", password="x", role=self.role)
+
+    def test_cached_user_costs_no_queries(self):
+        get_principal(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_principal(self.user.id).role.name, "Manager")
+
+    def test_saving_a_user_or_role_invalidates_it(self):
+        get_principal(self.user.id)
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(get_principal(self.user.id).username, "renamed")
+        self.role.name = "Partner"
+        self.role.save()
+        self.assertEqual(get_principal(self.user.id).role.name, "Partner")
+
+    def test_bulk_updates_need_an_explicit_invalidation(self):
+        get_principal(self.user.id)
+        CustomUser.objects.filter(id=self.user.id).update(is_active=False)
+        self.assertTrue(get_principal(self.user.id).is_active)
+        invalidate_principal(self.user.id)
+        self.assertFalse(get_principal(self.user.id).is_active)
+
+    def test_process_local_cache_keeps_entries_briefly(self):
+        self.assertEqual(principal_cache_ttl(), PRINCIPAL_LOCAL_CACHE_TTL)
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertGreater(principal_cache_ttl(), PRINCIPAL_LOCAL_CACHE_TTL)
+
+
+class RolePermissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name="Manager")
+        self.user = CustomUser.objects.create(username="manager", email="manager@example.com", password="x", role=self.role)
+        self.permissions = {name: Permission.objects.create(name=name) for name in ("view_bills", "edit_bills")}
+        self.grant = RolePermission.objects.create(role=self.role, permission=self.permissions["view_bills"])
+
+    def check(self, name):
+        return self.client.get(
+            reverse("check-permission"), {"user_id": self.user.id, "permission_name": name}, **auth_headers(self.user)
+        ).status_code
+
+    def test_grants_are_rebuilt_when_they_change(self):
+        self.assertEqual(get_role_permissions(self.role.id), {"view_bills"})
+        RolePermission.objects.create(role=self.role, permission=self.permissions["edit_bills"])
+        self.assertEqual(get_role_permissions(self.role.id), {"view_bills", "edit_bills"})
+        self.grant.delete()
+        self.assertEqual(get_role_permissions(self.role.id), {"edit_bills"})
+
+    def test_inactive_permissions_and_roles_grant_nothing(self):
+        self.assertEqual(self.check("view_bills"), 200)
+        permission = self.permissions["view_bills"]
+        permission.is_active = False
+        permission.save()
+        self.assertEqual(self.check("view_bills"), 403)
+        permission.is_active = True
+        permission.save()
+        self.role.is_active = False
+        self.role.save()
+        self.assertEqual(get_role_permissions(self.role.id), frozenset())
+        self.assertEqual(self.check("view_bills"), 403)
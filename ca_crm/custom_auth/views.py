@@ -7,24 +7,14 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.hashers import check_password
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAdminUser,AllowAny, IsAuthenticated
-import posixpath
-from django.core.files.storage import FileSystemStorage
+from ca_crm import storage
 import traceback
-from django.conf import settings
 import pandas as pd
 from django.db import transaction
 from datetime import datetime, date
-import os
-import uuid
-import time
 import json
-
-def generate_short_unique_filename(extension):
-    # Shortened UUID (6 characters) + Unix timestamp for uniqueness
-    unique_id = uuid.uuid4().hex[:6]  # Get the first 6 characters of UUID
-    timestamp = str(int(time.time()))  # Unix timestamp as a string
-    return f"{unique_id}_{timestamp}{extension}"
-
+from ca_crm.importer import run_import, is_dry_run
+from .imports import EMPLOYEE_IMPORT
 
 class CreateEmployeeView(APIView):
     permission_classes = [AllowAny]
@@ -35,11 +25,7 @@ class CreateEmployeeView(APIView):
             # Handle photo upload
             photo_url = request.FILES.get("photo_url")
             if photo_url:
-                extension = os.path.splitext(photo_url.name)[1]
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'photo_urls'))
-                logo_path = fs.save(short_unique_filename, photo_url)
-                logo_url = posixpath.join('media/photo_urls', logo_path)
+                logo_url = storage.save(photo_url, 'photo_urls')
             else:
                 logo_url = ""
 
@@ -465,24 +451,33 @@ class CheckPermissionView(APIView):
         try:
             user_id = request.query_params.get('user_id')
             permission_name = request.query_params.get('permission_name')
+            # Comma separated list to check many permissions in one call
+            permission_names = request.query_params.get('permission_names')
 
             # Validate inputs
-            if not user_id or not permission_name:
+            if not user_id or not (permission_name or permission_names):
                 return Response({'error': 'user_id and permission_name are required'}, status=status.HTTP_400_BAD_REQUEST)
 
             # Fetch user
             user = CustomUser.objects.get(id=user_id, is_active=True)
-            role = user.role
 
-            if not role:
+            if not user.role_id:
                 return Response({'error': f'{user.username} does not have a role assigned'}, status=status.HTTP_404_NOT_FOUND)
 
-            # Check if the role has the permission
-            has_permission = RolePermission.objects.filter(
-                role=role,
-                permission__name=permission_name,
-                is_active=True
-            ).exists()
+            granted = user.permission_names
+
+            if permission_names:
+                names = [name.strip() for name in permission_names.split(',') if name.strip()]
+                return Response({
+                    'user_id': user.id,
+                    'permissions': {name: name in granted for name in names},
+                    'has_any': user.has_any(*names),
+                    'has_all': user.has_all(*names),
+                }, status=status.HTTP_200_OK)
+
+            # Check if the role has the permission; inactive roles and
+            # permissions grant nothing (see compile_role_permissions)
+            has_permission = permission_name in granted
 
             if has_permission:
                 return Response({'message': f'User {user.username} has permission: {permission_name}'}, status=status.HTTP_200_OK)
@@ -731,65 +726,12 @@ class BulkCreateEmployeeView(APIView):
             if not excel_file:
                 return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Read the Excel file
-            df = pd.read_excel(excel_file)
-            
-            created_users = []
-            errors = []
-            
-            for _, row in df.iterrows():
-                try:
-                    # Handle photo upload if provided
-                    photo_url = row.get("photo_url", "")
-                    logo_url = ""
-                    if photo_url:
-                        extension = os.path.splitext(photo_url)[1]
-                        short_unique_filename = generate_short_unique_filename(extension)
-                        fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'photo_urls'))
-                        logo_path = fs.save(short_unique_filename, photo_url)
-                        logo_url = os.path.join('media/photo_urls', logo_path)
-                    
-                    # Create user
-                    user = CustomUser.objects.create(
-                        username=row["username"],
-                        email=row["email"],
-                        password=make_password(row["password"]),
-                        first_name=row.get("first_name", ""),
-                        last_name=row.get("last_name", ""),
-                        gender=row.get("gender", ""),
-                        phone_number=row.get("phone_number", ""),
-                        employee_code=row.get("employee_code", ""),
-                        address=row.get("address", ""),
-                        photo_url=logo_url,
-                        role=Role.objects.get(name=row.get("role", "employee")),
-                    )
-                    
-                    # Create EmployeeProfile
-                    EmployeeProfile.objects.create(
-                        user=user,
-                        date_of_joining=row.get("date_of_joining"),
-                        date_of_leaving=row.get("date_of_leaving", None),
-                        referred_by=row.get("referred_by", ""),
-                        designation=row.get("designation", ""),
-                        is_active=row.get("is_active", True),
-                        login_enabled=row.get("login_enabled", True),
-                    )
-                    
-                    # Create ReportingUser
-                    if row.get("reporting_to") and row.get("working_under"):
-                        reporting_to_user = CustomUser.objects.get(id=row["reporting_to"])
-                        working_under_user = CustomUser.objects.get(id=row["working_under"])
-                        ReportingUser.objects.create(
-                            user=user,
-                            reporting_to=reporting_to_user,
-                            working_under=working_under_user,
-                            is_active=True,
-                        )
-                    
-                    created_users.append({"username": user.username, "email": user.email})
-                except Exception as e:
-                    errors.append({"username": row.get("username"), "error": str(e)})
-            
-            return Response({"created_users": created_users, "errors": errors}, status=status.HTTP_201_CREATED)
+            # Valid rows are created, the rest come back in the error report
+            result = run_import(EMPLOYEE_IMPORT, excel_file, dry_run=is_dry_run(request), partial=True, collect=True)
+            if result.dry_run:
+                return Response(result.report(), status=status.HTTP_200_OK)
+
+            created_users = [{"username": user.username, "email": user.email} for user in result.objects]
+            return Response({"created_users": created_users, "errors": result.errors}, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,26 @@
+from ca_crm.importer import Column, ImportSchema
+from search.index import index_objects
+from clients.models import Customer
+from .models import CustomerDcs
+
+
+DSC_IMPORT = ImportSchema(
+    CustomerDcs,
+    columns=[
+        Column("customer_id", kind="fk", model=Customer, required=True),
+        Column("pan_no", required=True, unique=True),
+        Column("name", required=True),
+        Column("related_company", required=True),
+        Column("issue_date", kind="date", required=True),
+        Column("valid_till_date", kind="date", required=True),
+        Column("issuing_authority"),
+        Column("password", required=True),
+        Column("position", required=True, choices=[value for value, _ in CustomerDcs.POSITION_CHOICES]),
+        Column("class_type", required=True, choices=[value for value, _ in CustomerDcs.CLASS_TYPE_CHOICES]),
+        Column("mobile_no"),
+        Column("email"),
+        Column("custodian_name"),
+    ],
+    # bulk_create sends no post_save
+    after_create=lambda objs, records, defaults: index_objects(objs),
+)
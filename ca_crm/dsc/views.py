@@ -5,7 +5,9 @@ from django.utils import timezone
 import json
 from .models import CustomerDcs, DSCUse
 from workflow.views import ModifiedApiview
-import pandas as pd
+from ca_crm.pagination import paginate_keyset, InvalidCursor
+from ca_crm.importer import run_import, is_dry_run, ImportFileError
+from .imports import DSC_IMPORT
 
 class CreateDSCView(ModifiedApiview):
     def post(self, request, *args, **kwargs):
@@ -59,48 +61,17 @@ class BulkCreateDSCView(ModifiedApiview):
             if 'file' not in request.FILES:
                 return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Read the uploaded file
-            file = request.FILES['file']
-            if file.name.endswith('.xlsx'):
-                df = pd.read_excel(file)
-            elif file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                return Response({"error": "Unsupported file format. Please upload an Excel (.xlsx) or CSV (.csv) file."}, status=400)
-
-            # Validate required columns
-            required_columns = ['customer_id', 'pan_no', 'name', 'related_company', 'issue_date', 'valid_till_date', 'password', 'position', 'class_type']
-            for column in required_columns:
-                if column not in df.columns:
-                    return Response({"error": f"{column} column is missing in the file."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Get the user creating the entries
-            created_by = user
-
-            # Create DSC entries from the file
-            created_ids = []
-            for _, row in df.iterrows():
-                customer = CustomerDcs(
-                    customer_id = row['customer_id'],
-                    pan_no=row['pan_no'],
-                    name=row['name'],
-                    related_company=row['related_company'],
-                    issue_date=row['issue_date'],
-                    valid_till_date=row['valid_till_date'],
-                    issuing_authority=row.get('issuing_authority'),
-                    password=row['password'],
-                    position=row['position'],
-                    class_type=row['class_type'],
-                    mobile_no=row.get('mobile_no'),
-                    email=row.get('email'),
-                    custodian_name=row.get('custodian_name'),
-                    created_by=created_by,
-                )
-                customer.save()
-                created_ids.append(customer.id)
+            result = run_import(DSC_IMPORT, request.FILES['file'], defaults={"created_by": user}, dry_run=is_dry_run(request), collect=True)
+            if not result.ok:
+                return Response({"error": "One or more rows are invalid.", **result.report()}, status=status.HTTP_400_BAD_REQUEST)
+            if result.dry_run:
+                return Response(result.report(), status=status.HTTP_200_OK)
 
+            created_ids = [customer.id for customer in result.objects]
             return Response({"message": "Bulk DSC entries created successfully.", "created_ids": created_ids}, status=status.HTTP_201_CREATED)
 
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -194,7 +165,7 @@ class RetrieveDSCView(ModifiedApiview):
 class ListDSCView(ModifiedApiview):
     def get(self, request, *args, **kwargs):
         try:
-            customers = CustomerDcs.objects.all()
+            page = paginate_keyset(request, CustomerDcs.objects.select_related("customer"))
             customer_list = [
                 {
                     "dsc_id":customer.id,
@@ -209,12 +180,14 @@ class ListDSCView(ModifiedApiview):
                     "mobile_no": customer.mobile_no,
                     "email": customer.email,
                     "custodian_name": customer.custodian_name,
-                    "created_by": customer.created_by.id if customer.created_by else None,
+                    "created_by": customer.created_by_id,
                 }
-                for customer in customers
+                for customer in page.items
             ]
-            return Response(customer_list, status=status.HTTP_200_OK)
-        
+            return Response(customer_list, status=status.HTTP_200_OK, headers=page.headers())
+
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,249 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from custom_auth.models import CustomUser
+from workflow.models import ClientWorkCategoryAssignment
+from workflow.rollups import CLOSED_PROGRESS
+from .models import EmployeeAttendance, Holiday, LeaveApplication, TimeTracking
+
+
+# Hours an employee is available on a working day
+CAPACITY_WORKDAY_HOURS = getattr(settings, "CAPACITY_WORKDAY_HOURS", 8)
+# Working days, Monday first (numpy busday weekmask)
+CAPACITY_WEEKMASK = getattr(settings, "CAPACITY_WEEKMASK", "1111100")
+# Allocated over available above / below these ratios flags a week
+CAPACITY_OVER_ALLOCATION_RATIO = getattr(settings, "CAPACITY_OVER_ALLOCATION_RATIO", 1.0)
+CAPACITY_UNDER_ALLOCATION_RATIO = getattr(settings, "CAPACITY_UNDER_ALLOCATION_RATIO", 0.5)
+CAPACITY_MAX_WEEKS = 26
+
+
+def _days(values):
+    return np.asarray(values, dtype="datetime64[D]")
+
+
+def _column(values):
+    """Day values as a datetime64[ns] column, so that frames merge on equal dtypes."""
+    return _days(values).astype("datetime64[ns]")
+
+
+def _to_hours(durations):
+    return pd.to_timedelta(durations).dt.total_seconds() / 3600
+
+
+def _expand_days(frame, first, last):
+    """
+    One row per day of each row's [start, end] range, clipped to
+    [first, last], with the day in a `date` column.
+    """
+    frame = frame.reset_index(drop=True)
+    starts = np.maximum(_days(frame["start"]), first)
+    ends = np.minimum(_days(frame["end"]), last)
+    lengths = np.maximum((ends - starts).astype(int) + 1, 0)
+    expanded = frame.loc[frame.index.repeat(lengths)].reset_index(drop=True)
+    # Position of every expanded row within its own range
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    expanded["date"] = _column(np.repeat(starts, lengths) + offsets.astype("timedelta64[D]"))
+    return expanded
+
+
+def _flag(available, allocated):
+    if allocated > available * CAPACITY_OVER_ALLOCATION_RATIO:
+        return "over_allocated"
+    if available and allocated < available * CAPACITY_UNDER_ALLOCATION_RATIO:
+        return "under_allocated"
+    return "balanced" if available else "unavailable"
+
+
+def _hours(value):
+    return round(float(value), 2)
+
+
+def capacity_plan(start, weeks=4, department_id=None, employee_ids=None):
+    """
+    Hours available, allocated and logged per employee and week, for
+    `weeks` weeks from the Monday of `start`.
+
+    Available hours are CAPACITY_WORKDAY_HOURS per working day, less
+    holidays, approved leave and days outside employment; past days with an
+    attendance record use its hours instead (nothing when absent or on
+    leave). An assignment's allocated_hours are spread evenly over the
+    working days from its start date to its completion date; open
+    assignments without dates are reported as unscheduled. Everything is
+    fetched with one query per table and combined with pandas.
+    """
+    first = start - timedelta(days=start.weekday())
+    last = first + timedelta(days=weeks * 7 - 1)
+    first_day, last_day = np.datetime64(first, "D"), np.datetime64(last, "D")
+    today = np.datetime64(timezone.localdate(), "D")
+
+    memberships = pd.DataFrame(
+        list(
+            ClientWorkCategoryAssignment.objects.filter(is_active=True, assigned_to__isnull=False)
+            .values_list("work_category__department_id", "work_category__department__name", "assigned_to_id")
+            .distinct()
+        ),
+        columns=["department_id", "department_name", "employee_id"],
+    )
+    employees = CustomUser.objects.filter(is_active=True, employee_profile__is_active=True)
+    if employee_ids:
+        employees = employees.filter(id__in=employee_ids)
+    if department_id:
+        memberships = memberships[memberships["department_id"] == department_id]
+        employees = employees.filter(id__in=memberships["employee_id"].tolist())
+    employees = pd.DataFrame(
+        list(employees.order_by("id").values_list(
+            "id", "username", "employee_profile__date_of_joining", "employee_profile__date_of_leaving"
+        )),
+        columns=["employee_id", "username", "joined", "left"],
+    )
+    window = {"start": first, "end": last, "weeks": weeks}
+    if employees.empty:
+        return {"window": window, "employees": [], "suggestions": []}
+    ids = employees["employee_id"].tolist()
+
+    holidays = _days(list(
+        Holiday.objects.filter(date__range=(first, last), is_optional=False).values_list("date", flat=True)
+    ))
+    dates = np.arange(first_day, last_day + 1)
+    working = np.is_busday(dates, weekmask=CAPACITY_WEEKMASK, holidays=holidays)
+
+    # employee x day grid
+    grid = pd.DataFrame({
+        "employee_id": np.repeat(ids, len(dates)),
+        "date": _column(np.tile(dates, len(ids))),
+        "available": np.tile(working * float(CAPACITY_WORKDAY_HOURS), len(ids)),
+    })
+    joined = _days(employees["joined"].fillna(first).tolist())
+    left = _days(employees["left"].fillna(last).tolist())
+    employed = (grid["date"].to_numpy() >= np.repeat(joined, len(dates))) & (
+        grid["date"].to_numpy() <= np.repeat(left, len(dates))
+    )
+    grid.loc[~employed, "available"] = 0.0
+
+    leave = pd.DataFrame(
+        list(
+            LeaveApplication.objects.filter(
+                employee_id__in=ids, status="approved", start_date__lte=last, end_date__gte=first
+            ).values_list("employee_id", "start_date", "end_date")
+        ),
+        columns=["employee_id", "start", "end"],
+    )
+    if not leave.empty:
+        leave_days = _expand_days(leave, first_day, last_day)[["employee_id", "date"]].drop_duplicates()
+        on_leave = grid.merge(leave_days.assign(on_leave=True), on=["employee_id", "date"], how="left")["on_leave"]
+        grid.loc[on_leave.fillna(False).to_numpy(dtype=bool), "available"] = 0.0
+
+    attendance = pd.DataFrame(
+        list(
+            EmployeeAttendance.objects.filter(employee_id__in=ids, date__range=(first, last), date__lt=timezone.localdate())
+            .values_list("employee_id", "date", "status", "total_hrs")
+        ),
+        columns=["employee_id", "date", "status", "total_hrs"],
+    )
+    if not attendance.empty:
+        attendance["date"] = _column(attendance["date"].tolist())
+        attendance["attended"] = np.where(
+            attendance["status"] == "present",
+            _to_hours(attendance["total_hrs"]).fillna(float(CAPACITY_WORKDAY_HOURS)),
+            0.0,
+        )
+        grid = grid.merge(attendance[["employee_id", "date", "attended"]], on=["employee_id", "date"], how="left")
+        recorded = grid["attended"].notna() & (grid["date"] < today)
+        grid.loc[recorded, "available"] = grid.loc[recorded, "attended"].astype(float)
+        grid = grid.drop(columns="attended")
+
+    assignments = pd.DataFrame(
+        list(
+            ClientWorkCategoryAssignment.objects.filter(
+                assigned_to_id__in=ids, is_active=True, allocated_hours__gt=0
+            ).filter(
+                Q(start_date__lte=last, completion_date__gte=first)
+                | Q(start_date__isnull=True, completion_date__range=(first, last))
+                | Q(completion_date__isnull=True, start_date__range=(first, last))
+                | (Q(start_date__isnull=True, completion_date__isnull=True) & ~Q(progress__in=CLOSED_PROGRESS))
+            ).values_list("assigned_to_id", "start_date", "completion_date", "allocated_hours")
+        ),
+        columns=["employee_id", "start", "end", "hours"],
+    )
+    undated = assignments["start"].isna() & assignments["end"].isna()
+    unscheduled = assignments[undated].groupby("employee_id")["hours"].sum()
+    assignments = assignments[~undated].copy()
+    allocated = pd.DataFrame({"employee_id": [], "date": _column([]), "allocated": []})
+    if not assignments.empty:
+        starts = pd.to_datetime(assignments["start"].fillna(assignments["end"]))
+        ends = pd.to_datetime(assignments["end"].fillna(assignments["start"]))
+        assignments["start"] = _column(np.minimum(starts, ends))
+        assignments["end"] = _column(np.maximum(starts, ends))
+        working_days = np.busday_count(
+            _days(assignments["start"]), _days(assignments["end"]) + 1, weekmask=CAPACITY_WEEKMASK, holidays=holidays
+        )
+        # Work squeezed into non-working days lands on its start day
+        assignments["per_day"] = assignments["hours"] / np.maximum(working_days, 1)
+        assignments["any_working_day"] = working_days > 0
+        days = _expand_days(assignments, first_day, last_day)
+        on_working_day = np.is_busday(_days(days["date"]), weekmask=CAPACITY_WEEKMASK, holidays=holidays)
+        days = days[np.where(days["any_working_day"], on_working_day, days["date"] == days["start"])]
+        allocated = days.groupby(["employee_id", "date"], as_index=False)["per_day"].sum().rename(columns={"per_day": "allocated"})
+
+    logged = pd.DataFrame(
+        list(
+            TimeTracking.objects.filter(employee_id__in=ids, date__range=(first, last), duration__isnull=False)
+            .values_list("employee_id", "date", "duration")
+        ),
+        columns=["employee_id", "date", "duration"],
+    )
+    logged["date"] = _column(logged["date"].tolist())
+    logged["logged"] = _to_hours(logged["duration"]).astype(float)
+    logged = logged.groupby(["employee_id", "date"], as_index=False)["logged"].sum()
+
+    grid = grid.merge(allocated, on=["employee_id", "date"], how="left").merge(logged, on=["employee_id", "date"], how="left")
+    grid[["allocated", "logged"]] = grid[["allocated", "logged"]].astype(float).fillna(0.0)
+    day_numbers = (_days(grid["date"]) - first_day).astype(int)
+    grid["week"] = _column(first_day + (day_numbers // 7 * 7).astype("timedelta64[D]"))
+    weekly = grid.groupby(["employee_id", "week"], as_index=False)[["available", "allocated", "logged"]].sum()
+
+    usernames = dict(zip(employees["employee_id"], employees["username"]))
+    plan = []
+    free = {}
+    for employee_id, rows in weekly.groupby("employee_id"):
+        employee_id = int(employee_id)
+        totals = rows[["available", "allocated", "logged"]].sum()
+        free[employee_id] = float(totals["available"] - totals["allocated"])
+        plan.append({
+            "employee_id": employee_id,
+            "username": usernames[employee_id],
+            "available_hours": _hours(totals["available"]),
+            "allocated_hours": _hours(totals["allocated"]),
+            "logged_hours": _hours(totals["logged"]),
+            "free_hours": _hours(free[employee_id]),
+            "unscheduled_hours": _hours(unscheduled.get(employee_id, 0)),
+            "flag": _flag(totals["available"], totals["allocated"]),
+            "weeks": [
+                {
+                    "week_start": pd.Timestamp(row.week).date(),
+                    "available_hours": _hours(row.available),
+                    "allocated_hours": _hours(row.allocated),
+                    "logged_hours": _hours(row.logged),
+                    "utilization": round(row.logged / row.available * 100, 1) if row.available else None,
+                    "allocation": round(row.allocated / row.available * 100, 1) if row.available else None,
+                    "flag": _flag(row.available, row.allocated),
+                }
+                for row in rows.itertuples(index=False)
+            ],
+        })
+
+    suggestions = []
+    planned = memberships[memberships["employee_id"].isin(ids)]
+    for (department, name), members in planned.groupby(["department_id", "department_name"]):
+        best = int(max(members["employee_id"], key=lambda employee_id: (free[employee_id], -employee_id)))
+        suggestions.append({
+            "department_id": int(department),
+            "department_name": name,
+            "employee_id": int(best),
+            "username": usernames[best],
+            "free_hours": _hours(free[best]),
+        })
+    return {"window": window, "employees": plan, "suggestions": suggestions}
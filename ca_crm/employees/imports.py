@@ -0,0 +1,15 @@
+from ca_crm.importer import Column, ImportSchema
+from .models import Holiday
+
+
+HOLIDAY_IMPORT = ImportSchema(
+    Holiday,
+    columns=[
+        Column("date", kind="date", required=True, unique=True, date_format="%Y-%m-%d"),
+        Column("name", required=True),
+        Column("description", default=""),
+        Column("is_optional", kind="bool", default=False),
+    ],
+    # Holidays already on the calendar are kept as they are
+    on_conflict="skip",
+)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_leavetype_leaveapplication_userleavemapping'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timetracking',
+            index=models.Index(fields=['date', 'id'], name='employees_t_date_659e3a_idx'),
+        ),
+    ]
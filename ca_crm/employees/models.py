@@ -79,6 +79,10 @@ class TimeTracking(models.Model):
 
     class Meta:
         ordering = ['-date', 'start_time']
+        indexes = [
+            # Keyset pages of the time tracking list
+            models.Index(fields=["date", "id"]),
+        ]
 
     def save(self, *args, **kwargs):
         # Optionally compute duration if start_time and end_time are provided
@@ -1,3 +1,116 @@
+from datetime import date, datetime, time
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from ca_crm.importer import ImportFileError, run_import
+from ca_crm.testing import auth_headers
+from clients.models import Customer
+from custom_auth.models import CustomUser, EmployeeProfile
+from workflow.instantiation import instantiate_assignments
+from workflow.models import Department, WorkCategory
+from .capacity import capacity_plan
+from .imports import HOLIDAY_IMPORT
+from .models import EmployeeAttendance, Holiday, LeaveApplication, LeaveType, TimeTracking
 
-# Create your tests here.
+
+def holiday_csv(*rows, name="holidays.csv"):
+    lines = ["date,name,description,is_optional", *rows]
+    return SimpleUploadedFile(name, "\n".join(lines).encode(), content_type="text/csv")
+
+
+class HolidayImportTests(TestCase):
+    rows = ("2026-01-26,Republic Day,,no", "26/01/2026,Bad date,,no", "2026-08-15,Independence Day,,yes")
+
+    def test_dry_run_validates_without_writing(self):
+        result = run_import(HOLIDAY_IMPORT, holiday_csv(*self.rows), dry_run=True, partial=True)
+        self.assertEqual((result.total_rows, result.valid_rows), (3, 2))
+        self.assertEqual([error["row"] for error in result.errors], [3])
+        self.assertFalse(Holiday.objects.exists())
+
+    def test_default_mode_writes_nothing_when_a_row_is_bad(self):
+        result = run_import(HOLIDAY_IMPORT, holiday_csv(*self.rows))
+        self.assertEqual(result.created, 0)
+        self.assertFalse(Holiday.objects.exists())
+
+    def test_partial_mode_writes_the_valid_rows(self):
+        result = run_import(HOLIDAY_IMPORT, holiday_csv(*self.rows), partial=True)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(len(result.errors), 1)
+        self.assertTrue(Holiday.objects.get(date=date(2026, 8, 15)).is_optional)
+
+    def test_existing_holidays_are_skipped(self):
+        Holiday.objects.create(date=date(2026, 1, 26), name="Kept")
+        result = run_import(HOLIDAY_IMPORT, holiday_csv(self.rows[0], self.rows[2]))
+        self.assertEqual((result.created, result.skipped), (1, 1))
+        self.assertEqual(Holiday.objects.get(date=date(2026, 1, 26)).name, "Kept")
+
+    def test_missing_columns_and_old_excel_files_are_rejected(self):
+        file = SimpleUploadedFile("holidays.csv", b"name\nRepublic Day", content_type="text/csv")
+        result = run_import(HOLIDAY_IMPORT, file)
+        self.assertEqual(result.errors[0]["column"], "date")
+        with self.assertRaises(ImportFileError):
+            run_import(HOLIDAY_IMPORT, holiday_csv(*self.rows, name="holidays.xls"))
+
+
+class CapacityPlanTests(TestCase):
+    # A past week, Monday 6 to Sunday 12 January 2025, so attendance counts
+    monday = date(2025, 1, 6)
+
+    def setUp(self):
+        self.users = []
+        for name in ("busy", "idle"):
+            user = CustomUser.objects.create(username=name, email=f"{name}@example.com", password="x")
+            EmployeeProfile.objects.create(user=user)
+            self.users.append(user)
+        busy, idle = self.users
+        customer = Customer.objects.create(name_of_business="Acme Traders", customer_code="ACME", created_by=busy)
+        department = Department.objects.create(name="Tax", created_by=busy)
+        category = WorkCategory.objects.create(name="GST return", department=department, created_by=busy)
+        with self.captureOnCommitCallbacks(execute=True):
+            instantiate_assignments(category, [
+                {"customer_id": customer.id, "assigned_to_id": busy.id, "allocated_hours": 10,
+                 "start_date": date(2025, 1, 6), "completion_date": date(2025, 1, 10)},
+                {"customer_id": customer.id, "assigned_to_id": idle.id},
+            ])
+            TimeTracking.objects.create(
+                employee=busy, client=customer, date=date(2025, 1, 9),
+                start_time=datetime(2025, 1, 9, 10), end_time=datetime(2025, 1, 9, 12),
+            )
+        Holiday.objects.create(date=date(2025, 1, 7), name="Holiday")
+        Holiday.objects.create(date=date(2025, 1, 8), name="Optional", is_optional=True)
+        leave_type = LeaveType.objects.create(name="Casual")
+        LeaveApplication.objects.create(
+            employee=busy, leave_type=leave_type, start_date=date(2025, 1, 8), end_date=date(2025, 1, 8),
+            reason="Personal", status="approved",
+        )
+        LeaveApplication.objects.create(
+            employee=idle, leave_type=leave_type, start_date=date(2025, 1, 6), end_date=date(2025, 1, 10),
+            reason="Pending", status="pending",
+        )
+        EmployeeAttendance.objects.create(
+            employee=busy, date=date(2025, 1, 9), check_in=time(10), check_out=time(14), status="present"
+        )
+        EmployeeAttendance.objects.create(employee=busy, date=date(2025, 1, 10), status="absent")
+
+    def test_holidays_leave_and_attendance_reduce_available_hours(self):
+        plan = capacity_plan(self.monday, weeks=1)
+        busy, idle = plan["employees"]
+        # Monday 8h, the holiday and approved leave 0h, Thursday attended 4h, Friday absent
+        self.assertEqual(busy["available_hours"], 12.0)
+        # Ten hours over the four working days of 6-10 January, the holiday left out
+        self.assertEqual(busy["allocated_hours"], 10.0)
+        self.assertEqual(busy["logged_hours"], 2.0)
+        self.assertEqual(busy["flag"], "balanced")
+        # Pending leave and optional holidays do not count
+        self.assertEqual(idle["available_hours"], 32.0)
+        self.assertEqual(idle["flag"], "under_allocated")
+        self.assertEqual(plan["suggestions"][0]["username"], "idle")
+
+    def test_view_validates_the_range(self):
+        headers = auth_headers(self.users[0])
+        url = reverse("capacity-plan")
+        response = self.client.get(url, {"start_date": "2025-01-06", "weeks": 1}, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["employees"]), 2)
+        self.assertEqual(self.client.get(url, {"weeks": 100}, **headers).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start_date": "06/01/2025"}, **headers).status_code, 400)
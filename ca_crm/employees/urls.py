@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import (
+    CapacityPlanView,
     ClockInOutAPIView,
     CheckClockInStatusAPIView,
     RequestAttendanceAPIView,
@@ -69,4 +70,6 @@ urlpatterns = [
     path("day-sheet/delete/<int:id>/", TimeTrackingDeleteAPIView.as_view(), name="delete-day-sheet"),
     path("day-sheet/approve/", TimeTrackingApproveView.as_view(), name="approve-day-sheet"),
 
+    path("capacity/", CapacityPlanView.as_view(), name="capacity-plan"),
+
 ]  
\ No newline at end of file
@@ -21,8 +21,12 @@ from .models import (EmployeeAttendance,
                      AssignedWorkActivity)
 from django.utils import timezone
 from workflow.views import ModifiedApiview
+from ca_crm.pagination import paginate_keyset, InvalidCursor
+from ca_crm.importer import run_import, is_dry_run, ImportFileError
+from ca_crm.params import date_param
+from .imports import HOLIDAY_IMPORT
+from .capacity import capacity_plan, CAPACITY_MAX_WEEKS
 import pytz
-import pandas as pd
 from django.db.models import Q 
 from django.utils.timezone import make_aware
 from django.db import transaction
@@ -776,29 +780,17 @@ class ImportHolidayAPIView(ModifiedApiview):
             if not file:
                 return Response({"error": "CSV file is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            df = pd.read_csv(file)
+            # Rows with a bad date are reported and skipped, the rest are imported
+            result = run_import(HOLIDAY_IMPORT, file, dry_run=is_dry_run(request), partial=True)
+            if result.errors and not result.valid_rows:
+                return Response({"error": "Invalid CSV format. Required columns: date, name, description, is_optional", **result.report()}, status=status.HTTP_400_BAD_REQUEST)
+            if result.dry_run:
+                return Response(result.report(), status=status.HTTP_200_OK)
 
-            required_columns = {"date", "name", "description", "is_optional"}
-            if not required_columns.issubset(df.columns):
-                return Response({"error": "Invalid CSV format. Required columns: date, name, description, is_optional"}, status=status.HTTP_400_BAD_REQUEST)
-
-            with transaction.atomic():
-                for _, row in df.iterrows():
-                    try:
-                        holiday_date = datetime.strptime(row["date"], "%Y-%m-%d").date()
-                        Holiday.objects.get_or_create(
-                            date=holiday_date,
-                            defaults={
-                                "name": row["name"],
-                                "description": row.get("description", ""),
-                                "is_optional": bool(row["is_optional"])
-                            }
-                        )
-                    except ValueError:
-                        continue  # Skip invalid date formats
-
-            return Response({"message": "Holidays imported successfully"}, status=status.HTTP_201_CREATED)
+            return Response({"message": "Holidays imported successfully", **result.report()}, status=status.HTTP_201_CREATED)
 
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -1171,9 +1163,15 @@ class TimeTrackingListView(APIView):
             end_of_week = start_of_week + timedelta(days=6)          # Sunday
             queryset = queryset.filter(date__range=[start_of_week, end_of_week])
 
+        queryset = queryset.select_related("employee", "client", "work__work_category", "work_activity")
+        try:
+            page = paginate_keyset(request, queryset, sort_key="date")
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # Serialize the data
         data = []
-        for entry in queryset:
+        for entry in page.items:
             data.append({
                 "id": entry.id,
                 "employee": entry.employee.id if entry.employee else None,
@@ -1194,7 +1192,7 @@ class TimeTrackingListView(APIView):
                 "created_at": entry.created_at,
             })
 
-        return Response(data, status=status.HTTP_200_OK)    
+        return Response(data, status=status.HTTP_200_OK, headers=page.headers())
 
 # Retrieve, update, and delete a single record
 class TimeTrackingRetrieveAPIView(ModifiedApiview):
@@ -1266,4 +1264,35 @@ class TimeTrackingApproveView(ModifiedApiview):
                 status=status.HTTP_200_OK,
             )
         except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CapacityPlanView(ModifiedApiview):
+    """
+    Weekly available, allocated and logged hours per employee with
+    over/under-allocation flags, plus the least loaded employee of each
+    department. Params: start_date (default today), weeks (default 4),
+    department_id and employee_id (repeatable).
+    """
+    def get(self, request):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            params = request.query_params
+            try:
+                start = date_param(params, "start_date") or timezone.localdate()
+                weeks = int(params.get("weeks") or 4)
+                department_id = int(params["department_id"]) if params.get("department_id") else None
+                employee_ids = [int(value) for value in params.getlist("employee_id") if value]
+            except ValueError:
+                return Response(
+                    {"error": "start_date must be YYYY-MM-DD; weeks, department_id and employee_id must be numbers"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not 1 <= weeks <= CAPACITY_MAX_WEEKS:
+                return Response({"error": f"weeks must be between 1 and {CAPACITY_MAX_WEEKS}"}, status=status.HTTP_400_BAD_REQUEST)
+            plan = capacity_plan(start, weeks, department_id=department_id, employee_ids=employee_ids)
+            return Response(plan, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,13 +1,9 @@
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.core.files.storage import FileSystemStorage
-import os
-import posixpath
+from ca_crm import storage
 from .models import Expense, CustomUser, ClientWorkCategoryAssignment
 from workflow.views import ModifiedApiview
-from importexport.views import generate_short_unique_filename
-from django.conf import settings
 
 
 
@@ -39,11 +35,7 @@ class ExpenseCreateView(ModifiedApiview):
             # Handle file upload
             file_url = ""
             if file:
-                extension = os.path.splitext(file.name)[1]  # Get the file extension
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'expense_files'))
-                file_path = fs.save(short_unique_filename, file)
-                file_url = posixpath.join('media/expense_files', file_path)
+                file_url = storage.save(file, 'expense_files')
 
             # Create the Expense object
             expense_obj = Expense.objects.create(
@@ -174,11 +166,7 @@ class ExpenseUpdateView(ModifiedApiview):
 
             # Handle file upload
             if file:
-                extension = os.path.splitext(file.name)[1]  # Get the file extension
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'expense_files'))
-                file_path = fs.save(short_unique_filename, file)
-                file_url = posixpath.join('media/expense_files', file_path)
+                file_url = storage.save(file, 'expense_files')
                 expense.file = file_url
 
             expense.updated_by = user
@@ -7,22 +7,11 @@ from .models import Location, Inward, Outward
 from custom_auth.models import CustomUser
 from clients.models import Customer
 from workflow.models import ClientWorkCategoryAssignment
-import uuid
-import time
 from datetime import date, datetime
 import traceback
-from django.conf import settings
-import os
-import posixpath
-from django.core.files.storage import FileSystemStorage
+from ca_crm import storage
 from workflow.views import ModifiedApiview
-
-
-def generate_short_unique_filename(extension):
-    # Shortened UUID (6 characters) + Unix timestamp for uniqueness
-    unique_id = uuid.uuid4().hex[:6]  # Get the first 6 characters of UUID
-    timestamp = str(int(time.time()))  # Unix timestamp as a string
-    return f"{unique_id}_{timestamp}{extension}"
+from ca_crm.pagination import paginate_keyset, InvalidCursor
 
 
 class LocationCreateView(ModifiedApiview):
@@ -46,11 +35,7 @@ class LocationCreateView(ModifiedApiview):
                 )
 
             if photo:
-                extension = os.path.splitext(photo.name)[1]  # Get the file extension
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'photos'))
-                photo_path = fs.save(short_unique_filename, photo)
-                photo_url = posixpath.join('media/location/photos', photo_path)
+                photo_url = storage.save(photo, 'photos')
             else:
                 photo_url = ""
 
@@ -124,11 +109,7 @@ class LocationUpdateView(ModifiedApiview):
             location_obj = Location.objects.get(id=id)
             photo = request.data.get('photo')
             if photo:
-                extension = os.path.splitext(photo.name)[1]  # Get the file extension
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'photos'))
-                photo_path = fs.save(short_unique_filename, photo)
-                photo_url = posixpath.join('media/location/photos', photo_path)
+                photo_url = storage.save(photo, 'photos')
             else:
                 photo_url = ""
 
@@ -228,11 +209,7 @@ class InwardCreateView(ModifiedApiview):
             # Handle file upload
             file_url = ""
             if file:
-                extension = os.path.splitext(file.name)[1]  # Get the file extension
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'inward_files'))
-                file_path = fs.save(short_unique_filename, file)
-                file_url = posixpath.join('media/inward_files', file_path)
+                file_url = storage.save(file, 'inward_files')
 
             # Create the Inward object
             inward_obj = Inward.objects.create(
@@ -291,25 +268,28 @@ class InwardListView(ModifiedApiview):
 
             # Fetch the Inward object
             inward_list = []
-            inward_data = Inward.objects.all()
-            for inward in inward_data:
+            inward_data = Inward.objects.select_related("customer", "location")
+            page = paginate_keyset(request, inward_data)
+            for inward in page.items:
                 inward_list.append(                {
                     "id": inward.id,
                     "company": inward.company,
                     "inward_for": inward.inward_for,
                     "inward_type": inward.inward_type,
-                    "customer": inward.customer.id,
+                    "customer": inward.customer_id,
                     "customer_name": inward.customer.name_of_business,
                     "reference_to": inward.reference_to,
                     "inward_title": inward.inward_title,
                     "description": inward.description,
-                    "location_id": inward.location.id if inward.location else None,
+                    "location_id": inward.location_id,
                     "location": inward.location.location if inward.location else None,
                     "through": inward.through,
                     "created_date": inward.created_date
                 },)
             # Return the object as a response
-            return Response({"inward_data":inward_list}, status=status.HTTP_200_OK)
+            return Response({"inward_data":inward_list, **page.meta()}, status=status.HTTP_200_OK, headers=page.headers())
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -396,11 +376,7 @@ class InwardUpdateView(ModifiedApiview):
             # Handle file upload if provided
             file = request.FILES.get('file')
             if file:
-                extension = os.path.splitext(file.name)[1]  # Get the file extension
-                short_unique_filename = generate_short_unique_filename(extension)
-                fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'inward_files'))
-                file_path = fs.save(short_unique_filename, file)
-                inward_obj.file = posixpath.join('media/inward_files', file_path)
+                inward_obj.file = storage.save(file, 'inward_files')
 
             # Update modified_by and save
             inward_obj.modified_by = user
@@ -553,13 +529,13 @@ class OutwardListView(ModifiedApiview):
 
             # Fetch the Outward object
             outward_list = []
-            outward_obj = Outward.objects.all()
-            for outward in outward_obj:
+            page = paginate_keyset(request, Outward.objects.all())
+            for outward in page.items:
                 outward_list.append({
                     "id": outward.id,
-                    "customer": outward.customer.id,
+                    "customer": outward.customer_id,
                     "outward_reference": outward.outward_reference,
-                    "inward": outward.inward.id if outward.inward else None,
+                    "inward": outward.inward_id,
                     "company": outward.company,
                     "outward_title": outward.outward_title,
                     "about_outward": outward.about_outward,
@@ -570,7 +546,9 @@ class OutwardListView(ModifiedApiview):
                     "name_of_person": outward.name_of_person,
                 })
             # Return the object as a response
-            return Response({"outward-data":outward_list}, status=status.HTTP_200_OK)
+            return Response({"outward-data":outward_list, **page.meta()}, status=status.HTTP_200_OK, headers=page.headers())
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -0,0 +1,5 @@
+from django.contrib import admin
+from .models import OutboundEmail, OutboundEmailAttachment
+
+admin.site.register(OutboundEmail)
+admin.site.register(OutboundEmailAttachment)
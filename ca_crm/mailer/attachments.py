@@ -0,0 +1,110 @@
+import mimetypes
+import os
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from django.conf import settings
+from ca_crm import storage
+
+
+# Parallel downloads per email
+ATTACHMENT_FETCH_WORKERS = getattr(settings, "EMAIL_ATTACHMENT_FETCH_WORKERS", 4)
+ATTACHMENT_FETCH_TIMEOUT = getattr(settings, "EMAIL_ATTACHMENT_FETCH_TIMEOUT", 30)
+# Attachments larger than this in total are sent as one zip file
+ATTACHMENT_ZIP_THRESHOLD = getattr(settings, "EMAIL_ATTACHMENT_ZIP_THRESHOLD", 10 * 1024 * 1024)
+ATTACHMENT_BUNDLE_NAME = "attachments.zip"
+# Downloads stay in memory up to this size and spill to disk beyond it
+SPOOL_MAX_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class Attachment:
+    """A downloaded or stored attachment, held in an open binary file."""
+
+    def __init__(self, file_name, file, size, mime_type):
+        self.file_name = file_name
+        self.file = file
+        self.size = size
+        self.mime_type = mime_type
+
+    def read(self):
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+
+def _mime_type(file_name, content_type=None):
+    if content_type and content_type != "application/octet-stream":
+        return content_type
+    return mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+
+def spool(stream):
+    """Copy a file-like object into a spooled temporary file; returns (file, size)."""
+    spooled = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    shutil.copyfileobj(stream, spooled, CHUNK_SIZE)
+    size = spooled.tell()
+    spooled.seek(0)
+    return spooled, size
+
+
+def download(source, file_name=None, mime_type=None, timeout=ATTACHMENT_FETCH_TIMEOUT):
+    """
+    Open `source` through the storage service, which serves repeat downloads
+    from its local cache. Only media paths and Cloudinary files are read;
+    anything else raises ValueError.
+    """
+    stored = storage.open_file(source, timeout=timeout)
+    file_name = file_name or stored.name
+    return Attachment(file_name, stored.file, stored.size, mime_type or _mime_type(file_name, stored.content_type))
+
+
+def fetch_all(sources, workers=ATTACHMENT_FETCH_WORKERS):
+    """
+    Download (source, file_name, mime_type) tuples concurrently with at
+    most `workers` threads, in order. If any download fails the others are
+    closed and the first error is raised.
+    """
+    if not sources:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(sources)))) as executor:
+        futures = [executor.submit(download, *source) for source in sources]
+    attachments, error = [], None
+    for future in futures:
+        try:
+            attachments.append(future.result())
+        except Exception as e:
+            error = error or e
+    if error:
+        for attachment in attachments:
+            attachment.close()
+        raise error
+    return attachments
+
+
+def bundle(attachments, threshold=ATTACHMENT_ZIP_THRESHOLD, name=ATTACHMENT_BUNDLE_NAME):
+    """
+    Return the attachments unchanged, or as a single zip attachment when
+    their total size is over `threshold`. Names are made unique inside the zip.
+    """
+    if len(attachments) < 2 or sum(attachment.size for attachment in attachments) <= threshold:
+        return attachments
+    spooled = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    used = set()
+    with zipfile.ZipFile(spooled, "w", zipfile.ZIP_DEFLATED) as archive:
+        for attachment in attachments:
+            stem, ext = os.path.splitext(attachment.file_name)
+            entry, copy = attachment.file_name, 1
+            while entry in used:
+                entry, copy = f"{stem} ({copy}){ext}", copy + 1
+            used.add(entry)
+            attachment.file.seek(0)
+            with archive.open(entry, "w") as target:
+                shutil.copyfileobj(attachment.file, target, CHUNK_SIZE)
+            attachment.close()
+    size = spooled.tell()
+    spooled.seek(0)
+    return [Attachment(name, spooled, size, "application/zip")]
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from mailer.outbox import drain_outbox, OUTBOX_BATCH_SIZE, DEFAULT_QUEUE
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound emails, one SMTP connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument("--queue", default=DEFAULT_QUEUE)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting when it is empty.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            totals = drain_outbox(options["batch_size"], options["max_batches"], options["queue"])
+            if any(totals.values()):
+                self.stdout.write(
+                    f"Sent {totals['sent']}, retrying {totals['retried']}, failed {totals['failed']}"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
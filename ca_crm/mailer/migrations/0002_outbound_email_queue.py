@@ -0,0 +1,26 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboundemail',
+            name='mailer_outb_status_34923c_idx',
+        ),
+        migrations.AddField(
+            model_name='outboundemail',
+            name='queue',
+            field=models.CharField(default='default', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='outboundemail',
+            index=models.Index(fields=['queue', 'status', 'next_attempt_at'], name='mailer_outb_queue_e2bfb5_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils import timezone
+from custom_auth.models import CustomUser
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting in (or delivered from) the outbox. Rows are written by
+    the API views and delivered by the `send_queued_emails` command.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default="")
+    html_body = models.TextField(null=True, blank=True)
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    to_emails = models.JSONField(default=list)
+    # Emails are drained per queue; bulk campaigns use their own queue
+    queue = models.CharField(max_length=50, default="default")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    lock_token = models.CharField(max_length=32, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="outbound_emails")
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["queue", "status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class OutboundEmailAttachment(models.Model):
+    """
+    A file sent with an OutboundEmail: either a copy of the uploaded file in
+    `file`, or a remote `url` that is downloaded when the email is sent.
+    """
+    id = models.AutoField(primary_key=True)
+    email = models.ForeignKey(OutboundEmail, on_delete=models.CASCADE, related_name="attachments")
+    file_name = models.CharField(max_length=255)
+    file = models.FileField(upload_to="outbox/", null=True, blank=True)
+    url = models.URLField(max_length=500, null=True, blank=True)
+    mime_type = models.CharField(max_length=100, default="application/octet-stream")
+
+    def __str__(self):
+        return self.file_name
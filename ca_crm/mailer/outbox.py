@@ -0,0 +1,244 @@
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from loguru import logger
+from ca_crm import storage
+from .attachments import Attachment, bundle, fetch_all, spool
+from .models import OutboundEmail, OutboundEmailAttachment
+
+
+OUTBOX_BATCH_SIZE = getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+# Retry delay doubles after every failed attempt, starting at RETRY_BASE seconds
+OUTBOX_RETRY_BASE = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE", 60)
+OUTBOX_RETRY_MAX = getattr(settings, "EMAIL_OUTBOX_RETRY_MAX", 3600)
+# Rows left in "sending" longer than this (crashed worker) are picked up again
+OUTBOX_LOCK_TIMEOUT = getattr(settings, "EMAIL_OUTBOX_LOCK_TIMEOUT", 600)
+DEFAULT_QUEUE = "default"
+
+
+def _recipients(to_emails):
+    if isinstance(to_emails, str):
+        to_emails = to_emails.split(",")
+    return [email.strip() for email in to_emails or [] if email and email.strip()]
+
+
+def _attachment_list(attachments):
+    if not attachments:
+        return []
+    if isinstance(attachments, (list, tuple)):
+        return [attachment for attachment in attachments if attachment]
+    return [attachments]
+
+
+def enqueue_email(subject, body, to_emails, attachments=None, html_body=None, created_by=None,
+                  max_attempts=None, queue=DEFAULT_QUEUE, send_at=None):
+    """
+    Store an email in the outbox and return the OutboundEmail.
+
+    `attachments` is a file (or a list of files and/or stored paths).
+    Files are copied to storage so they outlive the request; paths must be
+    media paths or Cloudinary files (storage.check_source) and are fetched
+    when the email is sent. `send_at` holds the email back until that time.
+    """
+    recipients = _recipients(to_emails)
+    if not recipients:
+        raise ValueError("At least one recipient email is required")
+    attachments = _attachment_list(attachments)
+    for attachment in attachments:
+        if isinstance(attachment, str):
+            storage.check_source(attachment)
+
+    with transaction.atomic():
+        email = OutboundEmail.objects.create(
+            subject=subject or "",
+            body=body or "",
+            html_body=html_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to_emails=recipients,
+            queue=queue,
+            max_attempts=max_attempts or OUTBOX_MAX_ATTEMPTS,
+            next_attempt_at=send_at or timezone.now(),
+            created_by=created_by,
+        )
+        for attachment in attachments:
+            if isinstance(attachment, str):
+                file_name = os.path.basename(attachment.split("?")[0]) or "attachment"
+                record = OutboundEmailAttachment(email=email, file_name=file_name, url=attachment)
+            else:
+                file_name = os.path.basename(attachment.name)
+                record = OutboundEmailAttachment(email=email, file_name=file_name)
+                record.file.save(file_name, attachment, save=False)
+            record.mime_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+            record.save()
+    return email
+
+
+def bulk_enqueue(messages, queue=DEFAULT_QUEUE, created_by=None, batch_size=500):
+    """
+    Queue many attachment-less emails with bulk_create. `messages` are dicts
+    with subject, body, to_emails and optionally html_body. Returns the saved
+    OutboundEmail rows in the same order.
+    """
+    emails = []
+    for message in messages:
+        recipients = _recipients(message["to_emails"])
+        if not recipients:
+            raise ValueError("At least one recipient email is required")
+        emails.append(OutboundEmail(
+            subject=message.get("subject") or "",
+            body=message.get("body") or "",
+            html_body=message.get("html_body"),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to_emails=recipients,
+            queue=queue,
+            max_attempts=OUTBOX_MAX_ATTEMPTS,
+            created_by=created_by,
+        ))
+    return OutboundEmail.objects.bulk_create(emails, batch_size=batch_size)
+
+
+def build_message(email, connection=None):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=email.to_emails,
+        connection=connection,
+    )
+    if email.html_body:
+        message.content_subtype = "html"
+        message.body = email.html_body
+    for attachment in load_attachments(email.attachments.all()):
+        message.attach(attachment.file_name, attachment.read(), attachment.mime_type)
+        attachment.close()
+    return message
+
+
+def load_attachments(records):
+    """
+    The attachments of an email, in order: stored files are read from
+    storage, URLs are downloaded concurrently, and the lot is zipped when it
+    is over EMAIL_ATTACHMENT_ZIP_THRESHOLD.
+    """
+    records = list(records)
+    remote = [record for record in records if not record.file]
+    # Names only suggest a type; the downloaded Content-Type wins over a guess
+    fetched = iter(fetch_all([
+        (record.url, record.file_name, None if record.mime_type == "application/octet-stream" else record.mime_type)
+        for record in remote
+    ]))
+    attachments = []
+    for record in records:
+        if record.file:
+            with record.file.open("rb") as file:
+                spooled, size = spool(file)
+            attachments.append(Attachment(record.file_name, spooled, size, record.mime_type))
+        else:
+            attachments.append(next(fetched))
+    return bundle(attachments)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(OUTBOX_RETRY_BASE * 2 ** max(attempts - 1, 0), OUTBOX_RETRY_MAX))
+
+
+def claim_batch(batch_size=OUTBOX_BATCH_SIZE, queue=DEFAULT_QUEUE):
+    """
+    Lock up to `batch_size` due emails for this worker. The claim is a
+    conditional UPDATE, so two workers never get the same row.
+    """
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(queue=queue).filter(
+        Q(status="pending", next_attempt_at__lte=now)
+        | Q(status="sending", locked_at__lt=now - timedelta(seconds=OUTBOX_LOCK_TIMEOUT))
+    )
+    ids = list(due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    due.filter(id__in=ids).update(status="sending", lock_token=token, locked_at=now)
+    return list(
+        OutboundEmail.objects.filter(lock_token=token, status="sending")
+        .prefetch_related("attachments")
+        .order_by("id")
+    )
+
+
+def _mark_sent(email):
+    now = timezone.now()
+    OutboundEmail.objects.filter(id=email.id, lock_token=email.lock_token).update(
+        status="sent", attempts=email.attempts + 1, sent_at=now, last_error=None,
+        lock_token=None, locked_at=None, updated_date=now,
+    )
+
+
+def _mark_failed(email, error):
+    """Schedule a retry with backoff, or give up after max_attempts."""
+    now = timezone.now()
+    attempts = email.attempts + 1
+    gave_up = attempts >= email.max_attempts
+    OutboundEmail.objects.filter(id=email.id, lock_token=email.lock_token).update(
+        status="failed" if gave_up else "pending",
+        attempts=attempts,
+        next_attempt_at=now if gave_up else now + retry_delay(attempts),
+        last_error=str(error),
+        lock_token=None, locked_at=None, updated_date=now,
+    )
+    return gave_up
+
+
+def deliver_batch(emails, throttle=None):
+    """
+    Send a claimed batch over a single connection. `throttle` is called
+    before each send (for rate limiting). Returns a dict with the number of
+    emails sent, scheduled for retry and failed for good.
+    """
+    counts = {"sent": 0, "retried": 0, "failed": 0}
+
+    def failed(email, error):
+        logger.error(f"Failed to send email {email.id} to {email.to_emails}. Error: {error}")
+        counts["failed" if _mark_failed(email, error) else "retried"] += 1
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            failed(email, e)
+        return counts
+    try:
+        for email in emails:
+            if throttle:
+                throttle()
+            try:
+                build_message(email, connection).send()
+            except Exception as e:
+                failed(email, e)
+                continue
+            _mark_sent(email)
+            counts["sent"] += 1
+            logger.success(f"Email {email.id} sent successfully to {email.to_emails}")
+    finally:
+        connection.close()
+    return counts
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, max_batches=None, queue=DEFAULT_QUEUE, throttle=None):
+    """Deliver due emails of `queue` batch by batch until none are left."""
+    totals = {"sent": 0, "retried": 0, "failed": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        emails = claim_batch(batch_size, queue)
+        if not emails:
+            break
+        for key, value in deliver_batch(emails, throttle).items():
+            totals[key] += value
+        batches += 1
+    return totals
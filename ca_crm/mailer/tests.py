@@ -0,0 +1,104 @@
+import io
+import zipfile
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from ca_crm.testing import cloudinary_stand_in
+from .attachments import Attachment, bundle, fetch_all
+from .models import OutboundEmail
+from .outbox import (
+    claim_batch, drain_outbox, enqueue_email, OUTBOX_LOCK_TIMEOUT, OUTBOX_RETRY_BASE, retry_delay,
+)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.email = enqueue_email("Invoice", "Please pay", "a@example.com, b@example.com")
+
+    def test_queued_email_is_sent_once(self):
+        self.assertEqual(self.email.to_emails, ["a@example.com", "b@example.com"])
+        self.assertEqual(drain_outbox(), {"sent": 1, "retried": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), ("sent", 1))
+        self.assertIsNotNone(self.email.sent_at)
+        self.assertEqual(drain_outbox()["sent"], 0)
+
+    def test_claimed_rows_are_not_claimed_again_until_the_lock_expires(self):
+        self.assertEqual([email.id for email in claim_batch()], [self.email.id])
+        self.assertEqual(claim_batch(), [])
+        OutboundEmail.objects.filter(id=self.email.id).update(
+            locked_at=timezone.now() - timedelta(seconds=OUTBOX_LOCK_TIMEOUT + 1)
+        )
+        self.assertEqual([email.id for email in claim_batch()], [self.email.id])
+
+    def test_emails_held_back_until_send_at(self):
+        enqueue_email("Later", "", ["c@example.com"], send_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual([email.id for email in claim_batch()], [self.email.id])
+
+    def test_failures_back_off_then_give_up(self):
+        self.assertEqual(retry_delay(1), timedelta(seconds=OUTBOX_RETRY_BASE))
+        self.assertEqual(retry_delay(3), timedelta(seconds=OUTBOX_RETRY_BASE * 4))
+        OutboundEmail.objects.filter(id=self.email.id).update(max_attempts=2)
+        with mock.patch("mailer.outbox.EmailMessage.send", side_effect=OSError("SMTP down")):
+            self.assertEqual(drain_outbox(), {"sent": 0, "retried": 1, "failed": 0})
+            self.email.refresh_from_db()
+            self.assertEqual((self.email.status, self.email.attempts, self.email.last_error), ("pending", 1, "SMTP down"))
+            self.assertGreater(self.email.next_attempt_at, timezone.now())
+            # Not due again until the backoff has passed
+            self.assertEqual(drain_outbox()["retried"], 0)
+            OutboundEmail.objects.filter(id=self.email.id).update(next_attempt_at=timezone.now())
+            self.assertEqual(drain_outbox(), {"sent": 0, "retried": 0, "failed": 1})
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), ("failed", 2))
+        self.assertEqual(mail.outbox, [])
+
+
+CLOUD = "https://res.cloudinary.com/firm/raw/upload"
+
+
+class AttachmentTests(SimpleTestCase):
+    def attachment(self, name, content):
+        return Attachment(name, io.BytesIO(content), len(content), "application/pdf")
+
+    def test_downloads_keep_their_order(self):
+        files = {f"{CLOUD}/{name}.pdf": name.encode() * 10 for name in ("a", "b", "c")}
+        with cloudinary_stand_in(files):
+            attachments = fetch_all([(url, None, None) for url in files])
+        self.assertEqual([attachment.file_name for attachment in attachments], ["a.pdf", "b.pdf", "c.pdf"])
+        self.assertEqual(attachments[1].read(), b"b" * 10)
+        self.assertEqual(attachments[0].mime_type, "application/pdf")
+        for attachment in attachments:
+            attachment.close()
+
+    def test_one_failed_download_fails_the_lot(self):
+        files = {f"{CLOUD}/a.pdf": b"a", f"{CLOUD}/b.pdf": OSError("timed out")}
+        with cloudinary_stand_in(files), self.assertRaisesMessage(OSError, "timed out"):
+            fetch_all([(url, None, None) for url in files])
+
+    def test_foreign_urls_are_not_fetched(self):
+        with cloudinary_stand_in({}) as fetched, self.assertRaises(ValueError):
+            fetch_all([("https://example.com/a.pdf", None, None)])
+        self.assertEqual(fetched, [])
+
+    def test_large_sets_are_zipped_with_unique_names(self):
+        attachments = [self.attachment("report.pdf", b"x" * 60), self.attachment("report.pdf", b"y" * 60)]
+        self.assertEqual(bundle(attachments, threshold=200), attachments)
+        (archive,) = bundle(attachments, threshold=100)
+        self.assertEqual((archive.file_name, archive.mime_type), ("attachments.zip", "application/zip"))
+        with zipfile.ZipFile(archive.file) as contents:
+            self.assertEqual(contents.namelist(), ["report.pdf", "report (1).pdf"])
+            self.assertEqual(contents.read("report (1).pdf"), b"y" * 60)
+
+
+class OutboxAttachmentTests(TestCase):
+    def test_remote_attachments_are_fetched_when_sent(self):
+        url = f"{CLOUD}/invoice.pdf"
+        with cloudinary_stand_in({url: b"%PDF-1.4"}) as fetched:
+            enqueue_email("Invoice", "Attached", ["a@example.com"], attachments=[url])
+            self.assertEqual(fetched, [])
+            self.assertEqual(drain_outbox()["sent"], 1)
+        self.assertEqual(fetched, [url])
+        self.assertEqual(mail.outbox[0].attachments, [("invoice.pdf", b"%PDF-1.4", "application/pdf")])
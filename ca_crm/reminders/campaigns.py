@@ -0,0 +1,305 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Prefetch
+from django.template import Context, Template, TemplateSyntaxError
+from django.utils import timezone
+from billing.models import Billing
+from clients.models import Customer, CustomerGroups
+from mailer.models import OutboundEmail
+from mailer.outbox import bulk_enqueue, claim_batch, deliver_batch, OUTBOX_BATCH_SIZE
+from .models import ReminderCampaign, Reminders
+
+
+CAMPAIGN_CONCURRENCY = getattr(settings, "REMINDER_CAMPAIGN_CONCURRENCY", 4)
+CAMPAIGN_MAX_CONCURRENCY = getattr(settings, "REMINDER_CAMPAIGN_MAX_CONCURRENCY", 8)
+CAMPAIGN_RATE_LIMIT = getattr(settings, "REMINDER_CAMPAIGN_RATE_LIMIT", 120)
+CAMPAIGN_CHUNK_SIZE = 500
+UNPAID_STATUSES = ("unpaid", "partially-paid")
+# The only fields campaign templates can see (see reminder_context)
+CUSTOMER_CONTEXT_FIELDS = ("id", "name_of_business", "customer_code", "email")
+BILL_CONTEXT_FIELDS = (
+    "billing_company", "financial_year", "invoice_date", "due_date", "net_amount", "unpaid_amount", "payment_status",
+)
+
+# Customer fields a campaign may filter on; list values become __in lookups
+CUSTOMER_FILTERS = {
+    "customer_ids": "id",
+    "status": "status",
+    "state": "state",
+    "city": "city",
+    "country": "country",
+    "dsc": "dsc",
+    "enable_account": "enable_account",
+}
+
+
+def _compile(text, label):
+    try:
+        return Template(text)
+    except TemplateSyntaxError as e:
+        raise ValueError(f"Invalid {label} template: {e}")
+
+
+def build_campaign(data, user):
+    """
+    Validate campaign request data and return an unsaved ReminderCampaign.
+    Raises ValueError describing the problem.
+    """
+    target = data.get("target")
+    if target not in dict(ReminderCampaign.TARGET_CHOICES):
+        raise ValueError("target must be one of group, unpaid or filter")
+    subject = data.get("subject") or data.get("reminder_title")
+    content = data.get("content")
+    if not subject or not content:
+        raise ValueError("subject and content are required")
+    _compile(subject, "subject")
+    _compile(content, "content")
+
+    filters = data.get("filters") or {}
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    unknown = set(filters) - set(CUSTOMER_FILTERS) - {"overdue_only"}
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    if target == "filter" and not filters:
+        raise ValueError("filters are required for a filter campaign")
+
+    group = None
+    if target == "group":
+        group = CustomerGroups.objects.filter(id=data.get("group_id"), is_active=True).first()
+        if not group:
+            raise ValueError("Customer group not found")
+
+    try:
+        concurrency = int(data.get("concurrency") or CAMPAIGN_CONCURRENCY)
+        rate_limit = int(data.get("rate_limit") or CAMPAIGN_RATE_LIMIT)
+    except (TypeError, ValueError):
+        raise ValueError("concurrency and rate_limit must be numbers")
+    if not 1 <= concurrency <= CAMPAIGN_MAX_CONCURRENCY:
+        raise ValueError(f"concurrency must be between 1 and {CAMPAIGN_MAX_CONCURRENCY}")
+    if rate_limit < 1:
+        raise ValueError("rate_limit must be at least 1 email per minute")
+
+    return ReminderCampaign(
+        name=data.get("name") or subject,
+        target=target,
+        group=group,
+        filters=filters,
+        type_of_reminder=data.get("type_of_reminder"),
+        subject_template=subject,
+        content_template=content,
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        created_by=user,
+    )
+
+
+def campaign_customers(campaign):
+    """
+    The targeted customers, each with its open bills prefetched as
+    `unpaid_bills`, loading only the fields the templates can see.
+    """
+    customers = Customer.objects.filter(is_active=True)
+    unpaid_bills = Billing.objects.filter(
+        is_active=True, payment_status__in=UNPAID_STATUSES, unpaid_amount__gt=0
+    )
+    if campaign.filters.get("overdue_only"):
+        unpaid_bills = unpaid_bills.filter(due_date__lt=timezone.localdate())
+
+    if campaign.target == "group":
+        customers = customers.filter(
+            customer_group_mapping__group=campaign.group, customer_group_mapping__is_active=True
+        )
+    elif campaign.target == "unpaid":
+        customers = customers.filter(id__in=unpaid_bills.values("customer_id"))
+
+    for key, value in campaign.filters.items():
+        if key not in CUSTOMER_FILTERS:
+            continue
+        field = CUSTOMER_FILTERS[key]
+        if isinstance(value, list):
+            customers = customers.filter(**{f"{field}__in": value})
+        else:
+            customers = customers.filter(**{field: value})
+
+    bill_fields = ("id", "customer_id", *BILL_CONTEXT_FIELDS)
+    return customers.distinct().order_by("id").only(*CUSTOMER_CONTEXT_FIELDS).prefetch_related(
+        Prefetch(
+            "customer_bill",
+            queryset=unpaid_bills.order_by("due_date", "invoice_date").only(*bill_fields),
+            to_attr="unpaid_bills",
+        )
+    )
+
+
+def reminder_context(customer, today):
+    """
+    The values a campaign template sees for one customer: plain copies of a
+    few customer and bill fields, never model instances, so a template can
+    neither reach related records nor trigger queries.
+    """
+    details = {field: getattr(customer, field) for field in CUSTOMER_CONTEXT_FIELDS if field != "id"}
+    bills = [
+        {"invoice_no": bill.id, **{field: getattr(bill, field) for field in BILL_CONTEXT_FIELDS}}
+        for bill in customer.unpaid_bills
+    ]
+    return {
+        **details,
+        "customer": details,
+        "unpaid_bills": bills,
+        "total_unpaid": sum((bill["unpaid_amount"] for bill in bills), Decimal("0")),
+        "today": today,
+    }
+
+
+def render_reminders(campaign, customers):
+    """
+    Yield (customer, subject, content) per customer with an email address,
+    or (customer, None, None) for customers that have to be skipped.
+    """
+    subject_template = _compile(campaign.subject_template, "subject")
+    content_template = _compile(campaign.content_template, "content")
+    today = timezone.localdate()
+    for customer in customers:
+        if not customer.email:
+            yield customer, None, None
+            continue
+        # Plain text email, so no HTML escaping
+        context = Context(reminder_context(customer, today), autoescape=False)
+        yield customer, subject_template.render(context).strip(), content_template.render(context)
+
+
+def preview_campaign(campaign, sample_size=5):
+    total = skipped = 0
+    preview = []
+    customers = campaign_customers(campaign).iterator(chunk_size=CAMPAIGN_CHUNK_SIZE)
+    for customer, subject, content in render_reminders(campaign, customers):
+        total += 1
+        if subject is None:
+            skipped += 1
+        elif len(preview) < sample_size:
+            preview.append({
+                "customer_id": customer.id,
+                "customer_name": customer.name_of_business,
+                "to_email": customer.email,
+                "subject": subject,
+                "content": content,
+            })
+    return {"total_customers": total, "skipped_customers": skipped, "preview": preview}
+
+
+def queue_campaign(campaign):
+    """
+    Save the campaign and write one Reminders row plus one outbox email per
+    customer, chunk by chunk with bulk_create, in a single transaction.
+    """
+    today = timezone.localdate()
+    with transaction.atomic():
+        campaign.save()
+        total = skipped = 0
+        customers = campaign_customers(campaign).iterator(chunk_size=CAMPAIGN_CHUNK_SIZE)
+        chunk = []
+
+        def flush():
+            emails = bulk_enqueue(
+                [{"subject": subject, "body": content, "to_emails": [customer.email]} for customer, subject, content in chunk],
+                queue=campaign.queue, created_by=campaign.created_by, batch_size=CAMPAIGN_CHUNK_SIZE,
+            )
+            Reminders.objects.bulk_create([
+                Reminders(
+                    customer=customer,
+                    campaign=campaign,
+                    email=email,
+                    type_of_reminder=campaign.type_of_reminder,
+                    reminder_title=subject[:200],
+                    content=content,
+                    reminder_date=today,
+                    to_email=customer.email,
+                    created_by=campaign.created_by,
+                    updated_by=campaign.created_by,
+                )
+                for (customer, subject, content), email in zip(chunk, emails)
+            ], batch_size=CAMPAIGN_CHUNK_SIZE)
+            chunk.clear()
+
+        for customer, subject, content in render_reminders(campaign, customers):
+            total += 1
+            if subject is None:
+                skipped += 1
+                continue
+            chunk.append((customer, subject, content))
+            if len(chunk) >= CAMPAIGN_CHUNK_SIZE:
+                flush()
+        if chunk:
+            flush()
+
+        campaign.total_customers = total
+        campaign.skipped_customers = skipped
+        campaign.save(update_fields=["total_customers", "skipped_customers"])
+    return campaign
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most `per_minute` happen per minute, across threads."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            slot = max(self.next_slot, time.monotonic())
+            self.next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def campaign_progress(campaign):
+    counts = dict(
+        OutboundEmail.objects.filter(queue=campaign.queue)
+        .values("status")
+        .annotate(count=Count("id"))
+        .values_list("status", "count")
+    )
+    return {value: counts.get(value, 0) for value, _ in OutboundEmail.STATUS_CHOICES}
+
+
+def deliver_campaign(campaign, batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Send the campaign's due emails with `campaign.concurrency` workers. Each
+    worker claims batches from the campaign queue and sends every batch over
+    one SMTP connection; all workers share the campaign's rate limit. Emails
+    that fail are retried with backoff on a later run.
+    """
+    ReminderCampaign.objects.filter(id=campaign.id).update(status="sending")
+    limiter = RateLimiter(campaign.rate_limit)
+
+    def worker():
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        try:
+            while True:
+                emails = claim_batch(batch_size, campaign.queue)
+                if not emails:
+                    break
+                for key, value in deliver_batch(emails, limiter.wait).items():
+                    totals[key] += value
+        finally:
+            # Threads get their own database connections
+            connections.close_all()
+        return totals
+
+    workers = max(1, min(campaign.concurrency, CAMPAIGN_MAX_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [future.result() for future in [executor.submit(worker) for _ in range(workers)]]
+
+    totals = {key: sum(result[key] for result in results) for key in ("sent", "retried", "failed")}
+    progress = campaign_progress(campaign)
+    if not progress["pending"] and not progress["sending"]:
+        ReminderCampaign.objects.filter(id=campaign.id).update(status="completed", completed_date=timezone.now())
+    return totals
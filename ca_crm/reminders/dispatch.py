@@ -0,0 +1,260 @@
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.template import Context, Template
+from django.utils import timezone
+from loguru import logger
+from mailer.models import OutboundEmail
+from mailer.outbox import bulk_enqueue
+from workflow.models import ClientWorkReminder
+from ca_crm.params import date_param
+from .models import Reminders
+
+
+# Reminders claimed (and digests queued) per transaction
+REMINDER_DISPATCH_BATCH_SIZE = getattr(settings, "REMINDER_DISPATCH_BATCH_SIZE", 200)
+# Default and longest range of the upcoming reminders list, in days
+REMINDER_UPCOMING_DAYS = getattr(settings, "REMINDER_UPCOMING_DAYS", 30)
+REMINDER_UPCOMING_MAX_DAYS = getattr(settings, "REMINDER_UPCOMING_MAX_DAYS", 366)
+
+CUSTOMER_DIGEST_BODY = """{% for reminder in reminders %}{{ reminder.reminder_title }}
+{{ reminder.content|default:"" }}
+{% if not forloop.last %}
+{% endif %}{% endfor %}"""
+
+WORK_DIGEST_BODY = """Work reminders due as of {{ today }}:
+{% for reminder in reminders %}
+- {{ reminder.reminder_date }}: {{ reminder.client.name_of_business }}{% if reminder.task %} / {{ reminder.task.task_name|default:reminder.task.work_category.name }}{% endif %}
+  {{ reminder.reminder_note|default:"" }}{% endfor %}
+"""
+
+
+@lru_cache(maxsize=None)
+def _template(body):
+    return Template(body)
+
+
+def _render(body, **context):
+    # Plain text email, so no HTML escaping
+    return _template(body).render(Context(context, autoescape=False))
+
+
+def _has_address(field):
+    # Matches what _addresses() would split out of the field: anything but commas and blanks
+    return Q(**{f"{field}__regex": r"[^\s,]"})
+
+
+# Mirrors _customer_recipients and _work_recipients, so due rows always have someone to email
+CUSTOMER_RECIPIENT = _has_address("to_email") | (
+    (Q(to_email__isnull=True) | Q(to_email="")) & _has_address("customer__email")
+)
+WORK_RECIPIENT = (Q(assigned_to__isnull=False) & _has_address("assigned_to__email")) | (
+    Q(assigned_to__isnull=True) & _has_address("created_by__email")
+)
+
+
+def _scheduled_customer_reminders(today):
+    # Reminders with an email of their own (held attachments) are not digested
+    return Reminders.objects.filter(reminder_date__lte=today, status="scheduled", email__isnull=True)
+
+
+def _open_work_reminders(today):
+    return ClientWorkReminder.objects.filter(reminder_date__lte=today, status="open", notified_at__isnull=True)
+
+
+def due_customer_reminders(today):
+    return _scheduled_customer_reminders(today).filter(CUSTOMER_RECIPIENT)
+
+
+def due_work_reminders(today):
+    return _open_work_reminders(today).filter(WORK_RECIPIENT)
+
+
+def undeliverable_reminders(today):
+    """
+    Due reminders left out of dispatch because nobody can be emailed. They
+    stay scheduled/open, unsent, until an address is added:
+    {"reminders": [id, ...], "work_reminders": [id, ...]}.
+    """
+    return {
+        "reminders": list(
+            _scheduled_customer_reminders(today).exclude(CUSTOMER_RECIPIENT).order_by("id").values_list("id", flat=True)
+        ),
+        "work_reminders": list(
+            _open_work_reminders(today).exclude(WORK_RECIPIENT).order_by("id").values_list("id", flat=True)
+        ),
+    }
+
+
+def _claim(due, batch_size, **marks):
+    """
+    Mark up to `batch_size` due rows with a fresh dispatch token (plus
+    `marks`) in one conditional UPDATE and return the token, or None when
+    nothing is due. Rows another run claimed first no longer match `due`.
+    """
+    ids = list(due.order_by("reminder_date", "id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return None
+    token = uuid.uuid4().hex
+    due.filter(id__in=ids).update(dispatch_token=token, **marks)
+    return token
+
+
+def _digests(reminders, recipients):
+    """Group reminders per recipient address, keeping their order: {address: [reminder, ...]}."""
+    grouped = defaultdict(list)
+    for reminder in reminders:
+        for address in recipients(reminder):
+            grouped[address.lower()].append(reminder)
+    return grouped
+
+
+def _addresses(value):
+    return [address.strip() for address in (value or "").split(",") if address.strip()]
+
+
+def _customer_recipients(reminder):
+    return _addresses(reminder.to_email or reminder.customer.email)
+
+
+def _work_recipients(reminder):
+    return _addresses((reminder.assigned_to or reminder.created_by).email)
+
+
+def dispatch_customer_reminders(today, batch_size=REMINDER_DISPATCH_BATCH_SIZE):
+    """
+    Claim a batch of due scheduled customer reminders, mark them sent and
+    queue one digest email per recipient address, all in one transaction.
+    Returns (reminders, emails) counts.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        token = _claim(due_customer_reminders(today), batch_size, status="sent", sent_at=now, updated_date=now)
+        if not token:
+            return 0, 0
+        reminders = list(
+            Reminders.objects.filter(dispatch_token=token).select_related("customer", "created_by").order_by("reminder_date", "id")
+        )
+        grouped = _digests(reminders, _customer_recipients)
+        messages = []
+        for address, group in grouped.items():
+            if len(group) == 1:
+                subject, body = group[0].reminder_title, group[0].content
+            else:
+                subject, body = f"{len(group)} reminders", _render(CUSTOMER_DIGEST_BODY, reminders=group)
+            messages.append({"subject": subject, "body": body, "to_emails": [address]})
+        emails = bulk_enqueue(messages, created_by=reminders[0].created_by)
+        # A reminder keeps the first digest it went out in
+        for email, group in zip(emails, grouped.values()):
+            for reminder in group:
+                if reminder.email is None:
+                    reminder.email = email
+        Reminders.objects.bulk_update(reminders, ["email"], batch_size=batch_size)
+    return len(reminders), len(emails)
+
+
+def dispatch_work_reminders(today, batch_size=REMINDER_DISPATCH_BATCH_SIZE):
+    """
+    Claim a batch of due open work reminders, mark them notified and queue
+    one digest email per recipient user, all in one transaction. Returns
+    (reminders, emails) counts.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        token = _claim(due_work_reminders(today), batch_size, notified_at=now, updated_date=now)
+        if not token:
+            return 0, 0
+        reminders = list(
+            ClientWorkReminder.objects.filter(dispatch_token=token)
+            .select_related("client", "task__work_category", "assigned_to", "created_by")
+            .order_by("reminder_date", "id")
+        )
+        grouped = _digests(reminders, _work_recipients)
+        emails = bulk_enqueue([
+            {
+                "subject": f"{len(group)} work reminder{'s' if len(group) > 1 else ''} due",
+                "body": _render(WORK_DIGEST_BODY, reminders=group, today=today),
+                "to_emails": [address],
+            }
+            for address, group in grouped.items()
+        ])
+    return len(reminders), len(emails)
+
+
+def settle_held_reminders():
+    """
+    Mark scheduled reminders whose own held email the outbox has delivered
+    as sent, with its send time. Returns the number of reminders updated.
+    """
+    held = Reminders.objects.filter(status="scheduled", email__status="sent")
+    return Reminders.objects.filter(id__in=held.values("id")).update(
+        status="sent",
+        sent_at=Subquery(OutboundEmail.objects.filter(id=OuterRef("email_id")).values("sent_at")[:1]),
+        updated_date=timezone.now(),
+    )
+
+
+def dispatch_due_reminders(batch_size=REMINDER_DISPATCH_BATCH_SIZE, max_batches=None, today=None):
+    """
+    Queue digests for everything due by `today` (default: the local date),
+    batch by batch until nothing is left, and settle reminders whose held
+    email went out. The emails go out with the `send_queued_emails` worker.
+    Due reminders without a recipient are logged and counted, never marked
+    sent. Returns counts.
+    """
+    today = today or timezone.localdate()
+    totals = {"reminders": 0, "work_reminders": 0, "emails": 0, "held_sent": settle_held_reminders()}
+    for key, dispatch in (("reminders", dispatch_customer_reminders), ("work_reminders", dispatch_work_reminders)):
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            reminders, emails = dispatch(today, batch_size)
+            if not reminders:
+                break
+            totals[key] += reminders
+            totals["emails"] += emails
+            batches += 1
+    undeliverable = undeliverable_reminders(today)
+    for key, ids in undeliverable.items():
+        if ids:
+            logger.warning(f"{len(ids)} due {key.replace('_', ' ')} have no recipient: {ids}")
+    totals["no_recipient"] = sum(len(ids) for ids in undeliverable.values())
+    return totals
+
+
+def upcoming_reminders(user_id, params):
+    """
+    The user's scheduled customer reminders and open work reminders between
+    the `start` (default today) and `end` dates, in date order. Each list is
+    one range scan of a (user, reminder_date) index. Raises ValueError on bad
+    parameters.
+    """
+    start = date_param(params, "start") or timezone.localdate()
+    end = date_param(params, "end") or start + timedelta(days=REMINDER_UPCOMING_DAYS)
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days + 1 > REMINDER_UPCOMING_MAX_DAYS:
+        raise ValueError(f"The range may cover at most {REMINDER_UPCOMING_MAX_DAYS} days")
+
+    reminders = Reminders.objects.filter(
+        created_by_id=user_id, reminder_date__range=(start, end), status="scheduled"
+    ).order_by("reminder_date", "id").values(
+        "id", "reminder_date", "reminder_title", "type_of_reminder", "to_email", "customer_id", "email_id",
+        customer_name=F("customer__name_of_business"),
+    )
+    work_reminders = ClientWorkReminder.objects.filter(
+        assigned_to_id=user_id, reminder_date__range=(start, end), status="open"
+    ).order_by("reminder_date", "id").values(
+        "id", "reminder_date", "reminder_note", "notified_at", "client_id", "task_id",
+        client_name=F("client__name_of_business"), task_name=F("task__task_name"),
+    )
+    return {
+        "user_id": user_id,
+        "start": start,
+        "end": end,
+        "reminders": list(reminders),
+        "work_reminders": list(work_reminders),
+    }
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from reminders.dispatch import dispatch_due_reminders, REMINDER_DISPATCH_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Queue digest emails for reminders whose reminder date has come, one per recipient."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REMINDER_DISPATCH_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for due reminders instead of exiting.")
+        parser.add_argument("--interval", type=float, default=300, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            totals = dispatch_due_reminders(options["batch_size"], options["max_batches"])
+            if any(totals.values()):
+                self.stdout.write(
+                    f"Queued {totals['emails']} digests for {totals['reminders']} reminders "
+                    f"and {totals['work_reminders']} work reminders; "
+                    f"{totals['held_sent']} reminders with held emails were sent; "
+                    f"{totals['no_recipient']} due reminders have no recipient"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
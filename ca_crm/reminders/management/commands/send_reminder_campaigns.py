@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from reminders.campaigns import deliver_campaign
+from reminders.models import ReminderCampaign
+
+
+class Command(BaseCommand):
+    help = "Deliver queued reminder campaigns with each campaign's concurrency and rate limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--campaign", type=int, default=None, help="Only deliver this campaign.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for campaigns instead of exiting.")
+        parser.add_argument("--interval", type=float, default=30, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            campaigns = ReminderCampaign.objects.filter(status__in=["queued", "sending"]).order_by("id")
+            if options["campaign"]:
+                campaigns = campaigns.filter(id=options["campaign"])
+            for campaign in campaigns:
+                totals = deliver_campaign(campaign)
+                self.stdout.write(
+                    f"Campaign {campaign.id}: sent {totals['sent']}, retrying {totals['retried']}, failed {totals['failed']}"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
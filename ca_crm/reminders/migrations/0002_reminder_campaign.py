@@ -0,0 +1,49 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0011_alter_customer_dsc'),
+        ('mailer', '0002_outbound_email_queue'),
+        ('custom_auth', '0005_alter_customuser_address'),
+        ('reminders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminders',
+            name='email',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reminders', to='mailer.outboundemail'),
+        ),
+        migrations.CreateModel(
+            name='ReminderCampaign',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('target', models.CharField(choices=[('group', 'Customer Group'), ('unpaid', 'Customers With Unpaid Bills'), ('filter', 'Customer Filter')], max_length=20)),
+                ('filters', models.JSONField(blank=True, default=dict)),
+                ('type_of_reminder', models.CharField(blank=True, max_length=100, null=True)),
+                ('subject_template', models.CharField(max_length=255)),
+                ('content_template', models.TextField()),
+                ('concurrency', models.PositiveIntegerField(default=4)),
+                ('rate_limit', models.PositiveIntegerField(default=120)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('completed', 'Completed')], default='queued', max_length=20)),
+                ('total_customers', models.PositiveIntegerField(default=0)),
+                ('skipped_customers', models.PositiveIntegerField(default=0)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('completed_date', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_campaign_created_by', to='custom_auth.customuser')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reminder_campaigns', to='clients.customergroups')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reminders',
+            name='campaign',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reminders', to='reminders.remindercampaign'),
+        ),
+    ]
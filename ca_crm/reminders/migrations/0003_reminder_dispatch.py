@@ -0,0 +1,36 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0002_reminder_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminders',
+            name='dispatch_token',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminders',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminders',
+            name='status',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('sent', 'Sent')], default='sent', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='reminders',
+            index=models.Index(fields=['reminder_date', 'status'], name='reminders_r_reminde_62aba2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminders',
+            index=models.Index(fields=['created_by', 'reminder_date'], name='reminders_r_created_23b2fa_idx'),
+        ),
+    ]
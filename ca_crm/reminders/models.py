@@ -2,9 +2,63 @@ from django.db import models
 from billing.models import Billing
 from clients.models import Customer
 from custom_auth.models import CustomUser
+from clients.models import CustomerGroups
+from mailer.models import OutboundEmail
+
+
+class ReminderCampaign(models.Model):
+    """
+    A bulk reminder run: one templated Reminders row (and outbox email) per
+    targeted customer, delivered by the `send_reminder_campaigns` command.
+    """
+    TARGET_CHOICES = [
+        ("group", "Customer Group"),
+        ("unpaid", "Customers With Unpaid Bills"),
+        ("filter", "Customer Filter"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("sending", "Sending"),
+        ("completed", "Completed"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=200)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    group = models.ForeignKey(CustomerGroups, on_delete=models.SET_NULL, null=True, blank=True, related_name="reminder_campaigns")
+    filters = models.JSONField(default=dict, blank=True)
+    type_of_reminder = models.CharField(max_length=100, blank=True, null=True)
+    subject_template = models.CharField(max_length=255)
+    content_template = models.TextField()
+    concurrency = models.PositiveIntegerField(default=4)
+    # Maximum emails per minute across all workers of the campaign
+    rate_limit = models.PositiveIntegerField(default=120)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    total_customers = models.PositiveIntegerField(default=0)
+    skipped_customers = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="reminder_campaign_created_by")
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_date = models.DateTimeField(auto_now=True)
+    completed_date = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def queue(self):
+        return f"reminder-campaign-{self.id}"
+
+    def __str__(self):
+        return self.name
 
 
 class Reminders(models.Model):
+    """
+    A reminder emailed to a customer: at creation, or on `reminder_date`
+    by the `send_due_reminders` command while it is "scheduled".
+    """
+    STATUS_CHOICES = [
+        ("scheduled", "Scheduled"),
+        ("sent", "Sent"),
+    ]
+
     id = models.AutoField(primary_key=True)
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="customer_reminder")
     billing = models.ForeignKey(Billing, on_delete=models.SET_NULL, null=True, blank=True, related_name="billing_reminder")
@@ -13,11 +67,24 @@ class Reminders(models.Model):
     content = models.TextField(null=True, blank=True)
     reminder_date = models.DateField(null=True, blank=True)
     to_email = models.CharField(max_length=200, null=True, blank=True)
+    campaign = models.ForeignKey(ReminderCampaign, on_delete=models.SET_NULL, null=True, blank=True, related_name="reminders")
+    email = models.ForeignKey(OutboundEmail, on_delete=models.SET_NULL, null=True, blank=True, related_name="reminders")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="sent")
+    # Set by the dispatch run that claimed the reminder
+    dispatch_token = models.CharField(max_length=32, null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="reminder_created_by")
     created_date = models.DateTimeField(auto_now_add=True)
     updated_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name="reminder_updated_by")
     updated_date = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        indexes = [
+            # Due scans of reminders.dispatch and per user upcoming lists
+            models.Index(fields=["reminder_date", "status"]),
+            models.Index(fields=["created_by", "reminder_date"]),
+        ]
+
     def __str__(self):
         return f"{self.customer} - {self.reminder_title}"
 
@@ -1,3 +1,122 @@
+from datetime import timedelta
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ca_crm.testing import assert_query_budget, auth_headers
+from billing.models import Billing
+from clients.models import Customer
+from custom_auth.models import CustomUser
+from workflow.models import ClientWorkReminder
+from .campaigns import build_campaign, campaign_progress, queue_campaign
+from .dispatch import dispatch_due_reminders, undeliverable_reminders
+from .models import Reminders
 
-# Create your tests here.
+
+class ReminderTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username="manager", email="manager@example.com", password="x")
+        self.headers = auth_headers(self.user)
+        self.today = timezone.localdate()
+        self.customers = [
+            Customer.objects.create(
+                name_of_business=f"Customer {index}", customer_code=f"C{index}",
+                email=f"customer{index}@example.com", created_by=self.user,
+            )
+            for index in range(3)
+        ]
+        for offset, customer in enumerate(self.customers):
+            Reminders.objects.create(
+                customer=customer, reminder_title=f"Reminder {offset}", content="Please pay",
+                reminder_date=self.today + timedelta(days=offset), status="scheduled", created_by=self.user,
+            )
+            ClientWorkReminder.objects.create(
+                client=customer, reminder_note="Follow up", reminder_date=self.today + timedelta(days=offset),
+                assigned_to=self.user, created_by=self.user, updated_by=self.user,
+            )
+
+
+class DispatchTests(ReminderTestCase):
+    def test_due_reminders_go_out_once_as_digests(self):
+        totals = dispatch_due_reminders(today=self.today + timedelta(days=1))
+        self.assertEqual(totals["reminders"], 2)
+        self.assertEqual(totals["work_reminders"], 2)
+        # One email per customer address plus one digest for the assignee
+        self.assertEqual(totals["emails"], 3)
+        self.assertEqual(dispatch_due_reminders(today=self.today + timedelta(days=1))["emails"], 0)
+        self.assertEqual(Reminders.objects.filter(status="scheduled").count(), 1)
+
+    def test_reminders_without_recipient_are_never_marked_sent(self):
+        self.customers[0].email = ""
+        self.customers[0].save()
+        ClientWorkReminder.objects.filter(client=self.customers[0]).update(assigned_to=None)
+        self.user.email = " , "
+        self.user.save()
+        totals = dispatch_due_reminders(today=self.today)
+        self.assertEqual(totals["reminders"], 0)
+        self.assertEqual(totals["work_reminders"], 0)
+        self.assertEqual(totals["no_recipient"], 2)
+        self.assertEqual(Reminders.objects.get(customer=self.customers[0]).status, "scheduled")
+        self.assertIsNone(ClientWorkReminder.objects.get(client=self.customers[0]).notified_at)
+        undeliverable = undeliverable_reminders(self.today)
+        self.assertEqual(len(undeliverable["reminders"]), 1)
+        self.assertEqual(len(undeliverable["work_reminders"]), 1)
+
+    def test_to_email_overrides_a_blank_customer_email(self):
+        self.customers[0].email = None
+        self.customers[0].save()
+        Reminders.objects.filter(customer=self.customers[0]).update(to_email="accounts@example.com")
+        totals = dispatch_due_reminders(today=self.today)
+        self.assertEqual(totals["reminders"], 1)
+        self.assertEqual(totals["no_recipient"], 0)
+
+    def test_work_reminders_default_to_open(self):
+        self.assertEqual(set(ClientWorkReminder.objects.values_list("status", flat=True)), {"open"})
+
+
+class ReminderQueryBudgetTests(ReminderTestCase):
+    def test_reminder_list(self):
+        response = assert_query_budget(self.client, "get", reverse("reminder-get"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_upcoming_reminders(self):
+        response = assert_query_budget(self.client, "get", reverse("reminder-upcoming"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["reminders"]), 3)
+        self.assertEqual(len(response.json()["work_reminders"]), 3)
+
+
+class CampaignTests(ReminderTestCase):
+    def setUp(self):
+        super().setUp()
+        for customer, unpaid in ((self.customers[0], "1180.00"), (self.customers[1], "500.00")):
+            Billing.objects.create(
+                billing_company="Firm", bank="Bank", financial_year="2026-27", customer=customer,
+                billing_description="Services", fees=0, invoice_date=self.today, due_date=self.today,
+                requested_by="Partner", sub_total=0, discount=0, discount_amount=0, gst=18, gst_amount=0,
+                total=0, round_off=0, net_amount=unpaid, unpaid_amount=unpaid,
+            )
+        self.customers[1].email = ""
+        self.customers[1].save()
+
+    def campaign(self, **data):
+        return build_campaign({
+            "target": "unpaid", "subject": "Dues for {{ name_of_business }}",
+            "content": "Total due: {{ total_unpaid }}", **data,
+        }, self.user)
+
+    def test_invalid_campaigns_are_refused(self):
+        for data in ({"target": "everyone"}, {"content": "{% if %}"}, {"filters": {"balance": 1}}, {"concurrency": 99}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                self.campaign(**data)
+
+    def test_unpaid_campaign_queues_one_email_per_reachable_customer(self):
+        campaign = queue_campaign(self.campaign())
+        self.assertEqual((campaign.total_customers, campaign.skipped_customers), (2, 1))
+        reminder = Reminders.objects.get(campaign=campaign)
+        self.assertEqual(reminder.customer, self.customers[0])
+        self.assertEqual(reminder.reminder_title, "Dues for Customer 0")
+        self.assertEqual(reminder.email.queue, campaign.queue)
+        self.assertEqual(reminder.email.body, "Total due: 1180.00")
+        self.assertEqual(campaign_progress(campaign)["pending"], 1)
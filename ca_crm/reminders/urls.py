@@ -3,11 +3,17 @@ from reminders.views import (
     CustomerReminderListView,
     ReminderListView,
     ReminderRetrieveView,
-    ReminderCreateView
+    ReminderCreateView,
+    ReminderCampaignCreateView,
+    ReminderCampaignRetrieveView,
+    UpcomingReminderListView
 )
 
 urlpatterns = [
     path('reminder/create/', ReminderCreateView.as_view(), name='reminder-create'),
     path('reminder/', ReminderListView.as_view(), name='reminder-get'),
     path('reminder/fetch/<int:id>/', ReminderRetrieveView.as_view(), name='reminder-retrieve'),
+    path('reminder/upcoming/', UpcomingReminderListView.as_view(), name='reminder-upcoming'),
+    path('campaign/create/', ReminderCampaignCreateView.as_view(), name='reminder-campaign-create'),
+    path('campaign/fetch/<int:campaign_id>/', ReminderCampaignRetrieveView.as_view(), name='reminder-campaign-retrieve'),
     ]
\ No newline at end of file
@@ -1,13 +1,20 @@
+from datetime import datetime, time
 from django.shortcuts import render
+from django.utils import timezone
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
 from django.shortcuts import get_object_or_404
-from reminders.models import Reminders
+from reminders.models import Reminders, ReminderCampaign
+from reminders.campaigns import build_campaign, preview_campaign, queue_campaign, campaign_progress
+from reminders.dispatch import upcoming_reminders
 from workflow.views import ModifiedApiview
 from clients.models import Customer
 from billing.models import Billing
-from ca_crm.email_service import send_email
+from ca_crm.email_service import enqueue_email
+from ca_crm.pagination import paginate_keyset
+from ca_crm.importer import is_dry_run
+from ca_crm.params import date_param
 
 class ReminderCreateView(ModifiedApiview):
     def post(self, request):
@@ -51,33 +58,45 @@ class ReminderCreateView(ModifiedApiview):
             to_email_string = ', '.join(to_email)
             
 
-            with transaction.atomic():
-                if include_invoice:
-                    email = send_email(subject=reminder_title, body=content, to_emails=to_email, attachment=attachments)
-                else:
-                    email = send_email(subject=reminder_title, body=content, to_emails=to_email)
-
+            reminder_date = date_param(data, "reminder_date")
+            scheduled = reminder_date is not None and reminder_date > timezone.localdate()
+            attachment = attachments if include_invoice else None
 
-                if not email:
-                    return Response(
-                        {"Message":"Error while sending Email"}, status=status.HTTP_400_BAD_REQUEST
+            # Reminders due later go out with the send_due_reminders digests. One
+            # with an invoice attached keeps its own email, held until the date.
+            with transaction.atomic():
+                email = None
+                send_at = timezone.make_aware(datetime.combine(reminder_date, time.min)) if scheduled else timezone.now()
+                if not scheduled or attachment:
+                    email = enqueue_email(
+                        subject=reminder_title, body=content, to_emails=to_email,
+                        attachment=attachment, created_by=user, send_at=send_at,
                     )
-                
+
                 reminder = Reminders.objects.create(
                     customer=customer,
                     billing=billing,
                     type_of_reminder=data.get("type_of_reminder"),
                     reminder_title=reminder_title,
                     content=content,
-                    reminder_date=data.get("reminder_date"),
+                    reminder_date=reminder_date,
                     to_email=to_email_string,
+                    email=email,
+                    # A held email marks its reminder sent once it goes out (settle_held_reminders)
+                    status="scheduled" if scheduled else "sent",
+                    sent_at=None if scheduled else send_at,
                     created_by=user,
                     updated_by=user
                 )
 
 
             return Response(
-                {"message": "Reminder created successfully", "id": reminder.id}, 
+                {
+                    "message": "Reminder created successfully",
+                    "id": reminder.id,
+                    "status": reminder.status,
+                    "email_id": email.id if email else None,
+                },
                 status=status.HTTP_201_CREATED
             )
         except Customer.DoesNotExist:
@@ -106,6 +125,8 @@ class ReminderRetrieveView(ModifiedApiview):
                 "content": reminder.content,
                 "reminder_date": reminder.reminder_date,
                 "to_email": reminder.to_email,
+                "status": reminder.status,
+                "sent_at": reminder.sent_at,
                 "created_by": reminder.created_by.id,
                 "created_by_user": reminder.created_by.username,
                 "created_date": reminder.created_date,
@@ -147,7 +168,8 @@ class ReminderListView(ModifiedApiview):
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             
-            reminders = Reminders.objects.all()
+            reminders = Reminders.objects.select_related("customer", "created_by", "updated_by")
+            page = paginate_keyset(request, reminders)
             data = [{
                 "id": reminder.id,
                 "customer_id": reminder.customer.id,
@@ -158,15 +180,17 @@ class ReminderListView(ModifiedApiview):
                 "content": reminder.content,
                 "to_email": reminder.to_email,
                 "reminder_date": reminder.reminder_date,
+                "status": reminder.status,
+                "sent_at": reminder.sent_at,
                 "created_by": reminder.created_by.id,
                 "created_by_user": reminder.created_by.username,
                 "created_date": reminder.created_date,
                 "updated_by": reminder.updated_by.id if reminder.updated_by else None,
                 "updated_by_user": reminder.updated_by.username if reminder.updated_by else None,
                 "updated_date": reminder.updated_date
-            } for reminder in reminders]
-            
-            return Response(data, status=status.HTTP_200_OK)
+            } for reminder in page.items]
+
+            return Response(data, status=status.HTTP_200_OK, headers=page.headers())
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -197,4 +221,98 @@ class CustomerReminderListView(ModifiedApiview):
             return Response({"error": "Customer not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
+
+
+class UpcomingReminderListView(ModifiedApiview):
+    def get(self, request):
+        """
+        A user's (default: your own) scheduled customer reminders and open
+        work reminders due between start (default today) and end.
+        """
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            user_id = request.query_params.get("user_id") or user.id
+            if not str(user_id).isdigit():
+                return Response({"error": "user_id must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                data = upcoming_reminders(int(user_id), request.query_params)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ReminderCampaignCreateView(ModifiedApiview):
+    def post(self, request):
+        """
+        Queue a bulk reminder for a customer group, customers with unpaid bills
+        or a customer filter. Subject and content are templates rendered per
+        customer against plain values: name_of_business, customer_code, email
+        (also as customer.*), unpaid_bills (invoice_no, billing_company,
+        financial_year, invoice_date, due_date, net_amount, unpaid_amount,
+        payment_status), total_unpaid and today. With dry_run the
+        rendered reminders are previewed and nothing is queued.
+        """
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            try:
+                campaign = build_campaign(request.data, user)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            if is_dry_run(request):
+                return Response({"dry_run": True, **preview_campaign(campaign)}, status=status.HTTP_200_OK)
+
+            campaign = queue_campaign(campaign)
+            return Response(
+                {
+                    "message": "Reminder campaign queued successfully",
+                    "id": campaign.id,
+                    "total_customers": campaign.total_customers,
+                    "skipped_customers": campaign.skipped_customers,
+                },
+                status=status.HTTP_201_CREATED
+            )
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ReminderCampaignRetrieveView(ModifiedApiview):
+    def get(self, request, campaign_id):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            campaign = ReminderCampaign.objects.select_related("group", "created_by").get(id=campaign_id)
+            data = {
+                "id": campaign.id,
+                "name": campaign.name,
+                "target": campaign.target,
+                "group_id": campaign.group.id if campaign.group else None,
+                "group_name": campaign.group.name if campaign.group else None,
+                "filters": campaign.filters,
+                "type_of_reminder": campaign.type_of_reminder,
+                "concurrency": campaign.concurrency,
+                "rate_limit": campaign.rate_limit,
+                "status": campaign.status,
+                "total_customers": campaign.total_customers,
+                "skipped_customers": campaign.skipped_customers,
+                "delivery": campaign_progress(campaign),
+                "created_by": campaign.created_by.id,
+                "created_by_user": campaign.created_by.username,
+                "created_date": campaign.created_date,
+                "completed_date": campaign.completed_date,
+            }
+            return Response(data, status=status.HTTP_200_OK)
+        except ReminderCampaign.DoesNotExist:
+            return Response({"error": "Reminder campaign not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
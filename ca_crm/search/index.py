@@ -0,0 +1,248 @@
+import operator
+import re
+from functools import lru_cache, reduce
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from clients.models import Customer, CustomerContacts
+from dsc.models import CustomerDcs
+from importexport.models import Inward, Outward
+from workflow.models import ClientWorkCategoryAssignment
+from .models import SearchEntry
+
+
+# "fts5" or "table"; unset uses FTS5 whenever its table exists (SQLite)
+SEARCH_BACKEND = getattr(settings, "SEARCH_BACKEND", None)
+SEARCH_DEFAULT_RESULTS = getattr(settings, "SEARCH_DEFAULT_RESULTS", 20)
+SEARCH_MAX_RESULTS = getattr(settings, "SEARCH_MAX_RESULTS", 100)
+SEARCH_MAX_TERMS = 8
+REBUILD_CHUNK_SIZE = 1000
+FTS_TABLE = "search_fts"
+# bm25 weights of the title and body columns
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+SNIPPET_LENGTH = 160
+_WORD = re.compile(r"\w+")
+
+
+class SearchSource:
+    """A model whose rows are indexed as `kind` documents."""
+
+    def __init__(self, kind, model, title_fields, body_fields, customer_field=None, active_field=None, label=None):
+        self.kind = kind
+        self.model = model
+        self.title_fields = title_fields
+        self.body_fields = body_fields
+        self.customer_field = customer_field
+        self.active_field = active_field
+        self.label = label or kind.title()
+
+    def _text(self, obj, fields):
+        return " ".join(str(value) for value in (getattr(obj, field) for field in fields) if value)
+
+    def indexable(self, obj):
+        return not self.active_field or getattr(obj, self.active_field)
+
+    def document(self, obj):
+        return {
+            "title": (self._text(obj, self.title_fields) or f"{self.label} {obj.pk}")[:255],
+            "body": self._text(obj, self.body_fields),
+            "customer_id": getattr(obj, self.customer_field) if self.customer_field else None,
+        }
+
+    def queryset(self):
+        rows = self.model.objects.all()
+        if self.active_field:
+            rows = rows.filter(**{self.active_field: True})
+        fields = [self.model._meta.pk.attname, *self.title_fields, *self.body_fields]
+        if self.customer_field:
+            fields.append(self.customer_field)
+        return rows.only(*fields).order_by("pk")
+
+
+SOURCES = [
+    SearchSource("customer", Customer, ["name_of_business"],
+                 ["customer_code", "pan_no", "business_pan_no", "gst_no"], "id", "is_active"),
+    SearchSource("contact", CustomerContacts, ["first_name", "last_name"],
+                 ["email", "phone", "designation"], "customer_id", "is_active"),
+    SearchSource("task", ClientWorkCategoryAssignment, ["task_name"],
+                 ["instructions"], "customer_id", "is_active"),
+    SearchSource("inward", Inward, ["inward_title"], ["description"], "customer_id"),
+    SearchSource("outward", Outward, ["outward_title"], ["about_outward"], "customer_id"),
+    SearchSource("dsc", CustomerDcs, ["name"], ["pan_no", "related_company"], "customer_id", label="DSC"),
+]
+SOURCES_BY_KIND = {source.kind: source for source in SOURCES}
+SOURCES_BY_MODEL = {source.model: source for source in SOURCES}
+
+
+def index_object(obj):
+    """Add, refresh or (for inactive rows) drop the entry of a saved record."""
+    source = SOURCES_BY_MODEL[type(obj)]
+    if not source.indexable(obj):
+        remove_object(obj)
+        return
+    document = source.document(obj)
+    entry = SearchEntry.objects.filter(kind=source.kind, object_id=obj.pk).first()
+    if entry is None:
+        SearchEntry.objects.create(kind=source.kind, object_id=obj.pk, **document)
+    elif any(getattr(entry, field) != value for field, value in document.items()):
+        SearchEntry.objects.filter(id=entry.id).update(**document)
+
+
+def index_objects(objs):
+    """
+    index_object() for many records at once, e.g. after a bulk_create that
+    sent no post_save: one read of the existing entries per kind, then bulk
+    inserts, updates and deletes. Rows without a primary key are skipped.
+    """
+    by_source = {}
+    for obj in objs:
+        if obj.pk is not None:
+            by_source.setdefault(SOURCES_BY_MODEL[type(obj)], []).append(obj)
+    with transaction.atomic():
+        for source, rows in by_source.items():
+            existing = {
+                entry.object_id: entry
+                for entry in SearchEntry.objects.filter(kind=source.kind, object_id__in=[obj.pk for obj in rows])
+            }
+            created, updated, removed = [], [], []
+            for obj in rows:
+                entry = existing.get(obj.pk)
+                if not source.indexable(obj):
+                    if entry:
+                        removed.append(entry.id)
+                    continue
+                document = source.document(obj)
+                if entry is None:
+                    created.append(SearchEntry(kind=source.kind, object_id=obj.pk, **document))
+                elif any(getattr(entry, field) != value for field, value in document.items()):
+                    for field, value in document.items():
+                        setattr(entry, field, value)
+                    updated.append(entry)
+            SearchEntry.objects.bulk_create(created, batch_size=REBUILD_CHUNK_SIZE)
+            SearchEntry.objects.bulk_update(updated, ["title", "body", "customer_id"], batch_size=REBUILD_CHUNK_SIZE)
+            SearchEntry.objects.filter(id__in=removed).delete()
+
+
+def remove_object(obj):
+    SearchEntry.objects.filter(kind=SOURCES_BY_MODEL[type(obj)].kind, object_id=obj.pk).delete()
+
+
+def rebuild_index(kinds=None):
+    """Re-index every record of `kinds` (default: all) from scratch; returns counts per kind."""
+    sources = [SOURCES_BY_KIND[kind] for kind in kinds] if kinds else SOURCES
+    counts = {}
+    with transaction.atomic():
+        for source in sources:
+            SearchEntry.objects.filter(kind=source.kind).delete()
+            chunk = []
+            counts[source.kind] = 0
+            for obj in source.queryset().iterator(chunk_size=REBUILD_CHUNK_SIZE):
+                chunk.append(SearchEntry(kind=source.kind, object_id=obj.pk, **source.document(obj)))
+                if len(chunk) == REBUILD_CHUNK_SIZE:
+                    counts[source.kind] += len(SearchEntry.objects.bulk_create(chunk))
+                    chunk = []
+            counts[source.kind] += len(SearchEntry.objects.bulk_create(chunk))
+    if get_backend().name == "fts5":
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+class Fts5Backend:
+    """Ranked prefix search of the SQLite FTS5 table: bm25 with titles weighted up."""
+    name = "fts5"
+
+    def search(self, terms, kinds, customer_id, limit):
+        # Every term must match as a word prefix
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT e.kind, e.object_id, e.title, e.customer_id, "
+            f"snippet({FTS_TABLE}, 1, '[', ']', '...', 12), bm25({FTS_TABLE}, %s, %s) AS score "
+            f"FROM {FTS_TABLE} JOIN search_searchentry e ON e.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s"
+        )
+        params = [TITLE_WEIGHT, BODY_WEIGHT, match]
+        if kinds:
+            sql += f" AND e.kind IN ({', '.join(['%s'] * len(kinds))})"
+            params += kinds
+        if customer_id is not None:
+            sql += " AND e.customer_id = %s"
+            params.append(customer_id)
+        sql += " ORDER BY score, e.id LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # bm25 is lower for better matches
+        return [
+            {"kind": kind, "id": object_id, "title": title, "customer_id": customer, "snippet": snippet, "score": round(-score, 4)}
+            for kind, object_id, title, customer, snippet, score in rows
+        ]
+
+
+class TableBackend:
+    """
+    Portable fallback over SearchEntry: every term must appear in the title
+    or body, ranked by how many terms start or appear in the title.
+    """
+    name = "table"
+
+    def search(self, terms, kinds, customer_id, limit):
+        entries = SearchEntry.objects.all()
+        for term in terms:
+            entries = entries.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+        if customer_id is not None:
+            entries = entries.filter(customer_id=customer_id)
+        score = reduce(operator.add, [
+            Case(
+                When(title__istartswith=term, then=Value(3)),
+                When(title__icontains=term, then=Value(2)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+            for term in terms
+        ])
+        rows = entries.annotate(score=score).order_by("-score", "title", "id").values(
+            "kind", "object_id", "title", "customer_id", "body", "score"
+        )[:limit]
+        return [
+            {
+                "kind": row["kind"], "id": row["object_id"], "title": row["title"], "customer_id": row["customer_id"],
+                "snippet": row["body"][:SNIPPET_LENGTH], "score": row["score"],
+            }
+            for row in rows
+        ]
+
+
+BACKENDS = {backend.name: backend for backend in (Fts5Backend(), TableBackend())}
+
+
+@lru_cache(maxsize=None)
+def _fts_available():
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_backend():
+    name = SEARCH_BACKEND or ("fts5" if _fts_available() else "table")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown search backend {name}")
+    return BACKENDS[name]
+
+
+def search(query, kinds=None, customer_id=None, limit=SEARCH_DEFAULT_RESULTS):
+    """
+    Records whose words start with every word of `query`, best first, as
+    dicts of kind, id, title, customer_id, snippet and score. Raises
+    ValueError on bad parameters.
+    """
+    terms = _WORD.findall(query or "")[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    kinds = list(kinds or [])
+    unknown = set(kinds) - set(SOURCES_BY_KIND)
+    if unknown:
+        raise ValueError(f"kinds must be among {', '.join(SOURCES_BY_KIND)}")
+    return get_backend().search(terms, kinds, customer_id, min(limit, SEARCH_MAX_RESULTS))
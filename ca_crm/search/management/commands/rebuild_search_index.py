@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from search.index import rebuild_index, SOURCES_BY_KIND
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search index from the indexed tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", action="append", dest="kinds", choices=list(SOURCES_BY_KIND),
+                            help="Only rebuild this kind of record (repeatable).")
+
+    def handle(self, *args, **options):
+        try:
+            counts = rebuild_index(options["kinds"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        for kind, count in counts.items():
+            self.stdout.write(f"Indexed {count} {kind} records")
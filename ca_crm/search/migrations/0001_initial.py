@@ -0,0 +1,67 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:55
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+# External content FTS5 table over search_searchentry, kept in step by triggers
+FTS_STATEMENTS = [
+    "CREATE VIRTUAL TABLE search_fts USING fts5("
+    "title, body, content='search_searchentry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER search_entry_ai AFTER INSERT ON search_searchentry BEGIN "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER search_entry_ad AFTER DELETE ON search_searchentry BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER search_entry_au AFTER UPDATE ON search_searchentry BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+
+
+def create_fts(apps, schema_editor):
+    # Other databases (or SQLite built without FTS5) use the table backend
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(FTS_STATEMENTS[0])
+    except OperationalError:
+        return
+    for statement in FTS_STATEMENTS[1:]:
+        schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ("search_entry_ai", "search_entry_ad", "search_entry_au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    schema_editor.execute("DROP TABLE IF EXISTS search_fts")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+                ('customer_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='search_entry_unique_object'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    The searchable text of one indexed record, kept current by search.signals.
+    On SQLite the `search_fts` FTS5 table mirrors these rows through triggers.
+    """
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default="")
+    customer_id = models.PositiveIntegerField(null=True, blank=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="search_entry_unique_object"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from clients.models import Customer, CustomerContacts
+from dsc.models import CustomerDcs
+from importexport.models import Inward, Outward
+from workflow.models import ClientWorkCategoryAssignment
+from .index import index_object, remove_object
+
+
+# Bulk writes (bulk_create, update()) skip these and call index_objects() themselves
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=CustomerContacts)
+@receiver(post_save, sender=ClientWorkCategoryAssignment)
+@receiver(post_save, sender=Inward)
+@receiver(post_save, sender=Outward)
+@receiver(post_save, sender=CustomerDcs)
+def update_search_entry(sender, instance, **kwargs):
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=CustomerContacts)
+@receiver(post_delete, sender=ClientWorkCategoryAssignment)
+@receiver(post_delete, sender=Inward)
+@receiver(post_delete, sender=Outward)
+@receiver(post_delete, sender=CustomerDcs)
+def remove_search_entry(sender, instance, **kwargs):
+    remove_object(instance)
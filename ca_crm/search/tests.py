@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from ca_crm.testing import assert_query_budget, auth_headers
+from clients.models import Customer
+from custom_auth.models import CustomUser
+from workflow.instantiation import instantiate_assignments
+from workflow.models import Department, WorkCategory
+from .index import search
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username="manager", email="manager@example.com", password="x")
+        self.customer = Customer.objects.create(name_of_business="Acme Traders", customer_code="ACME", created_by=self.user)
+        department = Department.objects.create(name="Tax", created_by=self.user)
+        category = WorkCategory.objects.create(name="GST return", department=department, created_by=self.user)
+        instantiate_assignments(category, [{"customer_id": self.customer.id, "task_name": "Quarterly filing"}])
+
+    def test_saved_and_bulk_created_records_are_found(self):
+        self.assertEqual([(hit["kind"], hit["title"]) for hit in search("acme")], [("customer", "Acme Traders")])
+        self.assertEqual([(hit["kind"], hit["title"]) for hit in search("quart fil")], [("task", "Quarterly filing")])
+
+    def test_search_query_budget(self):
+        response = assert_query_budget(self.client, "get", reverse("global-search"), data={"q": "acme"}, **auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
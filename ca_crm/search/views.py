@@ -0,0 +1,32 @@
+from rest_framework.response import Response
+from rest_framework import status
+from workflow.views import ModifiedApiview
+from .index import search, SEARCH_DEFAULT_RESULTS
+
+
+class GlobalSearchView(ModifiedApiview):
+    def get(self, request):
+        """
+        Ranked prefix search across customers, contacts, tasks, inward,
+        outward and DSC records: ?q=...&kinds=customer,task&customer_id=&limit=
+        """
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            params = request.query_params
+            kinds = [kind.strip() for kind in params.get("kinds", "").split(",") if kind.strip()]
+            customer_id = params.get("customer_id")
+            limit = params.get("limit") or str(SEARCH_DEFAULT_RESULTS)
+            if customer_id and not customer_id.isdigit():
+                return Response({"error": "customer_id must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+            if not limit.isdigit() or int(limit) < 1:
+                return Response({"error": "limit must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                results = search(params.get("q"), kinds, int(customer_id) if customer_id else None, int(limit))
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"query": params.get("q"), "results": results}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
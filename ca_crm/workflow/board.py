@@ -0,0 +1,144 @@
+import hashlib
+import json
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, FloatField, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ca_crm.params import date_param
+from .models import ClientWorkCategoryAssignment
+from .rollups import CLOSED_PROGRESS
+
+
+# Seconds a board summary is served from the cache
+TASK_BOARD_SUMMARY_TTL = getattr(settings, "TASK_BOARD_SUMMARY_TTL", 30)
+BOARD_CACHE_PREFIX = "workflow:board-summary"
+
+# Query parameter -> assignment lookup
+BOARD_FILTERS = {
+    "department_id": "work_category__department_id",
+    "work_category_id": "work_category_id",
+    "customer_id": "customer_id",
+    "assigned_to": "assigned_to_id",
+    "review_by": "review_by_id",
+}
+# Response key -> (grouped column, column carrying its label)
+BOARD_DIMENSIONS = {
+    "progress": ("progress", None),
+    "priority": ("priority", None),
+    "assigned_to": ("assigned_to_id", "assigned_to__username"),
+    "review_by": ("review_by_id", "review_by__username"),
+    "department": ("work_category__department_id", "work_category__department__name"),
+    "due": ("due_bucket", None),
+}
+DUE_BUCKETS = {
+    "overdue": "Overdue",
+    "this_week": "This week",
+    "later": "Later",
+    "no_due_date": "No due date",
+    "closed": "Closed",
+}
+CHOICE_LABELS = {
+    "progress": dict(ClientWorkCategoryAssignment.progress_choices),
+    "priority": dict(ClientWorkCategoryAssignment.priority_choices),
+    "due": DUE_BUCKETS,
+}
+
+
+def _cache_key(params, today):
+    raw = json.dumps({"params": params, "today": str(today)}, sort_keys=True)
+    return f"{BOARD_CACHE_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def _board_params(params):
+    """The filter values of a request, validated and in a canonical form for the cache key."""
+    cleaned = {}
+    for name in ("start_date", "end_date"):
+        value = date_param(params, name)
+        if value:
+            cleaned[name] = str(value)
+    for name in BOARD_FILTERS:
+        value = params.get(name)
+        if value not in (None, ""):
+            if not str(value).isdigit():
+                raise ValueError(f"{name} must be an id")
+            cleaned[name] = int(value)
+    return cleaned
+
+
+def _due_bucket(today):
+    week_end = today + timedelta(days=6 - today.weekday())
+    return Case(
+        When(progress__in=CLOSED_PROGRESS, then=Value("closed")),
+        When(completion_date__isnull=True, then=Value("no_due_date")),
+        When(completion_date__lt=today, then=Value("overdue")),
+        When(completion_date__lte=week_end, then=Value("this_week")),
+        default=Value("later"),
+        output_field=CharField(),
+    )
+
+
+def compute_board_summary(params, today):
+    """
+    Counts and allocated hours of active assignments per progress, priority,
+    assignee, reviewer, department and due bucket, from a single GROUP BY
+    over every dimension at once that is then folded per dimension.
+    """
+    assignments = ClientWorkCategoryAssignment.objects.filter(is_active=True)
+    if "start_date" in params:
+        assignments = assignments.filter(start_date__gte=params["start_date"])
+    if "end_date" in params:
+        assignments = assignments.filter(start_date__lte=params["end_date"])
+    for name, lookup in BOARD_FILTERS.items():
+        if name in params:
+            assignments = assignments.filter(**{lookup: params[name]})
+
+    columns = [column for pair in BOARD_DIMENSIONS.values() for column in pair if column]
+    groups = (
+        assignments.annotate(due_bucket=_due_bucket(today))
+        .values(*columns)
+        .annotate(count=Count("assignment_id"), hours=Coalesce(Sum("allocated_hours"), Value(0.0), output_field=FloatField()))
+        .order_by()
+    )
+
+    totals = {"count": 0, "allocated_hours": 0.0}
+    summary = {key: defaultdict(lambda: {"label": None, "count": 0, "allocated_hours": 0.0}) for key in BOARD_DIMENSIONS}
+    for group in groups:
+        totals["count"] += group["count"]
+        totals["allocated_hours"] += group["hours"]
+        for key, (column, label_column) in BOARD_DIMENSIONS.items():
+            value = group[column]
+            bucket = summary[key][value]
+            if label_column:
+                bucket["label"] = group[label_column]
+            else:
+                bucket["label"] = CHOICE_LABELS.get(key, {}).get(value, value)
+            bucket["count"] += group["count"]
+            bucket["allocated_hours"] += group["hours"]
+
+    result = {"total": totals, "filters": params, "as_of": str(today)}
+    for key, buckets in summary.items():
+        if key == "due":
+            result[key] = [{"value": value, **buckets[value], "label": label} for value, label in DUE_BUCKETS.items()]
+            continue
+        result[key] = [{"value": value, **bucket} for value, bucket in buckets.items()]
+        result[key].sort(key=lambda row: (row["value"] is None, str(row["value"])))
+    return result
+
+
+def board_summary(params):
+    """
+    The task board summary for a request's query parameters, cached for
+    TASK_BOARD_SUMMARY_TTL seconds per filter set. Raises ValueError on
+    bad filters.
+    """
+    cleaned = _board_params(params)
+    today = timezone.localdate()
+    key = _cache_key(cleaned, today)
+    result = cache.get(key)
+    if result is None:
+        result = compute_board_summary(cleaned, today)
+        cache.set(key, result, TASK_BOARD_SUMMARY_TTL)
+    return result
@@ -0,0 +1,165 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import (
+    AssignmentProgress,
+    AssignedWorkRequiredFiles,
+    AssignedWorkActivity,
+    AssignedWorkActivityStages,
+    AssignedWorkOutputFiles,
+)
+from .rollups import refresh_progress, ROLLUP_FIELDS
+
+
+class ChecklistSection:
+    """One kind of checklist row: the fields a submit may change and the fields returned."""
+
+    def __init__(self, model, editable, state):
+        self.model = model
+        self.editable = editable
+        self.state = state
+
+
+# File rows are read only here: their file_path is only set from storage by
+# the upload endpoints (workflow.uploads), never from a submitted string
+CHECKLIST_SECTIONS = {
+    "required_files": ChecklistSection(
+        AssignedWorkRequiredFiles, (),
+        ("id", "file_name", "file_path", "display_order", "version", "updated_date"),
+    ),
+    "activities": ChecklistSection(
+        AssignedWorkActivity, ("status", "note", "start_date"),
+        ("id", "activity", "assigned_percentage", "status", "note", "start_date", "completion_date",
+         "display_order", "version", "updated_date"),
+    ),
+    "activity_stages": ChecklistSection(
+        AssignedWorkActivityStages, ("status", "start_date", "completion_date"),
+        ("id", "activity_stage", "status", "start_date", "completion_date", "display_order", "version", "updated_date"),
+    ),
+    "output_files": ChecklistSection(
+        AssignedWorkOutputFiles, (),
+        ("id", "file_name", "file_path", "display_order", "version", "updated_date"),
+    ),
+}
+# Sections whose changes move the progress rollup
+PROGRESS_SECTIONS = ("activities", "activity_stages")
+
+
+class StaleChecklist(Exception):
+    def __init__(self, conflicts):
+        super().__init__("Some rows were changed by someone else; reload and try again")
+        self.conflicts = conflicts
+
+
+def _clean(section, item):
+    """Validate one submitted row; returns (id, version, {field: value})."""
+    if not isinstance(item, dict):
+        raise ValueError("Each row must be an object")
+    row_id, version = item.get("id"), item.get("version")
+    if not isinstance(row_id, int) or not isinstance(version, int):
+        raise ValueError("Each row needs an integer id and the version it was read at")
+    unknown = set(item) - {"id", "version", *section.editable}
+    if unknown:
+        raise ValueError(f"Fields {', '.join(sorted(unknown))} cannot be changed on row {row_id}")
+
+    changes = {}
+    for name in section.editable:
+        if name not in item:
+            continue
+        field = section.model._meta.get_field(name)
+        try:
+            value = field.clean(item[name], None)
+        except ValidationError as e:
+            raise ValueError(f"Invalid {name} on row {row_id}: {'; '.join(e.messages)}")
+        changes[name] = value
+    return row_id, version, changes
+
+
+def submit_checklist(assignment, payload):
+    """
+    Apply a batch of checklist changes to one assignment.
+
+    `payload` maps a section name to rows of {"id", "version", <fields>}.
+    All referenced rows are read with one locking query per section. If any
+    of them has moved past the version it was read at, nothing is written
+    and StaleChecklist lists the conflicts. Otherwise each section is
+    written with one bulk_update and every changed row's version goes up.
+    Raises ValueError on malformed input.
+    """
+    unknown = set(payload) - set(CHECKLIST_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+
+    submitted = {}
+    for name, items in payload.items():
+        if not isinstance(items, list):
+            raise ValueError(f"{name} must be a list")
+        section = CHECKLIST_SECTIONS[name]
+        if items and not section.editable:
+            raise ValueError(f"{name} cannot be changed here; upload files through submit-client-work/uploads/")
+        rows = {}
+        for item in items:
+            row_id, version, changes = _clean(section, item)
+            if row_id in rows:
+                raise ValueError(f"Row {row_id} appears twice in {name}")
+            rows[row_id] = (version, changes)
+        if rows:
+            submitted[name] = rows
+
+    now = timezone.now()
+    with transaction.atomic():
+        current, conflicts, missing = {}, [], []
+        for name, rows in submitted.items():
+            model = CHECKLIST_SECTIONS[name].model
+            current[name] = {
+                obj.id: obj
+                for obj in model.objects.select_for_update().filter(assignment=assignment, is_active=True, id__in=rows)
+            }
+            for row_id, (version, _) in rows.items():
+                obj = current[name].get(row_id)
+                if obj is None:
+                    missing.append({"section": name, "id": row_id})
+                elif obj.version != version:
+                    conflicts.append({"section": name, "id": row_id, "expected_version": version, "version": obj.version})
+        if missing:
+            raise ValueError(f"Rows not found on this assignment: {missing}")
+        if conflicts:
+            raise StaleChecklist(conflicts)
+
+        for name, rows in submitted.items():
+            fields = {"version", "updated_date"}
+            objs = []
+            for row_id, (_, changes) in rows.items():
+                obj = current[name][row_id]
+                for field, value in changes.items():
+                    setattr(obj, field, value)
+                if name == "activities" and changes.get("status") == "completed" and not obj.completion_date:
+                    obj.completion_date = now
+                    fields.add("completion_date")
+                fields.update(changes)
+                obj.version = F("version") + 1
+                obj.updated_date = now
+                objs.append(obj)
+            CHECKLIST_SECTIONS[name].model.objects.bulk_update(objs, sorted(fields))
+
+        if any(name in submitted for name in PROGRESS_SECTIONS):
+            refresh_progress([assignment.assignment_id])
+    return checklist_state(assignment)
+
+
+def checklist_state(assignment):
+    """The assignment's active checklist rows, with versions, and its progress rollup."""
+    state = {"assignment_id": assignment.assignment_id, "progress": assignment.progress}
+    for name, section in CHECKLIST_SECTIONS.items():
+        state[name] = list(
+            section.model.objects.filter(assignment=assignment, is_active=True)
+            .order_by("display_order", "id")
+            .values(*section.state)
+        )
+    state["progress_rollup"] = (
+        AssignmentProgress.objects.filter(assignment=assignment)
+        .values(*(field for field in ROLLUP_FIELDS if field != "updated_date"))
+        .first()
+    )
+    return state
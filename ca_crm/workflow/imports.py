@@ -0,0 +1,28 @@
+from ca_crm.importer import Column, ImportSchema
+from .models import WorkCategoryFilesRequired, WorkCategoryActivityList, WorkCategoryUploadDocumentRequired
+
+
+FILES_REQUIRED_IMPORT = ImportSchema(
+    WorkCategoryFilesRequired,
+    columns=[
+        Column("File Name", field="file_name", required=True),
+        Column("Display Order", field="display_order", kind="int", default=0),
+    ],
+)
+
+ACTIVITY_LIST_IMPORT = ImportSchema(
+    WorkCategoryActivityList,
+    columns=[
+        Column("Activity Name", field="activity_name", required=True),
+        Column("Activity Percentage", field="assigned_percentage", kind="float", required=True),
+        Column("Display Order", field="display_order", kind="int", required=True),
+    ],
+)
+
+OUTPUT_FILES_IMPORT = ImportSchema(
+    WorkCategoryUploadDocumentRequired,
+    columns=[
+        Column("File Name", field="file_name", required=True),
+        Column("Display Order", field="display_order", kind="int", default=0),
+    ],
+)
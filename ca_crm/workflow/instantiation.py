@@ -0,0 +1,277 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from ca_crm.spreadsheet import iter_sheet_chunks, SHEET_CHUNK_SIZE
+from billing.ledger import schedule_refresh
+from search.index import index_objects
+from .rollups import refresh_progress
+from .template_cache import category_template
+from clients.models import Customer
+from custom_auth.models import CustomUser
+from .models import (
+    ClientWorkCategoryAssignment,
+    WorkCategoryFilesRequired,
+    WorkCategoryActivityList,
+    WorkCategoryActivityStages,
+    WorkCategoryUploadDocumentRequired,
+    AssignedWorkRequiredFiles,
+    AssignedWorkActivity,
+    AssignedWorkActivityStages,
+    AssignedWorkOutputFiles,
+)
+
+
+ASSIGNMENT_BATCH_SIZE = 500
+
+ASSIGNMENT_FIELDS = (
+    "customer_id", "assigned_to_id", "assigned_by_id", "review_by_id", "task_name",
+    "instructions", "progress", "priority", "allocated_hours", "start_date",
+    "completion_date", "is_repetitive", "created_by_id", "updated_by_id",
+    "recurrence_source_id", "period_due_date",
+)
+
+
+class WorkCategoryTemplate:
+    """
+    The checklist a work category stamps onto every new assignment: required
+    files, activities, activity stages and output documents. Loaded with four
+    queries (or taken from the template cache) and then reused for any
+    number of assignments.
+    """
+
+    def __init__(self, work_category, required_files, activities, activity_stages, output_files):
+        self.work_category = work_category
+        self.required_files = required_files
+        self.activities = activities
+        self.activity_stages = activity_stages
+        self.output_files = output_files
+
+    @classmethod
+    def load(cls, work_category):
+        """Served from the template cache; inactive categories are read from the database."""
+        cached = category_template(work_category.id)
+        if cached is not None:
+            return cls(
+                work_category,
+                required_files=cached["files_required"],
+                activities=cached["activities"],
+                activity_stages=cached["activity_stages"],
+                output_files=cached["output_files"],
+            )
+        return cls.load_from_db(work_category)
+
+    @classmethod
+    def load_from_db(cls, work_category):
+        def rows(model, *fields):
+            return list(
+                model.objects.filter(work_category=work_category, is_active=True)
+                .order_by("display_order", "id")
+                .values(*fields)
+            )
+
+        return cls(
+            work_category,
+            required_files=rows(WorkCategoryFilesRequired, "file_name", "display_order"),
+            activities=rows(WorkCategoryActivityList, "activity_name", "assigned_percentage", "display_order"),
+            activity_stages=rows(WorkCategoryActivityStages, "activity_stage", "display_order"),
+            output_files=rows(WorkCategoryUploadDocumentRequired, "file_name", "display_order"),
+        )
+
+    def materialize(self, assignments):
+        """
+        Build the (unsaved) child rows for the given saved assignments,
+        grouped by model.
+        """
+        children = {
+            AssignedWorkRequiredFiles: [],
+            AssignedWorkActivity: [],
+            AssignedWorkActivityStages: [],
+            AssignedWorkOutputFiles: [],
+        }
+        for assignment in assignments:
+            children[AssignedWorkRequiredFiles].extend(
+                AssignedWorkRequiredFiles(
+                    assignment=assignment, file_name=item["file_name"],
+                    display_order=item["display_order"], is_active=True,
+                )
+                for item in self.required_files
+            )
+            children[AssignedWorkActivity].extend(
+                AssignedWorkActivity(
+                    assignment=assignment, activity=item["activity_name"],
+                    assigned_percentage=item["assigned_percentage"],
+                    display_order=item["display_order"], is_active=True,
+                )
+                for item in self.activities
+            )
+            children[AssignedWorkActivityStages].extend(
+                AssignedWorkActivityStages(
+                    assignment=assignment, activity_stage=item["activity_stage"],
+                    display_order=item["display_order"], is_active=True,
+                )
+                for item in self.activity_stages
+            )
+            children[AssignedWorkOutputFiles].extend(
+                AssignedWorkOutputFiles(
+                    assignment=assignment, file_name=item["file_name"],
+                    display_order=item["display_order"], is_active=True,
+                )
+                for item in self.output_files
+            )
+        return children
+
+    def apply(self, assignments, batch_size=ASSIGNMENT_BATCH_SIZE):
+        for model, objs in self.materialize(assignments).items():
+            if objs:
+                model.objects.bulk_create(objs, batch_size=batch_size)
+        assignment_ids = [assignment.assignment_id for assignment in assignments]
+        refresh_progress(assignment_ids)
+        # bulk_create sends no post_save, so add the ledger rows and search entries here
+        schedule_refresh(assignment_ids)
+        index_objects(assignments)
+
+
+_progress_values = {value for value, _ in ClientWorkCategoryAssignment.progress_choices}
+_priority_values = {value for value, _ in ClientWorkCategoryAssignment.priority_choices}
+_date_field = ClientWorkCategoryAssignment._meta.get_field("start_date")
+
+
+def build_assignment(work_category, values):
+    """
+    Validate one row of assignment values and return an unsaved
+    ClientWorkCategoryAssignment. Raises ValueError describing the problem.
+    """
+    unknown = set(values) - set(ASSIGNMENT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not values.get("customer_id"):
+        raise ValueError("customer_id is required")
+
+    data = dict(values)
+    data.setdefault("progress", "pending_from_client_side")
+    data.setdefault("priority", 1)
+    if data["progress"] not in _progress_values:
+        raise ValueError(f"Invalid status '{data['progress']}'")
+    try:
+        data["priority"] = int(data["priority"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid priority '{data['priority']}'")
+    if data["priority"] not in _priority_values:
+        raise ValueError(f"Invalid priority '{data['priority']}'")
+    for date_key in ("start_date", "completion_date"):
+        try:
+            data[date_key] = _date_field.to_python(data.get(date_key) or None)
+        except ValidationError:
+            raise ValueError(f"Invalid {date_key} '{data.get(date_key)}'")
+
+    return ClientWorkCategoryAssignment(work_category=work_category, **data)
+
+
+def instantiate_assignments(work_category, rows, template=None, batch_size=ASSIGNMENT_BATCH_SIZE):
+    """
+    Create one assignment (plus its template checklist) per row of values.
+
+    Every row is validated first; if any fail, nothing is written and the
+    per-row errors are returned. Otherwise everything is inserted with
+    bulk_create inside a single transaction.
+
+    Returns (assignments, errors) where errors is a list of
+    {"row": index, "error": message}.
+    """
+    assignments, errors = [], []
+    for index, values in enumerate(rows):
+        try:
+            assignments.append(build_assignment(work_category, values))
+        except ValueError as e:
+            errors.append({"row": index, "error": str(e)})
+    if errors:
+        return [], errors
+
+    template = template or WorkCategoryTemplate.load(work_category)
+    with transaction.atomic():
+        assignments = ClientWorkCategoryAssignment.objects.bulk_create(assignments, batch_size=batch_size)
+        template.apply(assignments, batch_size=batch_size)
+    return assignments, []
+
+
+def _to_id(value):
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{value}' is not a valid id")
+    if not number.is_integer():
+        raise ValueError(f"'{value}' is not a valid id")
+    return int(number)
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return bool(value)
+
+
+def read_assignment_sheet(excel_file, work_category, user, chunk_size=SHEET_CHUNK_SIZE):
+    """
+    Stream an assignment upload sheet and turn it into rows for
+    instantiate_assignments.
+
+    Each chunk is checked and its customer/user ids are resolved with one
+    id__in query per model, so ids that do not exist are rejected before
+    anything is written. Rows are validated with build_assignment as well.
+    Returns (rows, errors) where errors carry the Excel row number.
+    """
+    rows, errors = [], []
+    known_customers, known_users = set(), set()
+    for chunk in iter_sheet_chunks(excel_file, chunk_size):
+        parsed = []
+        for row_number, row in chunk:
+            try:
+                customer_id = _to_id(row.get("customer_id"))
+                if not customer_id:
+                    raise ValueError("customer_id is required")
+                assigned_to_id = _to_id(row.get("assigned_to_id"))
+                review_by_id = _to_id(row.get("review_by_id")) if assigned_to_id else None
+            except ValueError as e:
+                errors.append({"row": row_number, "error": str(e)})
+                continue
+            parsed.append((row_number, row, customer_id, assigned_to_id, review_by_id))
+
+        customer_ids = {item[2] for item in parsed} - known_customers
+        user_ids = {user_id for item in parsed for user_id in item[3:] if user_id} - known_users
+        if customer_ids:
+            known_customers.update(Customer.objects.filter(id__in=customer_ids).values_list("id", flat=True))
+        if user_ids:
+            known_users.update(CustomUser.objects.filter(id__in=user_ids).values_list("id", flat=True))
+
+        for row_number, row, customer_id, assigned_to_id, review_by_id in parsed:
+            if customer_id not in known_customers:
+                errors.append({"row": row_number, "error": f"Customer {customer_id} does not exist"})
+                continue
+            missing = [user_id for user_id in (assigned_to_id, review_by_id) if user_id and user_id not in known_users]
+            if missing:
+                errors.append({"row": row_number, "error": f"User {missing[0]} does not exist"})
+                continue
+            values = {
+                "customer_id": customer_id,
+                "assigned_to_id": assigned_to_id,
+                "assigned_by_id": user.id,
+                "review_by_id": review_by_id,
+                "task_name": row.get("task_name") or "",
+                "progress": row.get("status") or "pending_from_client_side",
+                "priority": row.get("priority") or 1,
+                "start_date": row.get("start_date"),
+                "instructions": row.get("instructions") or "",
+                "completion_date": row.get("completion_date"),
+                "is_repetitive": _to_bool(row.get("is_repetitive")),
+                "created_by_id": user.id,
+                "updated_by_id": user.id,
+            }
+            try:
+                build_assignment(work_category, values)
+            except ValueError as e:
+                errors.append({"row": row_number, "error": str(e)})
+                continue
+            rows.append(values)
+    errors.sort(key=lambda error: error["row"])
+    return rows, errors
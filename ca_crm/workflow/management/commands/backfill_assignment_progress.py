@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from workflow.models import ClientWorkCategoryAssignment
+from workflow.rollups import refresh_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuild the progress rollup of every assignment from its activities and stages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = ClientWorkCategoryAssignment.objects.order_by("assignment_id").values_list("assignment_id", flat=True)
+        batch, total = [], 0
+        for assignment_id in ids.iterator(chunk_size=options["batch_size"]):
+            batch.append(assignment_id)
+            if len(batch) >= options["batch_size"]:
+                with transaction.atomic():
+                    refresh_progress(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                refresh_progress(batch)
+            total += len(batch)
+        self.stdout.write(f"Refreshed progress of {total} assignments")
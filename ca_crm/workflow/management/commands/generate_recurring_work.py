@@ -0,0 +1,33 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from workflow.recurrence import generate_recurring_work, RECURRING_WORK_LEAD_DAYS, RECURRING_WORK_LOOKBACK_DAYS
+
+
+class Command(BaseCommand):
+    help = "Create the next periods of repetitive assignments from their work category's recurrence."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", default=None, help="Run as if today were this date (YYYY-MM-DD).")
+        parser.add_argument("--lead-days", type=int, default=RECURRING_WORK_LEAD_DAYS)
+        parser.add_argument("--lookback-days", type=int, default=RECURRING_WORK_LOOKBACK_DAYS)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the periods that would be created.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options["as_of"]:
+            try:
+                as_of = date.fromisoformat(options["as_of"])
+            except ValueError:
+                raise CommandError("--as-of must be a date in YYYY-MM-DD format")
+
+        result = generate_recurring_work(
+            as_of, options["lead_days"], options["lookback_days"], dry_run=options["dry_run"]
+        )
+        if result["dry_run"]:
+            self.stdout.write(f"{result['planned']} periods would be created")
+        else:
+            self.stdout.write(f"Created {result['created']} of {result['planned']} planned periods")
+        for error in result["errors"]:
+            self.stderr.write(
+                f"Work category {error['work_category_id']} (assignment {error['source_assignment_id']}): {error['error']}"
+            )
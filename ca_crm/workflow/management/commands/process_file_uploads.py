@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from workflow.uploads import expire_sessions, process_uploads, UPLOAD_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Push staged checklist file uploads to storage and fill in their file_path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=UPLOAD_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for uploads instead of exiting when none are due.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_sessions()
+            if expired:
+                self.stdout.write(f"Dropped {expired} abandoned upload sessions")
+            totals = process_uploads(options["batch_size"], options["max_batches"])
+            if any(totals.values()):
+                self.stdout.write(
+                    f"Stored {totals['done']}, retrying {totals['retried']}, failed {totals['failed']}"
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
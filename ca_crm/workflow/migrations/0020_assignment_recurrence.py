@@ -0,0 +1,28 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0019_alter_assignedworkactivity_completion_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientworkcategoryassignment',
+            name='period_due_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='clientworkcategoryassignment',
+            name='recurrence_source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurrences', to='workflow.clientworkcategoryassignment'),
+        ),
+        migrations.AddConstraint(
+            model_name='clientworkcategoryassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurrence_source__isnull', False)), fields=('recurrence_source', 'period_due_date'), name='unique_recurrence_period'),
+        ),
+    ]
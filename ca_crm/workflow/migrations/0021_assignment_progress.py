@@ -0,0 +1,28 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0020_assignment_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentProgress',
+            fields=[
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress_rollup', serialize=False, to='workflow.clientworkcategoryassignment')),
+                ('completed_percentage', models.FloatField(db_index=True, default=0)),
+                ('activity_count', models.PositiveIntegerField(default=0)),
+                ('completed_activities', models.PositiveIntegerField(default=0)),
+                ('in_progress_activities', models.PositiveIntegerField(default=0)),
+                ('stage_count', models.PositiveIntegerField(default=0)),
+                ('completed_stages', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0021_assignment_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignedworkactivity',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignedworkactivitystages',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignedworkoutputfiles',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignedworkrequiredfiles',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
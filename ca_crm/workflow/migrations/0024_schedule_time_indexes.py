@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0023_file_upload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduletasktime',
+            index=models.Index(fields=['assigned_to', 'start_time', 'end_time'], name='workflow_sc_assigne_7ad042_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduletasktime',
+            index=models.Index(fields=['start_time', 'end_time'], name='workflow_sc_start_t_449547_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.17 on 2026-10-18 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_auth', '0006_employeeprofile_hourly_cost'),
+        ('workflow', '0024_schedule_time_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientworkreminder',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_work_reminders', to='custom_auth.customuser'),
+        ),
+        migrations.AddField(
+            model_name='clientworkreminder',
+            name='dispatch_token',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='clientworkreminder',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='clientworkreminder',
+            name='reminder_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='clientworkreminder',
+            index=models.Index(fields=['reminder_date', 'status'], name='workflow_cl_reminde_a0d94c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientworkreminder',
+            index=models.Index(fields=['assigned_to', 'reminder_date'], name='workflow_cl_assigne_bb9444_idx'),
+        ),
+    ]
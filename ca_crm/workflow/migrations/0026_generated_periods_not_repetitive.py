@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def clear_generated_repetitive(apps, schema_editor):
+    ClientWorkCategoryAssignment = apps.get_model('workflow', 'ClientWorkCategoryAssignment')
+    ClientWorkCategoryAssignment.objects.filter(period_due_date__isnull=False, is_repetitive=True).update(is_repetitive=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0025_work_reminder_dispatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_generated_repetitive, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0026_generated_periods_not_repetitive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduletasktime',
+            index=models.Index(fields=['created_date', 'id'], name='workflow_sc_created_3713bd_idx'),
+        ),
+    ]
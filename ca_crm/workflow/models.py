@@ -1,4 +1,6 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 from custom_auth.models import CustomUser
 from clients.models import Customer
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -194,12 +196,41 @@ class ClientWorkCategoryAssignment(models.Model):
     updated_date = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name="work_category_assignments_updated")
     is_active = models.BooleanField(default=True)
+    # Set on assignments generated from a repetitive assignment: the series
+    # they belong to and the due date of their period. Generated periods are
+    # not repetitive themselves, and stay periods if their source is deleted.
+    recurrence_source = models.ForeignKey("self", on_delete=models.SET_NULL, null=True, blank=True, related_name="recurrences")
+    period_due_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recurrence_source", "period_due_date"],
+                condition=models.Q(recurrence_source__isnull=False),
+                name="unique_recurrence_period",
+            ),
+        ]
     
     def __str__(self):
         return f"{self.customer.name_of_business} - {self.work_category.name}"
     
 
-class AssignedWorkRequiredFiles(models.Model):
+class ChecklistRow(models.Model):
+    """
+    Assignment checklist row with a version that goes up on every write, so
+    that a submit based on an older read can be rejected.
+    """
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.version = (self.version or 0) + 1
+        super().save(*args, **kwargs)
+
+
+class AssignedWorkRequiredFiles(ChecklistRow):
     id = models.AutoField(primary_key=True)
     assignment = models.ForeignKey(ClientWorkCategoryAssignment, on_delete=models.CASCADE, related_name="required_files")
     file_name = models.CharField(max_length=255)
@@ -213,7 +244,7 @@ class AssignedWorkRequiredFiles(models.Model):
         return f"{self.file_name} ({self.assignment.customer.name_of_business})"
 
 
-class AssignedWorkActivity(models.Model):
+class AssignedWorkActivity(ChecklistRow):
     status_choices = [("pending", "Pending"), ("in_progress", "In Progress"), ("completed", "Completed")]
     id = models.AutoField(primary_key=True)
     assignment = models.ForeignKey(ClientWorkCategoryAssignment, on_delete=models.CASCADE, related_name="activities")
@@ -231,7 +262,7 @@ class AssignedWorkActivity(models.Model):
         return f"{self.activity.activity_name} ({self.assignment.customer.name_of_business})"
     
 
-class AssignedWorkActivityStages(models.Model):
+class AssignedWorkActivityStages(ChecklistRow):
     id = models.AutoField(primary_key=True)
     assignment = models.ForeignKey(ClientWorkCategoryAssignment, on_delete=models.CASCADE, related_name="activity_stages")
     activity_stage = models.CharField(max_length=100, null=True, blank=True)
@@ -246,7 +277,7 @@ class AssignedWorkActivityStages(models.Model):
         return f"{self.stage} ({self.activity.activity})"
 
 
-class AssignedWorkOutputFiles(models.Model):
+class AssignedWorkOutputFiles(ChecklistRow):
     id = models.AutoField(primary_key=True)
     assignment = models.ForeignKey(ClientWorkCategoryAssignment, on_delete=models.CASCADE, related_name="output_files")
     file_name = models.CharField(max_length=255)
@@ -260,6 +291,68 @@ class AssignedWorkOutputFiles(models.Model):
         return f"{self.file_name} ({self.assignment.customer.name_of_business})"
     
 
+class FileUpload(models.Model):
+    """
+    A checklist file uploaded in chunks to local staging and pushed to
+    storage by the `process_file_uploads` command, which then sets the
+    target row's file_path. Clients resume an upload from received_size.
+    """
+    STATUS_CHOICES = [
+        ("receiving", "Receiving"),
+        ("pending", "Pending"),
+        ("uploading", "Uploading"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    TARGET_CHOICES = [("required_files", "Required file"), ("output_files", "Output file")]
+
+    id = models.AutoField(primary_key=True)
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.PositiveIntegerField()
+    file_name = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_size = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="receiving")
+    file_path = models.CharField(max_length=255, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    lock_token = models.CharField(max_length=32, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="file_uploads")
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+
+class AssignmentProgress(models.Model):
+    """
+    Denormalised progress of an assignment, kept in step with its activity
+    and stage rows by workflow.rollups.refresh_progress.
+    """
+    assignment = models.OneToOneField(ClientWorkCategoryAssignment, on_delete=models.CASCADE, primary_key=True, related_name="progress_rollup")
+    completed_percentage = models.FloatField(default=0, db_index=True)
+    activity_count = models.PositiveIntegerField(default=0)
+    completed_activities = models.PositiveIntegerField(default=0)
+    in_progress_activities = models.PositiveIntegerField(default=0)
+    stage_count = models.PositiveIntegerField(default=0)
+    completed_stages = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(blank=True, null=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.assignment_id}: {self.completed_percentage}%"
+
+
 class ScheduleTaskTime(models.Model):
     id = models.AutoField(primary_key=True)
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="cutomer_schedule_time")
@@ -275,6 +368,15 @@ class ScheduleTaskTime(models.Model):
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name="created_by_schedule")
     updated_date = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name="updated_by_schedule")
+
+    class Meta:
+        indexes = [
+            # Range lookups of workflow.schedules: per assignee and team-wide
+            models.Index(fields=["assigned_to", "start_time", "end_time"]),
+            models.Index(fields=["start_time", "end_time"]),
+            # Keyset pages of the schedule list
+            models.Index(fields=["created_date", "id"]),
+        ]
     
     def __str__(self):
         return f" Schedule for {self.customer.name_of_business} - {self.task.task_name}"
@@ -288,7 +390,20 @@ class ClientWorkReminder(models.Model):
                              null=True, blank=True, related_name="task_work_reminder")
     reminder_note = models.CharField(max_length=400, null=True, blank=True)
     status = models.CharField(max_length=15, choices=status_choices, default="open", null=True, blank=True)
+    reminder_date = models.DateField(null=True, blank=True)
+    # Who is emailed on reminder_date: the task's assignee or the creator unless given
+    assigned_to = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_work_reminders")
+    notified_at = models.DateTimeField(null=True, blank=True)
+    # Set by the dispatch run that claimed the reminder
+    dispatch_token = models.CharField(max_length=32, null=True, blank=True)
     created_date = models.DateField(auto_now_add=True)
     created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="created_by_work_reminder")
     updated_date = models.DateTimeField(auto_now=True)
-    updated_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="updated_by_work_reminder")
\ No newline at end of file
+    updated_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="updated_by_work_reminder")
+
+    class Meta:
+        indexes = [
+            # Due scans of reminders.dispatch and per user upcoming lists
+            models.Index(fields=["reminder_date", "status"]),
+            models.Index(fields=["assigned_to", "reminder_date"]),
+        ]
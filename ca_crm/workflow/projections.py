@@ -0,0 +1,101 @@
+from .models import ClientWorkCategoryAssignment
+
+
+class Projection:
+    """
+    Declared set of response fields fetched with a single values() query.
+
+    `fields` maps each response key to an ORM lookup (related lookups such as
+    "customer__name_of_business" are joined in the same query). `displays`
+    maps a response key to the field whose choice label it should carry, and
+    `null_default` replaces missing related values (e.g. unassigned users).
+    """
+
+    def __init__(self, model, fields, displays=None, null_default=None, nullable=()):
+        self.model = model
+        self.fields = fields
+        self.displays = displays or {}
+        self.null_default = null_default
+        self.nullable = set(nullable)
+        self.choice_maps = {
+            key: dict(model._meta.get_field(field_name).flatchoices)
+            for key, field_name in self.displays.items()
+        }
+
+    def _row(self, values):
+        row = {}
+        for key, lookup in self.fields.items():
+            value = values[lookup]
+            if value is None and key in self.nullable:
+                value = self.null_default
+            row[key] = value
+        for key, field_name in self.displays.items():
+            raw = values[self.fields.get(field_name, field_name)]
+            row[key] = self.choice_maps[key].get(raw, raw)
+        return row
+
+    def _lookups(self):
+        lookups = list(self.fields.values())
+        for field_name in self.displays.values():
+            lookup = self.fields.get(field_name, field_name)
+            if lookup not in lookups:
+                lookups.append(lookup)
+        return lookups
+
+    def apply(self, queryset):
+        return [self._row(values) for values in queryset.values(*self._lookups())]
+
+    def get(self, queryset, **filters):
+        values = queryset.filter(**filters).values(*self._lookups()).first()
+        if values is None:
+            raise self.model.DoesNotExist
+        return self._row(values)
+
+
+# Task board rows used by the assignment list views
+ASSIGNMENT_BOARD = Projection(
+    ClientWorkCategoryAssignment,
+    fields={
+        "id": "assignment_id",
+        "task_name": "task_name",
+        "customer_id": "customer_id",
+        "customer": "customer__name_of_business",
+        "work_category": "work_category__name",
+        "work_category_id": "work_category_id",
+        "department_name": "work_category__department__name",
+        "allocated_hours": "allocated_hours",
+        "department_id": "work_category__department_id",
+        "assigned_to": "assigned_to__username",
+        "assigned_by": "assigned_by__username",
+        "review_by": "review_by__username",
+        "progress": "progress",
+        "priority": "priority",
+        "start_date": "start_date",
+        "completion_date": "completion_date",
+        "completed_percentage": "progress_rollup__completed_percentage",
+        "activity_count": "progress_rollup__activity_count",
+        "completed_activities": "progress_rollup__completed_activities",
+        "last_activity_at": "progress_rollup__last_activity_at",
+    },
+    displays={"progress_display": "progress", "priority_display": "priority"},
+    null_default="",
+    nullable=("assigned_to", "assigned_by", "review_by"),
+)
+
+# Compact rows used by the assigned task lookups
+ASSIGNMENT_SUMMARY = Projection(
+    ClientWorkCategoryAssignment,
+    fields={
+        "id": "assignment_id",
+        "customer": "customer__name_of_business",
+        "customer_id": "customer_id",
+        "work_category": "work_category__name",
+        "assigned_to": "assigned_to__username",
+        "assigned_by": "assigned_by__username",
+        "created_date": "created_date",
+        "updated_date": "updated_date",
+        "progress": "progress",
+        "is_active": "is_active",
+    },
+    displays={"progress_display": "progress"},
+)
@@ -0,0 +1,204 @@
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Exists, Max, OuterRef, Prefetch, Q
+from django.utils import timezone
+from .instantiation import WorkCategoryTemplate, instantiate_assignments
+from .models import ClientWorkCategoryAssignment, WorkCategoryDate
+
+
+# Create the next period's work this many days before it is due
+RECURRING_WORK_LEAD_DAYS = getattr(settings, "RECURRING_WORK_LEAD_DAYS", 7)
+# Periods due longer ago than this are not backfilled
+RECURRING_WORK_LOOKBACK_DAYS = getattr(settings, "RECURRING_WORK_LOOKBACK_DAYS", 31)
+# Longest range, in days, one forecast request covers
+RECURRING_WORK_FORECAST_MAX_DAYS = getattr(settings, "RECURRING_WORK_FORECAST_MAX_DAYS", 366)
+SERIES_CHUNK_SIZE = 1000
+
+MONTH_STEPS = {"monthly": 1, "quarterly": 3, "half_yearly": 6, "yearly": 12}
+DAY_STEPS = {"daily": 1, "weekly": 7}
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _day_in_month(index, day):
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(day, monthrange(year, month + 1)[1]))
+
+
+def _monthly(anchor, step, day, after, until):
+    start = _month_index(after)
+    start += (_month_index(anchor) - start) % step
+    dates = []
+    for index in range(start, _month_index(until) + 1, step):
+        due = _day_in_month(index, day)
+        if after < due <= until:
+            dates.append(due)
+    return dates
+
+
+def occurrences(frequency, rules, anchor, after, until):
+    """
+    Due dates of a work category's recurrence with after < date <= until.
+
+    `rules` are its WorkCategoryDate rows: yearly rules fall on day/month
+    every year, monthly rules on the given day every month, or every
+    quarter/half year for those frequencies (counted from `anchor`'s month).
+    Without rules the frequency repeats from `anchor` itself.
+    """
+    if until <= after:
+        return []
+    dates = set()
+    if rules:
+        step = MONTH_STEPS.get(frequency, 1)
+        for rule in rules:
+            if rule.date_type == "yearly" and rule.month:
+                for year in range(after.year, until.year + 1):
+                    due = _day_in_month(year * 12 + rule.month - 1, rule.day)
+                    if after < due <= until:
+                        dates.add(due)
+            else:
+                dates.update(_monthly(anchor, step, rule.day, after, until))
+    elif frequency in MONTH_STEPS:
+        dates.update(_monthly(anchor, MONTH_STEPS[frequency], anchor.day, after, until))
+    elif frequency in DAY_STEPS:
+        step = DAY_STEPS[frequency]
+        skip = max((after - anchor).days // step + 1, 1)
+        due = anchor + timedelta(days=skip * step)
+        while due <= until:
+            dates.add(due)
+            due += timedelta(days=step)
+    return sorted(dates)
+
+
+def _series_anchor(series):
+    return series.completion_date or series.start_date or timezone.localtime(series.created_date).date()
+
+
+def repetitive_series():
+    """
+    The repetitive assignments new periods are generated from, with the
+    due date of their latest generated period and their category's date
+    rules loaded. Generated periods (with a period_due_date) are never
+    series of their own, even once their source is deleted.
+    """
+    return (
+        ClientWorkCategoryAssignment.objects.filter(
+            is_repetitive=True, is_active=True, recurrence_source__isnull=True, period_due_date__isnull=True,
+            work_category__is_active=True,
+        )
+        .filter(
+            Q(work_category__frequency__in=[*MONTH_STEPS, *DAY_STEPS])
+            | Exists(WorkCategoryDate.objects.filter(work_category=OuterRef("work_category")))
+        )
+        .annotate(last_period=Max("recurrences__period_due_date"))
+        .select_related("work_category")
+        .prefetch_related(Prefetch("work_category__dates", queryset=WorkCategoryDate.objects.order_by("id")))
+        .order_by("assignment_id")
+    )
+
+
+def missing_periods(series, after, until):
+    """Due dates of `series` in (after, until] that have no assignment yet."""
+    anchor = _series_anchor(series)
+    latest = max(series.last_period or anchor, anchor, after)
+    work_category = series.work_category
+    return occurrences(
+        work_category.frequency,
+        list(work_category.dates.all()),
+        work_category.start_dates or anchor,
+        latest,
+        until,
+    )
+
+
+def _period_values(series, due, user):
+    if series.start_date and series.completion_date:
+        start_date = due - (series.completion_date - series.start_date)
+    else:
+        start_date = due
+    task_name = f"{series.task_name} ({due:%d %b %Y})"[:120] if series.task_name else None
+    return {
+        "customer_id": series.customer_id,
+        "assigned_to_id": series.assigned_to_id,
+        "assigned_by_id": series.assigned_by_id,
+        "review_by_id": series.review_by_id,
+        "task_name": task_name,
+        "instructions": series.instructions,
+        "priority": series.priority,
+        "allocated_hours": series.allocated_hours,
+        "start_date": start_date,
+        "completion_date": due,
+        # A period is one-off work; only its source repeats
+        "is_repetitive": False,
+        "created_by_id": user.id if user else series.created_by_id,
+        "updated_by_id": user.id if user else series.updated_by_id,
+        "recurrence_source_id": series.assignment_id,
+        "period_due_date": due,
+    }
+
+
+def plan_recurring_work(as_of=None, lead_days=RECURRING_WORK_LEAD_DAYS, lookback_days=RECURRING_WORK_LOOKBACK_DAYS, until=None):
+    """
+    Yield (series, due_date) for every period that is due by `as_of` plus
+    `lead_days` (or by `until`) and has not been generated yet. Periods due
+    before `as_of` minus `lookback_days` are left out.
+    """
+    as_of = as_of or timezone.localdate()
+    until = until or as_of + timedelta(days=lead_days)
+    after = as_of - timedelta(days=lookback_days + 1)
+    for series in repetitive_series().iterator(chunk_size=SERIES_CHUNK_SIZE):
+        for due in missing_periods(series, after, until):
+            yield series, due
+
+
+def forecast_recurring_work(as_of=None, until=None, lookback_days=RECURRING_WORK_LOOKBACK_DAYS):
+    return [
+        {
+            "source_assignment_id": series.assignment_id,
+            "customer_id": series.customer_id,
+            "work_category_id": series.work_category_id,
+            "work_category_name": series.work_category.name,
+            "task_name": series.task_name,
+            "assigned_to_id": series.assigned_to_id,
+            "due_date": due,
+        }
+        for series, due in plan_recurring_work(as_of, lookback_days=lookback_days, until=until)
+    ]
+
+
+def generate_recurring_work(as_of=None, lead_days=RECURRING_WORK_LEAD_DAYS, lookback_days=RECURRING_WORK_LOOKBACK_DAYS, user=None, dry_run=False):
+    """
+    Create the missing periods of every repetitive assignment, with their
+    work category checklist, per work category in one bulk transaction.
+
+    Safe to run repeatedly: a period already generated is never planned
+    again, and the (recurrence_source, period_due_date) constraint rejects
+    a batch a concurrent run got to first.
+    """
+    rows_by_category = defaultdict(list)
+    categories = {}
+    for series, due in plan_recurring_work(as_of, lead_days, lookback_days):
+        categories[series.work_category_id] = series.work_category
+        rows_by_category[series.work_category_id].append(_period_values(series, due, user))
+
+    result = {"dry_run": dry_run, "planned": sum(len(rows) for rows in rows_by_category.values()), "created": 0, "errors": []}
+    if dry_run:
+        return result
+
+    for work_category_id, rows in rows_by_category.items():
+        work_category = categories[work_category_id]
+        try:
+            assignments, errors = instantiate_assignments(work_category, rows, WorkCategoryTemplate.load(work_category))
+        except IntegrityError:
+            errors = [{"row": None, "error": "Periods were generated by another run"}]
+            assignments = []
+        result["created"] += len(assignments)
+        for error in errors:
+            source = rows[error["row"]]["recurrence_source_id"] if error["row"] is not None else None
+            result["errors"].append({"work_category_id": work_category_id, "source_assignment_id": source, "error": error["error"]})
+    return result
@@ -0,0 +1,87 @@
+"""
+PDF layout of assignment activity reports. Kept free of Django imports so
+that worker processes can render reports from plain dicts.
+"""
+import io
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from xml.sax.saxutils import escape
+
+
+ACTIVITY_COLUMNS = [
+    ("Activity", "activity", 58 * mm),
+    ("Share %", "assigned_percentage", 18 * mm),
+    ("Status", "status", 24 * mm),
+    ("Started", "start_date", 22 * mm),
+    ("Completed", "completion_date", 22 * mm),
+    ("Note", "note", 36 * mm),
+]
+STAGE_COLUMNS = [
+    ("Stage", "activity_stage", 80 * mm),
+    ("Status", "status", 40 * mm),
+    ("Started", "start_date", 30 * mm),
+    ("Completed", "completion_date", 30 * mm),
+]
+
+
+class ReportTemplate:
+    """Styles and table layout shared by every report, built once per process by report_template()."""
+
+    def __init__(self):
+        sheet = getSampleStyleSheet()
+        self.title = sheet["Title"]
+        self.heading = sheet["Heading2"]
+        self.body = sheet["BodyText"]
+        self.cell = ParagraphStyle("ReportCell", parent=sheet["BodyText"], fontSize=8, leading=10)
+        self.header_cell = ParagraphStyle("ReportHeaderCell", parent=self.cell, fontName="Helvetica-Bold", textColor=colors.white)
+        self.table_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#34495e")),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f2f4f5")]),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#bdc3c7")),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+
+    def _text(self, value, style):
+        return Paragraph(escape("" if value is None else str(value)), style)
+
+    def table(self, columns, rows):
+        data = [[self._text(label, self.header_cell) for label, _, _ in columns]]
+        data += [[self._text(row.get(key), self.cell) for _, key, _ in columns] for row in rows]
+        table = Table(data, colWidths=[width for _, _, width in columns], repeatRows=1)
+        table.setStyle(self.table_style)
+        return table
+
+
+@lru_cache(maxsize=None)
+def report_template():
+    return ReportTemplate()
+
+
+def render_report(report):
+    """PDF bytes of one report, as built by workflow.reports.report_data."""
+    template = report_template()
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, title=report["title"],
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+    )
+    story = [Paragraph(escape(report["title"]), template.title)]
+    for label, value in report["summary"]:
+        story.append(Paragraph(f"<b>{escape(label)}:</b> {escape(str(value))}", template.body))
+    story.append(Spacer(1, 6 * mm))
+    for heading, columns, key in (
+        ("Activities", ACTIVITY_COLUMNS, "activities"),
+        ("Activity stages", STAGE_COLUMNS, "activity_stages"),
+    ):
+        story.append(Paragraph(heading, template.heading))
+        if report[key]:
+            story.append(template.table(columns, report[key]))
+        else:
+            story.append(Paragraph("None recorded.", template.body))
+        story.append(Spacer(1, 4 * mm))
+    document.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,110 @@
+import zipfile
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+from django.conf import settings
+from django.db.models import Prefetch
+from django.template import Context, Template
+from django.utils.text import slugify
+from .models import AssignedWorkActivity, AssignedWorkActivityStages, ClientWorkCategoryAssignment
+from .report_renderer import render_report
+
+
+# Most assignments one archive may hold; they are rendered one by one in the request
+ACTIVITY_REPORT_BATCH_LIMIT = getattr(settings, "ACTIVITY_REPORT_BATCH_LIMIT", 100)
+ARCHIVE_SPOOL_SIZE = 10 * 1024 * 1024
+
+ACTIVITY_REPORT_BODY = """Activity Report for {{ customer }}
+
+**Completed Activities:**
+{% for activity in completed %}- {{ activity.activity }} (Completed on: {{ activity.completion_date }})
+{% endfor %}
+**Incomplete Activities:**
+{% for activity in incomplete %}- {{ activity.activity }} (Status: {{ activity.status }}, Note: {{ activity.note }})
+{% endfor %}"""
+
+ACTIVITY_FIELDS = ("activity", "assigned_percentage", "status", "note", "start_date", "completion_date")
+STAGE_FIELDS = ("activity_stage", "status", "start_date", "completion_date")
+
+
+@lru_cache(maxsize=None)
+def body_template():
+    return Template(ACTIVITY_REPORT_BODY)
+
+
+def report_assignments(assignments):
+    """`assignments` with everything a report needs: one query plus one per checklist table."""
+    return assignments.select_related(
+        "customer", "work_category", "assigned_to", "review_by", "progress_rollup"
+    ).prefetch_related(
+        Prefetch(
+            "activities",
+            queryset=AssignedWorkActivity.objects.filter(is_active=True).order_by("display_order", "id"),
+            to_attr="report_activities",
+        ),
+        Prefetch(
+            "activity_stages",
+            queryset=AssignedWorkActivityStages.objects.filter(is_active=True).order_by("display_order", "id"),
+            to_attr="report_stages",
+        ),
+    ).order_by("assignment_id")
+
+
+def _rollup(assignment):
+    try:
+        return assignment.progress_rollup.completed_percentage
+    except ClientWorkCategoryAssignment.progress_rollup.RelatedObjectDoesNotExist:
+        return None
+
+
+def report_data(assignment):
+    """A plain dict of one prefetched assignment's report."""
+    customer = assignment.customer.name_of_business
+    task_name = assignment.task_name or assignment.work_category.name
+    activities = [{field: getattr(row, field) for field in ACTIVITY_FIELDS} for row in assignment.report_activities]
+    completed_percentage = _rollup(assignment)
+    return {
+        "assignment_id": assignment.assignment_id,
+        "customer": customer,
+        "title": f"Activity Report - {task_name} - {customer}",
+        "file_name": f"{slugify(f'{customer} {task_name}') or 'assignment'}-{assignment.assignment_id}.pdf",
+        "summary": [
+            ("Client", customer),
+            ("Work category", assignment.work_category.name),
+            ("Assigned to", assignment.assigned_to.username if assignment.assigned_to else "-"),
+            ("Reviewer", assignment.review_by.username if assignment.review_by else "-"),
+            ("Progress", assignment.get_progress_display()),
+            ("Completed", "-" if completed_percentage is None else f"{completed_percentage:g}%"),
+            ("Start date", assignment.start_date or "-"),
+            ("Due date", assignment.completion_date or "-"),
+        ],
+        "activities": activities,
+        "activity_stages": [{field: getattr(row, field) for field in STAGE_FIELDS} for row in assignment.report_stages],
+        "completed": [activity for activity in activities if activity["status"] == "completed"],
+        "incomplete": [activity for activity in activities if activity["status"] != "completed"],
+    }
+
+
+def report_body(report):
+    """The plain-text summary sent as the body of a report email."""
+    return body_template().render(Context(report, autoescape=False))
+
+
+def report_archive(assignments):
+    """
+    A zip of the activity report PDF of every assignment in the queryset,
+    as an open spooled file positioned at the start. Raises ValueError when
+    there are none or more than ACTIVITY_REPORT_BATCH_LIMIT.
+    """
+    assignments = list(report_assignments(assignments)[:ACTIVITY_REPORT_BATCH_LIMIT + 1])
+    if not assignments:
+        raise ValueError("No assignments match")
+    if len(assignments) > ACTIVITY_REPORT_BATCH_LIMIT:
+        raise ValueError(f"At most {ACTIVITY_REPORT_BATCH_LIMIT} reports can be generated at once")
+    archive = SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_SIZE)
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as bundle:
+        # Serially, so only one PDF is held in memory at a time
+        for assignment in assignments:
+            report = report_data(assignment)
+            bundle.writestr(report["file_name"], render_report(report))
+    archive.seek(0)
+    return archive
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from django.db.models import Count, FloatField, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ca_crm.params import date_param
+from .models import AssignedWorkActivity, AssignedWorkActivityStages, AssignmentProgress
+
+
+ROLLUP_FIELDS = (
+    "completed_percentage", "activity_count", "completed_activities", "in_progress_activities",
+    "stage_count", "completed_stages", "last_activity_at", "updated_date",
+)
+# Assignments in these states no longer count as overdue
+CLOSED_PROGRESS = (
+    "task_completed", "task_billed", "payment_pending", "payment_received", "task_closed",
+)
+PROGRESS_ORDERING = {
+    "completed_percentage": "rollup_percentage",
+    "last_activity_at": "progress_rollup__last_activity_at",
+    "completion_date": "completion_date",
+    "start_date": "start_date",
+    "priority": "priority",
+}
+
+
+def refresh_progress(assignment_ids):
+    """
+    Recompute the AssignmentProgress rows of the given assignments from their
+    activities and stages: one grouped query per table and one upsert.
+    Call it inside the transaction that changed the rows.
+    """
+    assignment_ids = list(assignment_ids)
+    if not assignment_ids:
+        return
+    activities = {
+        row["assignment_id"]: row
+        for row in AssignedWorkActivity.objects.filter(assignment_id__in=assignment_ids, is_active=True)
+        .values("assignment_id")
+        .annotate(
+            count=Count("id"),
+            completed=Count("id", filter=Q(status="completed")),
+            in_progress=Count("id", filter=Q(status="in_progress")),
+            total_share=Coalesce(Sum("assigned_percentage"), Value(0.0), output_field=FloatField()),
+            completed_share=Coalesce(
+                Sum("assigned_percentage", filter=Q(status="completed")), Value(0.0), output_field=FloatField()
+            ),
+            last_updated=Max("updated_date"),
+        )
+    }
+    stages = {
+        row["assignment_id"]: row
+        for row in AssignedWorkActivityStages.objects.filter(assignment_id__in=assignment_ids, is_active=True)
+        .values("assignment_id")
+        .annotate(
+            count=Count("id"),
+            completed=Count("id", filter=Q(status__iexact="completed")),
+            last_updated=Max("updated_date"),
+        )
+    }
+
+    rollups = []
+    for assignment_id in assignment_ids:
+        activity = activities.get(assignment_id, {})
+        stage = stages.get(assignment_id, {})
+        count = activity.get("count", 0)
+        # Weighted by assigned_percentage when the activities carry one
+        if activity.get("total_share"):
+            percentage = activity["completed_share"] / activity["total_share"] * 100
+        elif count:
+            percentage = activity["completed"] / count * 100
+        else:
+            percentage = 0
+        touched = [value for value in (activity.get("last_updated"), stage.get("last_updated")) if value]
+        rollups.append(AssignmentProgress(
+            assignment_id=assignment_id,
+            completed_percentage=round(percentage, 2),
+            activity_count=count,
+            completed_activities=activity.get("completed", 0),
+            in_progress_activities=activity.get("in_progress", 0),
+            stage_count=stage.get("count", 0),
+            completed_stages=stage.get("completed", 0),
+            last_activity_at=max(touched) if touched else None,
+        ))
+    AssignmentProgress.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=["assignment"],
+        update_fields=list(ROLLUP_FIELDS),
+    )
+
+
+def filter_by_progress(queryset, params):
+    """
+    Apply the progress filters and ordering of an assignment list request:
+    progress_lt / progress_gte (completed percentage), due (today,
+    this_week or overdue), due_before / due_after (completion date) and
+    ordering (e.g. "-completed_percentage"). Raises ValueError on bad input.
+    """
+    queryset = queryset.annotate(
+        rollup_percentage=Coalesce("progress_rollup__completed_percentage", Value(0.0), output_field=FloatField())
+    )
+    for name, lookup in (("progress_lt", "lt"), ("progress_gte", "gte")):
+        if params.get(name) not in (None, ""):
+            try:
+                value = float(params[name])
+            except ValueError:
+                raise ValueError(f"{name} must be a number")
+            queryset = queryset.filter(**{f"rollup_percentage__{lookup}": value})
+
+    today = timezone.localdate()
+    due = params.get("due")
+    if due == "today":
+        queryset = queryset.filter(completion_date=today)
+    elif due == "this_week":
+        week_start = today - timedelta(days=today.weekday())
+        queryset = queryset.filter(completion_date__range=(week_start, week_start + timedelta(days=6)))
+    elif due == "overdue":
+        queryset = queryset.filter(completion_date__lt=today).exclude(progress__in=CLOSED_PROGRESS)
+    elif due:
+        raise ValueError("due must be one of today, this_week or overdue")
+
+    due_before = date_param(params, "due_before")
+    due_after = date_param(params, "due_after")
+    if due_before:
+        queryset = queryset.filter(completion_date__lte=due_before)
+    if due_after:
+        queryset = queryset.filter(completion_date__gte=due_after)
+
+    ordering = params.get("ordering")
+    if ordering:
+        field = PROGRESS_ORDERING.get(ordering.lstrip("-"))
+        if not field:
+            raise ValueError(f"ordering must be one of {', '.join(PROGRESS_ORDERING)}")
+        queryset = queryset.order_by(f"-{field}" if ordering.startswith("-") else field, "assignment_id")
+    return queryset
@@ -0,0 +1,182 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from custom_auth.models import CustomUser
+from .models import ScheduleTaskTime
+from ca_crm.params import date_param
+
+
+# Longest range one calendar request may cover, in days
+SCHEDULE_CALENDAR_MAX_DAYS = getattr(settings, "SCHEDULE_CALENDAR_MAX_DAYS", 62)
+CALENDAR_VIEWS = ("day", "week")
+CALENDAR_FIELDS = (
+    "id", "customer_id", "customer__name_of_business", "task_id", "task__task_name",
+    "assigned_to_id", "assigned_to__username", "start_time", "end_time",
+    "activities", "mode_of_communication",
+)
+
+
+class ScheduleConflict(Exception):
+    def __init__(self, conflicts):
+        super().__init__("The assignee already has a booking at that time")
+        self.conflicts = conflicts
+
+
+def _aware(value, name):
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"{name} must be a datetime in ISO 8601 format")
+        value = parsed
+    if not isinstance(value, datetime):
+        raise ValueError(f"{name} must be a datetime in ISO 8601 format")
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def clean_interval(start_time, end_time):
+    """Parse a booking's start and end; the end must come after the start."""
+    start_time, end_time = _aware(start_time, "start_time"), _aware(end_time, "end_time")
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time")
+    return start_time, end_time
+
+
+def overlapping(queryset, start, end):
+    """
+    Bookings of `queryset` overlapping [start, end), as one range scan of the
+    (start_time, end_time) indexes. Bookings without an end count as instants.
+    """
+    return queryset.filter(start_time__lt=end).filter(
+        Q(end_time__gt=start) | Q(end_time__isnull=True, start_time__gte=start)
+    )
+
+
+def check_conflicts(assigned_to_id, start, end, exclude_id=None):
+    """
+    Raise ScheduleConflict listing the assignee's bookings that overlap
+    [start, end). Call inside a transaction: the assignee row is locked so
+    two overlapping bookings cannot be made at the same time.
+    """
+    if not assigned_to_id:
+        return
+    list(CustomUser.objects.select_for_update().filter(id=assigned_to_id).values_list("id", flat=True))
+    bookings = overlapping(ScheduleTaskTime.objects.filter(assigned_to_id=assigned_to_id), start, end)
+    if exclude_id:
+        bookings = bookings.exclude(id=exclude_id)
+    conflicts = list(
+        bookings.order_by("start_time", "id").values(
+            "id", "start_time", "end_time", customer_name=F("customer__name_of_business"), task_name=F("task__task_name")
+        )
+    )
+    if conflicts:
+        raise ScheduleConflict(conflicts)
+
+
+def find_overlaps(bookings):
+    """
+    Sweep each assignee's bookings in start order and return
+    {booking id: ids of the bookings it overlaps}.
+    """
+    per_assignee = defaultdict(list)
+    for booking in bookings:
+        if booking["assigned_to_id"] and booking["start_time"]:
+            per_assignee[booking["assigned_to_id"]].append(booking)
+    overlaps = defaultdict(list)
+    for rows in per_assignee.values():
+        rows.sort(key=lambda row: (row["start_time"], row["id"]))
+        active = []
+        for row in rows:
+            start = row["start_time"]
+            # Bookings still running when this one starts; instants only clash at the same moment
+            active = [(end, other) for end, other in active if end > start or end == other["start_time"] == start]
+            for _, other in active:
+                overlaps[row["id"]].append(other["id"])
+                overlaps[other["id"]].append(row["id"])
+            active.append((row["end_time"] or start, row))
+    return overlaps
+
+
+def _calendar_range(params, view):
+    today = timezone.localdate()
+    start = date_param(params, "start")
+    end = date_param(params, "end")
+    if start is None:
+        start = today - timedelta(days=today.weekday()) if view == "week" else today
+    elif view == "week":
+        start -= timedelta(days=start.weekday())
+    if end is None:
+        end = start + timedelta(days=6 if view == "week" else 0)
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days + 1 > SCHEDULE_CALENDAR_MAX_DAYS:
+        raise ValueError(f"The range may cover at most {SCHEDULE_CALENDAR_MAX_DAYS} days")
+    return start, end
+
+
+def _ids(value, name):
+    ids = [part.strip() for part in str(value or "").split(",") if part.strip()]
+    if not all(part.isdigit() for part in ids):
+        raise ValueError(f"{name} must be a comma separated list of ids")
+    return [int(part) for part in ids]
+
+
+def schedule_calendar(params):
+    """
+    Bookings between the `start` and `end` dates (inclusive) for the
+    employees in `assigned_to` (or the whole team) and optionally one
+    customer, bucketed per day or per week (`view`). A booking shows up in
+    every bucket it touches and lists the bookings of the same assignee it
+    overlaps. Fetched with one query. Raises ValueError on bad parameters.
+    """
+    view = params.get("view") or "week"
+    if view not in CALENDAR_VIEWS:
+        raise ValueError(f"view must be one of {', '.join(CALENDAR_VIEWS)}")
+    start, end = _calendar_range(params, view)
+    window_start = timezone.make_aware(datetime.combine(start, time.min))
+    window_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+
+    bookings = overlapping(ScheduleTaskTime.objects.all(), window_start, window_end)
+    assigned_to = _ids(params.get("assigned_to"), "assigned_to")
+    if assigned_to:
+        bookings = bookings.filter(assigned_to_id__in=assigned_to)
+    customer_id = params.get("customer_id")
+    if customer_id:
+        if not str(customer_id).isdigit():
+            raise ValueError("customer_id must be an id")
+        bookings = bookings.filter(customer_id=customer_id)
+    bookings = list(bookings.order_by("start_time", "id").values(*CALENDAR_FIELDS))
+    overlaps = find_overlaps(bookings)
+
+    step = 7 if view == "week" else 1
+    buckets = []
+    bucket_start = start
+    while bucket_start <= end:
+        buckets.append({"start": bucket_start, "end": min(bucket_start + timedelta(days=step - 1), end), "schedules": []})
+        bucket_start += timedelta(days=step)
+    for booking in bookings:
+        row = {
+            "id": booking["id"],
+            "customer_id": booking["customer_id"],
+            "customer": booking["customer__name_of_business"],
+            "task_id": booking["task_id"],
+            "task": booking["task__task_name"],
+            "assigned_to_id": booking["assigned_to_id"],
+            "assigned_to": booking["assigned_to__username"],
+            "start_time": booking["start_time"],
+            "end_time": booking["end_time"],
+            "activities": booking["activities"],
+            "mode_of_communication": booking["mode_of_communication"],
+            "overlaps": sorted(overlaps.get(booking["id"], [])),
+        }
+        first_day = max(timezone.localtime(booking["start_time"]).date(), start)
+        # The end is exclusive, so a booking ending at midnight stays on the day before
+        last_moment = booking["end_time"] - timedelta(microseconds=1) if booking["end_time"] else booking["start_time"]
+        last_day = min(timezone.localtime(last_moment).date(), end)
+        first = (first_day - start).days // step
+        last = max((last_day - start).days // step, first)
+        for index in range(first, last + 1):
+            buckets[index]["schedules"].append(row)
+    return {"view": view, "start": start, "end": end, "buckets": buckets}
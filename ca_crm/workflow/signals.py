@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import (
+    WorkCategory,
+    WorkCategoryFilesRequired,
+    WorkCategoryActivityList,
+    WorkCategoryActivityStages,
+    WorkCategoryUploadDocumentRequired,
+)
+from .template_cache import invalidate_templates
+
+
+@receiver([post_save, post_delete], sender=WorkCategory)
+@receiver([post_save, post_delete], sender=WorkCategoryFilesRequired)
+@receiver([post_save, post_delete], sender=WorkCategoryActivityList)
+@receiver([post_save, post_delete], sender=WorkCategoryActivityStages)
+@receiver([post_save, post_delete], sender=WorkCategoryUploadDocumentRequired)
+def clear_cached_templates(sender, **kwargs):
+    invalidate_templates()
@@ -0,0 +1,103 @@
+import threading
+import uuid
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from .models import (
+    WorkCategory,
+    WorkCategoryFilesRequired,
+    WorkCategoryActivityList,
+    WorkCategoryActivityStages,
+    WorkCategoryUploadDocumentRequired,
+)
+
+
+TEMPLATE_VERSION_KEY = "workflow:templates:version"
+
+# Checklist key of the category tree -> (model, fields)
+TEMPLATE_CHILDREN = {
+    "files_required": (WorkCategoryFilesRequired, ("id", "file_name", "display_order")),
+    "activities": (WorkCategoryActivityList, ("id", "activity_name", "assigned_percentage", "display_order")),
+    "activity_stages": (WorkCategoryActivityStages, ("id", "activity_stage", "description", "display_order")),
+    "output_files": (WorkCategoryUploadDocumentRequired, ("id", "file_name", "display_order")),
+}
+
+
+class TemplateTree:
+    """
+    Every active work category with its active checklist rows, grouped by
+    department. Built with one query per table; treat it as read-only.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.categories = {}
+        self.departments = defaultdict(list)
+
+    @classmethod
+    def load(cls, version):
+        tree = cls(version)
+        for category in WorkCategory.objects.filter(is_active=True).order_by("id").values(
+            "id", "name", "fees", "department_id"
+        ):
+            category.update({key: [] for key in TEMPLATE_CHILDREN})
+            tree.categories[category["id"]] = category
+            tree.departments[category["department_id"]].append(category)
+        for key, (model, fields) in TEMPLATE_CHILDREN.items():
+            rows = (
+                model.objects.filter(is_active=True, work_category__is_active=True)
+                .order_by("display_order", "id")
+                .values("work_category_id", *fields)
+            )
+            for row in rows:
+                tree.categories[row.pop("work_category_id")][key].append(row)
+        return tree
+
+
+_lock = threading.Lock()
+_tree = None
+
+
+def current_version():
+    """The shared version stamp; every process reloads its tree when it changes."""
+    version = cache.get(TEMPLATE_VERSION_KEY)
+    if version is None:
+        cache.add(TEMPLATE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(TEMPLATE_VERSION_KEY)
+    return version
+
+
+def template_tree():
+    """
+    The process-local TemplateTree, reloaded when the version stamp has
+    moved on. Costs one cache read per call while it is current.
+    """
+    global _tree
+    version = current_version()
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _lock:
+        if _tree is None or _tree.version != version:
+            # Stamped with the version read before loading, so a write that
+            # lands meanwhile forces another reload
+            _tree = TemplateTree.load(version)
+        return _tree
+
+
+def department_categories(department_id):
+    return template_tree().departments.get(department_id, [])
+
+
+def category_template(work_category_id):
+    """The cached category with its checklist, or None for an inactive category."""
+    return template_tree().categories.get(work_category_id)
+
+
+def _bump_version():
+    cache.set(TEMPLATE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_templates():
+    """Move the version stamp on once the current transaction commits."""
+    transaction.on_commit(_bump_version)
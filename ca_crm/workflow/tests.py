@@ -1,3 +1,393 @@
+import io
+import os
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+from ca_crm import storage
+from ca_crm.testing import assert_query_budget, auth_headers
+from billing.models import TaskProfitability
+from clients.models import Customer
+from custom_auth.models import CustomUser
+from .instantiation import instantiate_assignments, read_assignment_sheet
+from .models import (
+    AssignedWorkActivity,
+    AssignedWorkRequiredFiles,
+    AssignmentProgress,
+    ClientWorkCategoryAssignment,
+    Department,
+    FileUpload,
+    ScheduleTaskTime,
+    WorkCategory,
+    WorkCategoryActivityList,
+    WorkCategoryDate,
+    WorkCategoryFilesRequired,
+)
+from .projections import ASSIGNMENT_BOARD
+from .recurrence import generate_recurring_work, occurrences
+from .rollups import filter_by_progress, refresh_progress
+from .template_cache import category_template
+from .uploads import process_uploads, retry_delay
 
-# Create your tests here.
+
+class WorkflowTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username="manager", email="manager@example.com", password="x")
+        self.headers = auth_headers(self.user)
+        self.customer = Customer.objects.create(name_of_business="Acme Traders", customer_code="ACME", created_by=self.user)
+        department = Department.objects.create(name="Tax", created_by=self.user)
+        self.category = WorkCategory.objects.create(name="GST return", department=department, created_by=self.user)
+        for order, name in enumerate(("Collect data", "File return")):
+            WorkCategoryActivityList.objects.create(
+                work_category=self.category, activity_name=name, assigned_percentage=50, display_order=order
+            )
+        WorkCategoryFilesRequired.objects.create(work_category=self.category, file_name="Sales register")
+        # The ledger is refreshed on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignments, errors = instantiate_assignments(self.category, [
+                {"customer_id": self.customer.id, "assigned_to_id": self.user.id, "task_name": f"Return {month}"}
+                for month in range(1, 4)
+            ])
+        self.assertEqual(errors, [])
+
+
+class BulkInstantiationTests(WorkflowTestCase):
+    def test_bulk_created_assignments_get_checklists_and_ledger_rows(self):
+        ids = [assignment.assignment_id for assignment in self.assignments]
+        self.assertEqual(AssignedWorkActivity.objects.filter(assignment_id__in=ids).count(), 6)
+        self.assertEqual(TaskProfitability.objects.filter(assignment_id__in=ids).count(), 3)
+
+
+class ChecklistSubmitTests(WorkflowTestCase):
+    def setUp(self):
+        super().setUp()
+        self.assignment = self.assignments[0]
+        self.url = reverse("submit-client-work-checklist", args=[self.assignment.assignment_id])
+        self.activity = AssignedWorkActivity.objects.filter(assignment=self.assignment).order_by("display_order").first()
+
+    def submit(self, payload):
+        return self.client.put(self.url, payload, content_type="application/json", **self.headers)
+
+    def test_submit_bumps_versions_and_progress(self):
+        response = self.submit({"activities": [{"id": self.activity.id, "version": 0, "status": "completed"}]})
+        self.assertEqual(response.status_code, 200)
+        self.activity.refresh_from_db()
+        self.assertEqual((self.activity.status, self.activity.version), ("completed", 1))
+        self.assertIsNotNone(self.activity.completion_date)
+
+    def test_stale_version_answers_409_and_writes_nothing(self):
+        other = AssignedWorkActivity.objects.filter(assignment=self.assignment).exclude(id=self.activity.id).first()
+        self.assertEqual(self.submit({"activities": [{"id": self.activity.id, "version": 0, "note": "first"}]}).status_code, 200)
+
+        response = self.submit({"activities": [
+            {"id": other.id, "version": 0, "note": "fresh"},
+            {"id": self.activity.id, "version": 0, "note": "stale"},
+        ]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["conflicts"],
+            [{"section": "activities", "id": self.activity.id, "expected_version": 0, "version": 1}],
+        )
+        other.refresh_from_db()
+        self.activity.refresh_from_db()
+        self.assertEqual((other.note, other.version), (None, 0))
+        self.assertEqual(self.activity.note, "first")
+
+    def test_file_rows_cannot_be_pointed_at_other_paths(self):
+        required = AssignedWorkRequiredFiles.objects.get(assignment=self.assignment)
+        for row in ({"id": required.id, "version": 0, "file_path": "file:///etc/hostname"}, {"id": required.id, "version": 0}):
+            response = self.submit({"required_files": [row]})
+            self.assertEqual(response.status_code, 400)
+        required.refresh_from_db()
+        self.assertEqual((required.file_path, required.version), (None, 0))
+
+
+class WorkflowQueryBudgetTests(WorkflowTestCase):
+    def setUp(self):
+        super().setUp()
+        start = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        for assignment in self.assignments:
+            ScheduleTaskTime.objects.create(
+                customer=self.customer, task=assignment, assigned_to=self.user,
+                start_time=start, end_time=start + timedelta(hours=2), created_by=self.user,
+            )
+
+    def test_task_board_summary(self):
+        response = assert_query_budget(self.client, "get", reverse("task-board-summary"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_consolidated_task_report(self):
+        response = assert_query_budget(self.client, "get", reverse("consolidate-task-details"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+        # Bulk-instantiated tasks are listed before any cost is booked
+        self.assertEqual(len(response.json()), 3)
+
+    def test_schedule_calendar(self):
+        response = assert_query_budget(self.client, "get", reverse("schedule-calendar"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+
+class RecurrenceTests(WorkflowTestCase):
+    def test_month_end_days_clamp_to_short_months(self):
+        self.assertEqual(
+            occurrences("monthly", [], date(2028, 1, 31), date(2028, 1, 31), date(2028, 4, 30)),
+            [date(2028, 2, 29), date(2028, 3, 31), date(2028, 4, 30)],
+        )
+        self.assertEqual(
+            occurrences("quarterly", [], date(2026, 11, 30), date(2026, 11, 30), date(2027, 6, 30)),
+            [date(2027, 2, 28), date(2027, 5, 30)],
+        )
+
+    def test_yearly_rule_on_29_february(self):
+        WorkCategoryDate.objects.create(work_category=self.category, date_type="yearly", day=29, month=2)
+        rules = list(self.category.dates.all())
+        self.assertEqual(
+            occurrences("yearly", rules, date(2026, 1, 1), date(2026, 1, 1), date(2029, 1, 1)),
+            [date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)],
+        )
+
+    def test_generation_is_idempotent_and_periods_are_not_series(self):
+        self.category.frequency = "monthly"
+        self.category.save()
+        source = self.assignments[0]
+        ClientWorkCategoryAssignment.objects.filter(assignment_id=source.assignment_id).update(
+            is_repetitive=True, start_date=date(2026, 1, 1), completion_date=date(2026, 1, 31)
+        )
+        result = generate_recurring_work(as_of=date(2026, 3, 25), lead_days=10, lookback_days=40)
+        self.assertEqual((result["created"], result["errors"]), (2, []))
+        periods = ClientWorkCategoryAssignment.objects.filter(recurrence_source_id=source.assignment_id)
+        self.assertEqual(
+            sorted(periods.values_list("period_due_date", flat=True)), [date(2026, 2, 28), date(2026, 3, 31)]
+        )
+        self.assertFalse(periods.filter(is_repetitive=True).exists())
+        self.assertEqual(generate_recurring_work(as_of=date(2026, 3, 25), lead_days=10, lookback_days=40)["created"], 0)
+
+        # Orphaned periods must not start series of their own
+        ClientWorkCategoryAssignment.objects.filter(assignment_id=source.assignment_id).delete()
+        self.assertEqual(generate_recurring_work(as_of=date(2026, 5, 25), lead_days=10, lookback_days=90)["planned"], 0)
+
+    def test_forecast_range_is_capped(self):
+        url = reverse("recurring_work_forecast")
+        response = self.client.get(url, {"as_of": "2026-01-01", "until": "2026-03-01"}, **auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, {"as_of": "2026-01-01", "until": "2030-01-01"}, **auth_headers(self.user))
+        self.assertEqual(response.status_code, 400)
+
+
+class ReportArchiveTests(WorkflowTestCase):
+    def test_archive_holds_one_pdf_per_assignment(self):
+        response = self.client.get(reverse("activity-report-archive"), {"customer_id": self.customer.id}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as bundle:
+            names = bundle.namelist()
+            self.assertEqual(len(names), 3)
+            self.assertTrue(all(bundle.read(name).startswith(b"%PDF") for name in names))
+
+    def test_archive_size_is_limited(self):
+        with mock.patch("workflow.reports.ACTIVITY_REPORT_BATCH_LIMIT", 2):
+            response = self.client.get(reverse("activity-report-archive"), {"customer_id": self.customer.id}, **self.headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("activity-report-archive"), {"customer_id": 0}, **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+class TemplateCacheTests(WorkflowTestCase):
+    def test_tree_is_served_from_memory_while_current(self):
+        self.assertEqual(len(category_template(self.category.id)["activities"]), 2)
+        with self.assertNumQueries(0):
+            category_template(self.category.id)
+
+    def test_template_writes_reload_the_tree_once_committed(self):
+        category_template(self.category.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkCategoryActivityList.objects.create(
+                work_category=self.category, activity_name="Review", assigned_percentage=0, display_order=2
+            )
+        activities = category_template(self.category.id)["activities"]
+        self.assertEqual([activity["activity_name"] for activity in activities], ["Collect data", "File return", "Review"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.is_active = False
+            self.category.save()
+        self.assertIsNone(category_template(self.category.id))
+
+
+class ChunkedUploadTests(WorkflowTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("staging", "media"):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            setattr(self, name, directory.name)
+        for patcher in (
+            mock.patch("workflow.uploads.UPLOAD_STAGING_DIR", self.staging),
+            mock.patch.dict(storage.BACKENDS, {"local": storage.LocalBackend(root=self.media, prefix="media")}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.row = AssignedWorkRequiredFiles.objects.filter(assignment=self.assignments[0]).first()
+
+    def start(self, total_size):
+        response = self.client.post(reverse("submit-client-work-uploads"), {
+            "target": "required_files", "target_id": self.row.id, "file_name": "sales.csv", "total_size": total_size,
+        }, content_type="application/json", **self.headers)
+        self.assertEqual(response.status_code, 201)
+        return response.json()["token"]
+
+    def put_chunk(self, token, offset, content):
+        return self.client.put(
+            reverse("submit-client-work-upload-chunk", args=[token]),
+            encode_multipart(BOUNDARY, {"offset": offset, "chunk": SimpleUploadedFile("chunk", content)}),
+            content_type=MULTIPART_CONTENT, **self.headers,
+        )
+
+    def test_chunks_must_follow_on_and_the_worker_sets_file_path(self):
+        token = self.start(10)
+        self.assertEqual(self.put_chunk(token, 0, b"abcdef").status_code, 200)
+        response = self.put_chunk(token, 0, b"abcdef")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["received_size"], 6)
+        self.assertEqual(self.put_chunk(token, 6, b"ghij").status_code, 202)
+
+        self.assertEqual(process_uploads(), {"done": 1, "retried": 0, "failed": 0})
+        upload = FileUpload.objects.get(token=token)
+        self.row.refresh_from_db()
+        self.assertEqual(upload.status, "done")
+        self.assertEqual(self.row.file_path, upload.file_path)
+        self.assertEqual(self.row.version, 1)
+        with storage.BACKENDS["local"].open(upload.file_path) as stored:
+            self.assertEqual(stored.read(), b"abcdefghij")
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_failed_pushes_back_off_then_give_up(self):
+        token = self.start(4)
+        self.put_chunk(token, 0, b"data")
+        FileUpload.objects.filter(token=token).update(max_attempts=2)
+        with mock.patch("workflow.uploads.storage.save", side_effect=OSError("storage down")):
+            self.assertEqual(process_uploads(), {"done": 0, "retried": 1, "failed": 0})
+            upload = FileUpload.objects.get(token=token)
+            self.assertEqual((upload.status, upload.attempts), ("pending", 1))
+            self.assertGreaterEqual(upload.next_attempt_at, timezone.now() + retry_delay(1) - timedelta(seconds=5))
+            self.assertEqual(process_uploads()["retried"], 0)
+            FileUpload.objects.filter(token=token).update(next_attempt_at=timezone.now())
+            self.assertEqual(process_uploads(), {"done": 0, "retried": 0, "failed": 1})
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.last_error), ("failed", "storage down"))
+        self.row.refresh_from_db()
+        self.assertIsNone(self.row.file_path)
+        self.assertEqual(os.listdir(self.staging), [])
+
+
+class ScheduleConflictTests(WorkflowTestCase):
+    def book(self, start, end, **extra):
+        return self.client.post(reverse("schedule_create_view"), {
+            "customer_id": self.customer.id, "task_id": self.assignments[0].assignment_id,
+            "assigned_to_id": self.user.id, "start_time": f"2026-05-04T{start}:00", "end_time": f"2026-05-04T{end}:00",
+            **extra,
+        }, content_type="application/json", **self.headers)
+
+    def test_overlapping_bookings_answer_409(self):
+        first = self.book("10:00", "11:00")
+        self.assertEqual(first.status_code, 201)
+        response = self.book("10:30", "11:30")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([conflict["id"] for conflict in response.json()["conflicts"]], [first.json()["id"]])
+        # Back to back is not an overlap, and overlaps can be forced
+        self.assertEqual(self.book("11:00", "12:00").status_code, 201)
+        self.assertEqual(self.book("10:30", "11:30", allow_overlap=True).status_code, 201)
+        self.assertEqual(self.book("12:00", "11:00").status_code, 400)
+
+    def test_updates_skip_the_booking_itself(self):
+        first, second = self.book("10:00", "11:00").json()["id"], self.book("11:00", "12:00").json()["id"]
+
+        def move(start, end):
+            return self.client.put(reverse("schedule_update", args=[first]), {
+                "customer_id": self.customer.id, "assigned_to_id": self.user.id, "mode_of_communication": "Call",
+                "start_time": f"2026-05-04T{start}:00", "end_time": f"2026-05-04T{end}:00",
+            }, content_type="application/json", **self.headers)
+
+        self.assertEqual(move("09:30", "10:30").status_code, 200)
+        self.assertEqual(move("10:30", "11:30").status_code, 409)
+        self.assertEqual(timezone.localtime(ScheduleTaskTime.objects.get(id=second).start_time).hour, 11)
+
+
+class ProgressRollupTests(WorkflowTestCase):
+    def complete(self, assignment, activity_name):
+        AssignedWorkActivity.objects.filter(assignment=assignment, activity=activity_name).update(status="completed")
+
+    def test_rollups_weigh_activities_and_drive_the_filters(self):
+        first, second, third = self.assignments
+        AssignedWorkActivity.objects.filter(assignment=first, activity="Collect data").update(assigned_percentage=20)
+        AssignedWorkActivity.objects.filter(assignment=first, activity="File return").update(assigned_percentage=80)
+        self.complete(first, "File return")
+        self.complete(second, "Collect data")
+        self.complete(second, "File return")
+        refresh_progress([assignment.assignment_id for assignment in self.assignments])
+
+        rollup = AssignmentProgress.objects.get(assignment=first)
+        self.assertEqual((rollup.completed_percentage, rollup.activity_count, rollup.completed_activities), (80.0, 2, 1))
+        assignments = ClientWorkCategoryAssignment.objects.filter(
+            assignment_id__in=[assignment.assignment_id for assignment in self.assignments]
+        )
+
+        def ids(params):
+            return list(filter_by_progress(assignments, params).values_list("assignment_id", flat=True))
+
+        self.assertEqual(
+            ids({"progress_gte": "50", "ordering": "-completed_percentage"}), [second.assignment_id, first.assignment_id]
+        )
+        self.assertEqual(ids({"progress_lt": "50"}), [third.assignment_id])
+        with self.assertRaises(ValueError):
+            ids({"due": "someday"})
+
+
+class AssignmentSheetTests(WorkflowTestCase):
+    def sheet(self, *rows):
+        workbook = Workbook()
+        workbook.active.append(["customer_id", "assigned_to_id", "task_name"])
+        for row in rows:
+            workbook.active.append(row)
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        return file
+
+    def test_rows_are_checked_chunk_by_chunk_with_excel_row_numbers(self):
+        file = self.sheet(
+            [self.customer.id, self.user.id, "Return 4"],
+            [0, self.user.id, "Unknown customer"],
+            [None, None, None],
+            [self.customer.id, 999, "Unknown user"],
+            ["abc", None, "Bad id"],
+            [self.customer.id, None, "Unassigned"],
+        )
+        # One id__in query per model and chunk, only for ids not seen before
+        with self.assertNumQueries(3):
+            rows, errors = read_assignment_sheet(file, self.category, self.user, chunk_size=2)
+        self.assertEqual([row["task_name"] for row in rows], ["Return 4", "Unassigned"])
+        self.assertEqual([error["row"] for error in errors], [3, 5, 6])
+        self.assertIn("999", errors[1]["error"])
+
+
+class ProjectionTests(WorkflowTestCase):
+    def test_board_rows_come_from_one_query(self):
+        (unassigned,), _ = instantiate_assignments(self.category, [{"customer_id": self.customer.id}])
+        assignments = ClientWorkCategoryAssignment.objects.filter(customer=self.customer).order_by("assignment_id")
+        with self.assertNumQueries(1):
+            rows = ASSIGNMENT_BOARD.apply(assignments)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            (rows[0]["customer"], rows[0]["department_name"], rows[0]["assigned_to"]), ("Acme Traders", "Tax", "manager")
+        )
+        self.assertEqual(rows[-1]["id"], unassigned.assignment_id)
+        self.assertEqual(rows[-1]["assigned_to"], "")
+        self.assertEqual(rows[-1]["progress_display"], unassigned.get_progress_display())
+        with self.assertRaises(ClientWorkCategoryAssignment.DoesNotExist):
+            ASSIGNMENT_BOARD.get(assignments, assignment_id=0)
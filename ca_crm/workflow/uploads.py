@@ -0,0 +1,241 @@
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from loguru import logger
+from ca_crm import storage
+from .models import AssignedWorkOutputFiles, AssignedWorkRequiredFiles, FileUpload
+
+
+UPLOAD_STAGING_DIR = getattr(settings, "UPLOAD_STAGING_DIR", os.path.join(settings.BASE_DIR, "upload_staging"))
+# Largest chunk accepted per request and largest file, in bytes
+UPLOAD_CHUNK_SIZE = getattr(settings, "UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024)
+UPLOAD_MAX_SIZE = getattr(settings, "UPLOAD_MAX_SIZE", 500 * 1024 * 1024)
+UPLOAD_BATCH_SIZE = getattr(settings, "UPLOAD_BATCH_SIZE", 10)
+UPLOAD_MAX_ATTEMPTS = getattr(settings, "UPLOAD_MAX_ATTEMPTS", 5)
+# Retry delay doubles after every failed push, starting at RETRY_BASE seconds
+UPLOAD_RETRY_BASE = getattr(settings, "UPLOAD_RETRY_BASE", 60)
+UPLOAD_RETRY_MAX = getattr(settings, "UPLOAD_RETRY_MAX", 3600)
+# Rows left in "uploading" longer than this (crashed worker) are picked up again
+UPLOAD_LOCK_TIMEOUT = getattr(settings, "UPLOAD_LOCK_TIMEOUT", 1800)
+# Sessions that stop receiving chunks for this many seconds are abandoned
+UPLOAD_SESSION_TTL = getattr(settings, "UPLOAD_SESSION_TTL", 24 * 3600)
+
+
+class UploadTarget:
+    """A checklist row type an upload can fill, and where its files are stored."""
+
+    def __init__(self, model, folder, backend=None):
+        self.model = model
+        self.folder = folder
+        self.backend = backend
+
+
+UPLOAD_TARGETS = {
+    "required_files": UploadTarget(AssignedWorkRequiredFiles, "requiredfiles"),
+    "output_files": UploadTarget(AssignedWorkOutputFiles, "output_files", backend="cloudinary"),
+}
+
+
+class UploadError(ValueError):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    """A chunk that does not start where the staged file ends; resume from received_size."""
+
+    def __init__(self, received_size):
+        super().__init__(f"Upload continues at byte {received_size}")
+        self.received_size = received_size
+
+
+def staged_path(upload):
+    return os.path.join(UPLOAD_STAGING_DIR, f"{upload.token.hex}.part")
+
+
+def _remove_staged(upload):
+    try:
+        os.remove(staged_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def upload_state(upload):
+    return {
+        "token": str(upload.token),
+        "target": upload.target,
+        "target_id": upload.target_id,
+        "file_name": upload.file_name,
+        "total_size": upload.total_size,
+        "received_size": upload.received_size,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "status": upload.status,
+        "file_path": upload.file_path,
+        "last_error": upload.last_error,
+    }
+
+
+def start_upload(target, target_id, file_name, total_size, created_by=None):
+    """Open an upload session for an active checklist row; chunks are then sent with append_chunk."""
+    if target not in UPLOAD_TARGETS:
+        raise UploadError(f"target must be one of {', '.join(UPLOAD_TARGETS)}")
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise UploadError("total_size must be a number of bytes")
+    if not 0 < total_size <= UPLOAD_MAX_SIZE:
+        raise UploadError(f"total_size must be between 1 and {UPLOAD_MAX_SIZE} bytes")
+    if not file_name:
+        raise UploadError("file_name is required")
+    if not UPLOAD_TARGETS[target].model.objects.filter(id=target_id, is_active=True).exists():
+        raise UploadError(f"No active {target} row {target_id}")
+
+    upload = FileUpload.objects.create(
+        target=target,
+        target_id=target_id,
+        file_name=os.path.basename(file_name)[:255],
+        total_size=total_size,
+        max_attempts=UPLOAD_MAX_ATTEMPTS,
+        created_by=created_by,
+    )
+    os.makedirs(UPLOAD_STAGING_DIR, exist_ok=True)
+    open(staged_path(upload), "wb").close()
+    return upload
+
+
+def append_chunk(token, offset, chunk):
+    """
+    Write an uploaded chunk at `offset` of the staged file. The offset must
+    be the number of bytes already received, so a retried or duplicated
+    chunk is refused with OffsetMismatch instead of corrupting the file.
+    The last chunk queues the upload for the worker.
+    """
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        raise UploadError("offset must be a number of bytes")
+    if chunk.size > UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunks may be at most {UPLOAD_CHUNK_SIZE} bytes")
+
+    with transaction.atomic():
+        upload = FileUpload.objects.select_for_update().get(token=token)
+        if upload.status != "receiving":
+            raise UploadError(f"Upload is {upload.status} and takes no more chunks")
+        if offset != upload.received_size:
+            raise OffsetMismatch(upload.received_size)
+        if offset + chunk.size > upload.total_size:
+            raise UploadError("Chunk runs past total_size")
+        with open(staged_path(upload), "r+b") as staged:
+            staged.seek(offset)
+            for piece in chunk.chunks():
+                staged.write(piece)
+            staged.truncate()
+        upload.received_size = offset + chunk.size
+        if upload.received_size == upload.total_size:
+            upload.status = "pending"
+            upload.next_attempt_at = timezone.now()
+        upload.save()
+    return upload
+
+
+def stage_file(target, target_id, file, created_by=None):
+    """Stage a whole uploaded file (written through in chunks) and queue it."""
+    upload = start_upload(target, target_id, file.name, file.size, created_by)
+    with open(staged_path(upload), "wb") as staged:
+        for piece in file.chunks():
+            staged.write(piece)
+    upload.received_size = upload.total_size
+    upload.status = "pending"
+    upload.next_attempt_at = timezone.now()
+    upload.save()
+    return upload
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(UPLOAD_RETRY_BASE * 2 ** max(attempts - 1, 0), UPLOAD_RETRY_MAX))
+
+
+def claim_uploads(batch_size=UPLOAD_BATCH_SIZE):
+    """Lock up to `batch_size` due uploads for this worker with a conditional UPDATE."""
+    now = timezone.now()
+    due = FileUpload.objects.filter(
+        Q(status="pending", next_attempt_at__lte=now)
+        | Q(status="uploading", locked_at__lt=now - timedelta(seconds=UPLOAD_LOCK_TIMEOUT))
+    )
+    ids = list(due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    due.filter(id__in=ids).update(status="uploading", lock_token=token, locked_at=now)
+    return list(FileUpload.objects.filter(lock_token=token, status="uploading").order_by("id"))
+
+
+def push_upload(upload):
+    """Store the staged file and point the target row at it."""
+    target = UPLOAD_TARGETS[upload.target]
+    with open(staged_path(upload), "rb") as staged:
+        path = storage.save(File(staged, name=upload.file_name), target.folder, target.backend)
+    now = timezone.now()
+    with transaction.atomic():
+        target.model.objects.filter(id=upload.target_id).update(
+            file_path=path, version=F("version") + 1, updated_date=now,
+        )
+        FileUpload.objects.filter(id=upload.id, lock_token=upload.lock_token).update(
+            status="done", file_path=path, attempts=upload.attempts + 1, last_error=None,
+            lock_token=None, locked_at=None, updated_date=now,
+        )
+    _remove_staged(upload)
+    return path
+
+
+def _mark_failed(upload, error):
+    """Schedule a retry with backoff, or give up (and drop the staged file) after max_attempts."""
+    now = timezone.now()
+    attempts = upload.attempts + 1
+    gave_up = attempts >= upload.max_attempts
+    FileUpload.objects.filter(id=upload.id, lock_token=upload.lock_token).update(
+        status="failed" if gave_up else "pending",
+        attempts=attempts,
+        next_attempt_at=now if gave_up else now + retry_delay(attempts),
+        last_error=str(error),
+        lock_token=None, locked_at=None, updated_date=now,
+    )
+    if gave_up:
+        _remove_staged(upload)
+    return gave_up
+
+
+def process_uploads(batch_size=UPLOAD_BATCH_SIZE, max_batches=None):
+    """Push due uploads batch by batch until none are left; returns counts."""
+    totals = {"done": 0, "retried": 0, "failed": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        uploads = claim_uploads(batch_size)
+        if not uploads:
+            break
+        for upload in uploads:
+            try:
+                push_upload(upload)
+            except Exception as e:
+                logger.error(f"Failed to store upload {upload.token} ({upload.file_name}). Error: {e}")
+                totals["failed" if _mark_failed(upload, e) else "retried"] += 1
+                continue
+            totals["done"] += 1
+        batches += 1
+    return totals
+
+
+def expire_sessions():
+    """Fail sessions that stopped receiving chunks UPLOAD_SESSION_TTL seconds ago; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=UPLOAD_SESSION_TTL)
+    stale = list(FileUpload.objects.filter(status="receiving", updated_date__lt=cutoff))
+    for upload in stale:
+        _remove_staged(upload)
+    FileUpload.objects.filter(id__in=[upload.id for upload in stale]).update(
+        status="failed", last_error="Upload abandoned", updated_date=timezone.now(),
+    )
+    return len(stale)
@@ -45,6 +45,10 @@ from .views import (
     SubmitClientWorkActivityList,
     SubmitClientWorkActivityStage,
     SubmitClientWorkOutputFiles,
+    SubmitClientWorkChecklist,
+    ClientWorkFileUploadView,
+    ClientWorkFileUploadChunkView,
+    TaskBoardSummaryView,
     SubmitClientWorkAdditionalActivity,
     SubmitClientWorkAdditionalFiles,
     SubmitReviewByView,
@@ -55,6 +59,8 @@ from .views import (
     WorkCategoryUploadDocumentRequiredBulkCreateAPIView,
     WorkCategoryActivityListBulkCreateAPIView,
     SendActivityReportPDFAPIView,
+    ActivityReportPDFView,
+    ActivityReportArchiveView,
     WorkCategoryOutputFileBulkCreateAPIView,
 
     ConsolidatedTaskDetailsWithExpensesAndBillingView,
@@ -64,6 +70,7 @@ from .views import (
     ScheduleTaskTimeUpdateView,
     ScheduleTaskTimeDeleteView,
     ScheduleTaskTimeListView,
+    ScheduleCalendarView,
 
     ClientWorkReminderCreateView,
     ClientWorkReminderListView,
@@ -71,6 +78,8 @@ from .views import (
     ClientWorkReminderRetrieveView,
     ClientWorkReminderUpdateView,
     ClientWorkReminderDeleteView,
+    RecurringWorkGenerateView,
+    RecurringWorkForecastView,
 )
 
 urlpatterns = [
@@ -112,6 +121,7 @@ urlpatterns = [
     path('client-work-category-assignment/create/', ClientWorkCategoryAssignmentCreateView.as_view(), name='client_work_category_assignment_create'),
     path('client-work-category-assignment/get/<int:assignment_id>/', ClientWorkCategoryAssignmentRetrieveView.as_view(), name='client_work_category_assignment_get'),
     path('client-work-category-assignment/get/', ClientWorkCategoryAssignmentListView.as_view(), name='client_work_category_assignment_get'),
+    path('client-work-category-assignment/summary/', TaskBoardSummaryView.as_view(), name='task-board-summary'),
     path('client-work-category-assignment/filter/', ClientWorkCategoryAssignmentFilteredListView.as_view(), name='client_work_category_assignment_get_filter'),
     path('client-work-category-assignment/update/<int:assignment_id>/', ClientWorkCategoryAssignmentUpdateView.as_view(), name='client_work_category_assignment_update'),
     path('client-work-category-assignment/delete/<int:assignment_id>/', ClientWorkCategoryAssignmentDeleteView.as_view(), name='client_work_category_assignment_delete'),
@@ -120,12 +130,17 @@ urlpatterns = [
     path('submit-client-work/activity-list/<int:assignment_id>/', SubmitClientWorkActivityList.as_view(), name="submit-client-work-activity-list"),
     path('submit-client-work/activity-stage/<int:assignment_id>/', SubmitClientWorkActivityStage.as_view(), name="submit-client-work-activity-stage"),
     path('submit-client-work/output-files/<int:assignment_id>/', SubmitClientWorkOutputFiles.as_view(), name="submit-client-work-required-files"),
+    path('submit-client-work/checklist/<int:assignment_id>/', SubmitClientWorkChecklist.as_view(), name="submit-client-work-checklist"),
+    path('submit-client-work/uploads/', ClientWorkFileUploadView.as_view(), name="submit-client-work-uploads"),
+    path('submit-client-work/uploads/<uuid:token>/', ClientWorkFileUploadChunkView.as_view(), name="submit-client-work-upload-chunk"),
     path('submit-client-work/additional-files/<int:assignment_id>/', SubmitClientWorkAdditionalFiles.as_view(), name="submit-client-work-additional-files"),
     path('submit-client-work/additional-activity/<int:assignment_id>/', SubmitClientWorkAdditionalActivity.as_view(), name="submit-client-work-additional-activities"),
 
     path('submit-client-work/review-submission/<int:assignment_id>/', SubmitReviewByView.as_view(), name="submit-client-work-review-submission"),
     path('send-client-work/output-files/', SendFilesToClientAPIView.as_view(), name="send-client-work-output-files-email"),
     path('send-client-work/task-status/<int:assignment_id>/', SendActivityReportPDFAPIView.as_view(), name="send-client-work-task-status"),
+    path('client-work-category-assignment/<int:assignment_id>/activity-report/', ActivityReportPDFView.as_view(), name="activity-report-pdf"),
+    path('client-work-category-assignment/activity-reports/', ActivityReportArchiveView.as_view(), name="activity-report-archive"),
     
 
     path('bulk-upload/required-files/', WorkCategoryUploadDocumentRequiredBulkCreateAPIView.as_view(), name="files-required-bulk-create"),
@@ -136,6 +151,7 @@ urlpatterns = [
 
     path('schedule/create/', ScheduleTaskTimeCreateView.as_view(), name='schedule_create_view'),
     path('schedule/get/', ScheduleTaskTimeListView.as_view(), name='schedule_list_view'),
+    path('schedule/calendar/', ScheduleCalendarView.as_view(), name='schedule-calendar'),
     path('schedule/retrieve/<int:id>/', ScheduleTaskTimeDetailView.as_view(), name='schedule_retrieve'),
     path('schedule/update/<int:id>/', ScheduleTaskTimeUpdateView.as_view(), name='schedule_update'),
     path('schedule/delete/<int:id>/', ScheduleTaskTimeDeleteView.as_view(), name='schedule_deactivate'),
@@ -148,4 +164,7 @@ urlpatterns = [
     path('reminder/update/<int:reminder_id>/', ClientWorkReminderUpdateView.as_view(), name='reminder_update'),
     path('reminder/delete/<int:reminder_id>/', ClientWorkReminderDeleteView.as_view(), name='reminder_deactivate'),
 
+    path('recurring-work/generate/', RecurringWorkGenerateView.as_view(), name='recurring_work_generate'),
+    path('recurring-work/forecast/', RecurringWorkForecastView.as_view(), name='recurring_work_forecast'),
+
 ]
\ No newline at end of file
@@ -1,11 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from rest_framework import status
-from openpyxl import load_workbook
-from ca_crm.email_service import send_email
-import pandas as pd
+from ca_crm.email_service import enqueue_email
 from .models import (
     Department,
     WorkCategory,
@@ -19,62 +15,66 @@ from .models import (
     AssignedWorkActivity,
     AssignedWorkActivityStages,
     AssignedWorkOutputFiles,
+    AssignmentProgress,
+    FileUpload,
     ScheduleTaskTime,
     ClientWorkReminder,
 )
 from employees.models import TimeTracking 
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
+from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 import jwt 
 from django.conf import settings
 from custom_auth.models import CustomUser
+from custom_auth.principal import resolve_principal
+from .projections import ASSIGNMENT_BOARD, ASSIGNMENT_SUMMARY
+from .instantiation import WorkCategoryTemplate, instantiate_assignments, read_assignment_sheet
+from ca_crm.params import date_param
+from .rollups import refresh_progress, filter_by_progress
+from .template_cache import department_categories, invalidate_templates
+from .checklist import submit_checklist, checklist_state, StaleChecklist
+from .uploads import start_upload, append_chunk, stage_file, upload_state, UploadError, OffsetMismatch
+from .board import board_summary
+from .schedules import schedule_calendar, check_conflicts, clean_interval, ScheduleConflict
+from .reports import report_assignments, report_data, report_body, report_archive
+from .report_renderer import render_report
+from .recurrence import (
+    generate_recurring_work,
+    forecast_recurring_work,
+    RECURRING_WORK_LEAD_DAYS,
+    RECURRING_WORK_LOOKBACK_DAYS,
+    RECURRING_WORK_FORECAST_MAX_DAYS,
+)
+from ca_crm.pagination import paginate_keyset, InvalidCursor
+from ca_crm.importer import run_import, is_dry_run, ImportFileError
+from .imports import FILES_REQUIRED_IMPORT, ACTIVITY_LIST_IMPORT, OUTPUT_FILES_IMPORT
 from django.db import models
 from clients.models import Customer
 from django.db import transaction
 import os
-import uuid
-from django.core.files.storage import FileSystemStorage
-import posixpath
+from ca_crm import storage
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse
 from django.db.models import Sum, F, OuterRef, Subquery, Prefetch, Count
 from billing.models import (
-    ClientWorkCategoryAssignment, Expense, Billing, BillItems, ExpenseItems, Receipt, ReceiptInvoice
+    ClientWorkCategoryAssignment, Expense, Billing, BillItems, ExpenseItems, Receipt, ReceiptInvoice, TaskProfitability
 )
 
-import cloudinary.uploader
-import cloudinary.api
-
-
-def upload_to_cloudinary(file):
-    """Uploads a file to Cloudinary and returns the file URL."""
-    try:
-        result = cloudinary.uploader.upload(file)
-        return result.get("secure_url")  # Returns the public URL of the uploaded file
-    except Exception as e:
-        raise Exception(f"Cloudinary Upload Error: {e}")
-
-
-def get_cloudinary_file(file_url):
-    """Fetches a specific file from Cloudinary."""
-    try:
-        public_id = file_url.split("/")[-1].split(".")[0]  # Extract public ID from URL
-        resource = cloudinary.api.resource(public_id)
-        return resource.get("secure_url")  # Return the file URL
-    except Exception as e:
-        raise Exception(f"Cloudinary Fetch Error: {e}")
-
-
 
 class ModifiedApiview(APIView):
     permission_classes = [IsAuthenticated]
 
     def get_user_from_token(self, request):
-        token = request.headers.get("Authorization", "").split(" ")[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user_id = payload.get("user_id")
-            user = CustomUser.objects.get(id=user_id)
+        # JWTAuthentication has already resolved the user for this request
+        user = getattr(request, "user", None)
+        if isinstance(user, CustomUser):
             return user
-        except (jwt.ExpiredSignatureError, jwt.DecodeError, CustomUser.DoesNotExist):
+        try:
+            token = request.headers.get("Authorization", "").split(" ")[1]
+            return resolve_principal(token)
+        except (IndexError, KeyError, jwt.ExpiredSignatureError, jwt.DecodeError, CustomUser.DoesNotExist):
             return None
 
 
@@ -350,20 +350,11 @@ class GetDepartmentWorkCategoriesAPIView(ModifiedApiview):
             user = self.get_user_from_token(request)
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
-            work_categories = WorkCategory.objects.filter(department_id=id, is_active=True).values("id", "name", "fees")
-            data = []
-            for work_category in work_categories:
-                wc_data = {
-                    "id": work_category["id"],
-                    "name": work_category["name"],
-                    "fees": work_category["fees"],
-                    "files_required": list(WorkCategoryFilesRequired.objects.filter(work_category_id=work_category["id"], is_active=True).values("file_name", "id")),
-                    "activities": list(WorkCategoryActivityList.objects.filter(work_category_id=work_category["id"], is_active=True).values("activity_name", "assigned_percentage", "id")),
-                    "activity_stages": list(WorkCategoryActivityStages.objects.filter(work_category_id=work_category["id"], is_active=True).values("activity_stage", "description", "id")),
-                    "output_files": list(WorkCategoryUploadDocumentRequired.objects.filter(work_category_id=work_category["id"], is_active=True).values("file_name", "id")),
-                }
-                data.append(wc_data)
-            return Response(data, status=status.HTTP_200_OK)        
+            data = [
+                {key: category[key] for key in ("id", "name", "fees", "files_required", "activities", "activity_stages", "output_files")}
+                for category in department_categories(id)
+            ]
+            return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -794,36 +785,8 @@ class WorkCategoryUploadDocumentRequiredDeactivateAPIView(ModifiedApiview):
 
 def assign_activities_and_files(assignment, work_category):
     try:
-        required_files = WorkCategoryFilesRequired.objects.filter(work_category=work_category)
-        for file in required_files:
-            assigned_file = AssignedWorkRequiredFiles.objects.create(
-                assignment=assignment,
-                file_name=file.file_name,
-                is_active=True
-            )
-            assigned_file.save()
-
-        # Copy activity list
-        activities = WorkCategoryActivityList.objects.filter(work_category=work_category)
-        for activity in activities:
-            assigned_task = AssignedWorkActivity.objects.create(
-                assignment=assignment,
-                activity=activity.activity_name,
-                assigned_percentage=activity.assigned_percentage,
-                is_active=True
-            )
-            assigned_task.save()
-
-        # Copy output document requirements
-        output_files = WorkCategoryUploadDocumentRequired.objects.filter(work_category=work_category)
-        for file in output_files:
-            assigned_file = AssignedWorkOutputFiles.objects.create(
-                assignment=assignment,
-                file_name=file.file_name,
-                is_active=True
-            )
-            assigned_file.save()
-        return True    
+        WorkCategoryTemplate.load(work_category).apply([assignment])
+        return True
     except Exception as e:
         return False
 
@@ -863,64 +826,25 @@ class ClientWorkCategoryAssignmentCreateView(ModifiedApiview):
             customer = Customer.objects.get(id=customer_id)
             work_category = WorkCategory.objects.get(id=work_category_id)
 
-            with transaction.atomic():
-                assignment = ClientWorkCategoryAssignment.objects.create(
-                    customer=customer,
-                    work_category=work_category,
-                    assigned_to=assigned_to,
-                    assigned_by=assigned_by,
-                    review_by=review_by,
-                    allocated_hours=data.get("allocated_hours", 0),
-                    task_name=data.get("task_name", ""),
-                    progress=data.get("status", "pending_from_client_side"),
-                    priority=data.get("priority", 1),
-                    start_date=data.get("start_date"),
-                    instructions=data.get("instructions", ""),
-                    completion_date=data.get("completion_date"),
-                    is_repetitive=is_repetitive,
-                    created_date=datetime.now(),
-                    created_by=request.user,
-                    updated_by=request.user
-                )
-                required_files = WorkCategoryFilesRequired.objects.filter(work_category=work_category)
-                for file in required_files:
-                    assigned_file = AssignedWorkRequiredFiles.objects.create(
-                        assignment=assignment,
-                        file_name=file.file_name,
-                        display_order=file.display_order,
-                        is_active=True
-                    )
-
-                # Copy activity list
-                activities = WorkCategoryActivityList.objects.filter(work_category=work_category)
-                for activity in activities:
-                    assigned_task = AssignedWorkActivity.objects.create(
-                        assignment=assignment,
-                        activity=activity.activity_name,
-                        assigned_percentage=activity.assigned_percentage,
-                        display_order=activity.display_order,
-                        is_active=True
-                    )
-
-                # copy activity stages
-                activity_stages = WorkCategoryActivityStages.objects.filter(work_category=work_category)
-                for stage in activity_stages:
-                    assigned_stage = AssignedWorkActivityStages.objects.create(
-                        assignment=assignment,
-                        activity_stage=stage.activity_stage,
-                        display_order=stage.display_order,
-                        is_active=True
-                    )
-
-                # Copy output document requirements
-                output_files = WorkCategoryUploadDocumentRequired.objects.filter(work_category=work_category)
-                for file in output_files:
-                    assigned_file = AssignedWorkOutputFiles.objects.create(
-                        assignment=assignment,
-                        file_name=file.file_name,
-                        display_order=file.display_order,
-                        is_active=True
-                    )
+            assignments, errors = instantiate_assignments(work_category, [{
+                "customer_id": customer.id,
+                "assigned_to_id": assigned_to.id if assigned_to else None,
+                "assigned_by_id": assigned_by.id if assigned_by else None,
+                "review_by_id": review_by.id if review_by else None,
+                "allocated_hours": data.get("allocated_hours", 0),
+                "task_name": data.get("task_name", ""),
+                "progress": data.get("status", "pending_from_client_side"),
+                "priority": data.get("priority", 1),
+                "start_date": data.get("start_date"),
+                "instructions": data.get("instructions", ""),
+                "completion_date": data.get("completion_date"),
+                "is_repetitive": is_repetitive,
+                "created_by_id": request.user.id,
+                "updated_by_id": request.user.id,
+            }])
+            if errors:
+                return Response({"error": errors[0]["error"]}, status=status.HTTP_400_BAD_REQUEST)
+            assignment = assignments[0]
 
             return Response({"message": "Assignment created successfully", "id": assignment.assignment_id}, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -944,103 +868,17 @@ class BulkClientWorkCategoryAssignmentCreateView(ModifiedApiview):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Save the uploaded file temporarily
-            file_name = default_storage.save(excel_file.name, ContentFile(excel_file.read()))
-            file_path = default_storage.path(file_name)
-
-            # Read the Excel file
-            df = pd.read_excel(file_path)
-
-            # Fetch related objects
             work_category = WorkCategory.objects.get(id=work_category_id)
 
-            with transaction.atomic():
-                for index, row in df.iterrows():
-                    customer_id = row.get("customer_id")
-                    assigned_to_id = row.get("assigned_to_id", "")
-                    assigned_by_id = row.get("assigned_by_id", "")
-                    review_by_id = row.get("review_by_id", "")
-                    is_repetitive = row.get("is_repetitive", False)
-
-                    if assigned_to_id:
-                        assigned_to = CustomUser.objects.get(id=assigned_to_id)
-                        assigned_by = CustomUser.objects.get(id=assigned_by_id)
-                        review_by = CustomUser.objects.get(id=review_by_id)
-                    else:
-                        assigned_to = None
-                        assigned_by = None
-                        review_by = None
-
-                    if isinstance(is_repetitive,str):
-                        is_repetitive = is_repetitive.lower() == 'true'
-                        
-                    assigned_by = user
-
-                    customer = Customer.objects.get(id=customer_id)
-
-                    assignment = ClientWorkCategoryAssignment.objects.create(
-                        customer=customer,
-                        work_category=work_category,
-                        assigned_to=assigned_to,
-                        assigned_by=assigned_by,
-                        review_by=review_by,
-                        task_name=row.get("task_name", ""),
-                        progress=row.get("status", "pending_from_client_side"),
-                        priority=row.get("priority", 1),
-                        start_date=row.get("start_date"),
-                        instructions=row.get("instructions", ""),
-                        completion_date=row.get("completion_date"),
-                        is_repetitive=is_repetitive,
-                        created_date=datetime.now(),
-                        created_by=user,
-                        updated_by=user
-                    )
+            # Stream the sheet from the upload and validate it before any write
+            rows, errors = read_assignment_sheet(excel_file, work_category, user)
+            if not errors:
+                _, errors = instantiate_assignments(work_category, rows)
 
-                    # Copy required files
-                    required_files = WorkCategoryFilesRequired.objects.filter(work_category=work_category)
-                    for file in required_files:
-                        AssignedWorkRequiredFiles.objects.create(
-                            assignment=assignment,
-                            file_name=file.file_name,
-                            display_order=file.display_order,
-                            is_active=True
-                        )
-
-                    # Copy activity list
-                    activities = WorkCategoryActivityList.objects.filter(work_category=work_category)
-                    for activity in activities:
-                        AssignedWorkActivity.objects.create(
-                            assignment=assignment,
-                            activity=activity.activity_name,
-                            assigned_percentage=activity.assigned_percentage,
-                            display_order=activity.display_order,
-                            is_active=True
-                        )
-
-                    # Copy activity stages
-                    activity_stages = WorkCategoryActivityStages.objects.filter(work_category=work_category)
-                    for stage in activity_stages:
-                        AssignedWorkActivityStages.objects.create(
-                            assignment=assignment,
-                            activity_stage=stage.activity_stage,
-                            display_order=stage.display_order,
-                            is_active=True
-                        )
-
-                    # Copy output document requirements
-                    output_files = WorkCategoryUploadDocumentRequired.objects.filter(work_category=work_category)
-                    for file in output_files:
-                        AssignedWorkOutputFiles.objects.create(
-                            assignment=assignment,
-                            file_name=file.file_name,
-                            display_order=file.display_order,
-                            is_active=True
-                        )
-
-            # Delete the temporary file
-            default_storage.delete(file_name)
-
-            return Response({"message": "Bulk assignments created successfully"}, status=status.HTTP_201_CREATED)
+            if errors:
+                return Response({"error": "No assignments were created", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({"message": "Bulk assignments created successfully", "created": len(rows)}, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1054,33 +892,35 @@ class ClientWorkCategoryAssignmentListView(ModifiedApiview):
             start_date = request.GET.get("start_date", None)
             end_date = request.GET.get("end_date", None)
             assignments = ClientWorkCategoryAssignment.objects.filter(is_active=True, start_date__gte=start_date, start_date__lte=end_date)
-            data = []
-            for assignment in assignments:
-                data.append({
-                    "id": assignment.assignment_id,
-                    "task_name": assignment.task_name,
-                    "customer_id": assignment.customer.id,
-                    "customer": assignment.customer.name_of_business,
-                    "work_category": assignment.work_category.name,
-                    "work_category_id": assignment.work_category.id,
-                    "department_name": assignment.work_category.department.name,
-                    "allocated_hours": assignment.allocated_hours,
-                    "department_id": assignment.work_category.department.id,
-                    "assigned_to": assignment.assigned_to.username if assignment.assigned_to else "",
-                    "assigned_by": assignment.assigned_by.username if assignment.assigned_by else "",
-                    "review_by": assignment.review_by.username if assignment.review_by else "",
-                    "progress": assignment.progress,
-                    "progress_display": assignment.get_progress_display(),
-                    "priority": assignment.priority,
-                    "priority_display": assignment.get_priority_display(),
-                    "start_date": assignment.start_date,
-                    "completion_date": assignment.completion_date,
-                })
+            try:
+                assignments = filter_by_progress(assignments, request.GET)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            data = ASSIGNMENT_BOARD.apply(assignments)
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TaskBoardSummaryView(ModifiedApiview):
+    """
+    Assignment counts and allocated hours per progress, priority, assignee,
+    reviewer, department and due bucket. Filters: start_date / end_date
+    (start date window), department_id, work_category_id, customer_id,
+    assigned_to and review_by.
+    """
+    def get(self, request):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            return Response(board_summary(request.query_params), status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class ClientWorkCategoryAssignmentFilteredListView(ModifiedApiview):
     def get(self, request):
         try:
@@ -1091,27 +931,11 @@ class ClientWorkCategoryAssignmentFilteredListView(ModifiedApiview):
             assignments = ClientWorkCategoryAssignment.objects.filter(is_active=True)
             if client_id:
                 assignments = assignments.filter(customer__id=client_id)
-            data = []
-            for assignment in assignments:
-                data.append({
-                    "id": assignment.assignment_id,
-                    "task_name": assignment.task_name,
-                    "customer": assignment.customer.name_of_business,
-                    "work_category": assignment.work_category.name,
-                    "work_category_id":assignment.work_category.id,
-                    "department_name": assignment.work_category.department.name,
-                    "department_id": assignment.work_category.department.id,
-                    "allocated_hours": assignment.allocated_hours,
-                    "assigned_to": assignment.assigned_to.username if assignment.assigned_to else "",
-                    "assigned_by": assignment.assigned_by.username if assignment.assigned_by else "",
-                    "review_by": assignment.review_by.username if assignment.review_by else "",
-                    "progress": assignment.progress,
-                    "progress_display": assignment.get_progress_display(),
-                    "priority": assignment.priority,
-                    "priority_display": assignment.get_priority_display(),
-                    "start_date": assignment.start_date,
-                    "completion_date": assignment.completion_date,
-                })
+            try:
+                assignments = filter_by_progress(assignments, request.GET)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            data = ASSIGNMENT_BOARD.apply(assignments)
             return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -1152,6 +976,10 @@ class ClientWorkCategoryAssignmentRetrieveView(ModifiedApiview):
                 "activities": list(assignment.activities.values("activity", "assigned_percentage", "status", "id", "completion_date")),
                 "activity_stage": list(assignment.activity_stages.values("activity_stage", "status", "id")),
                 "output_files": list(assignment.output_files.values("file_name", "file_path", "id")),
+                "progress_rollup": AssignmentProgress.objects.filter(assignment=assignment).values(
+                    "completed_percentage", "activity_count", "completed_activities", "in_progress_activities",
+                    "stage_count", "completed_stages", "last_activity_at",
+                ).first(),
             }
             return Response(data, status=status.HTTP_200_OK)
         except ClientWorkCategoryAssignment.DoesNotExist:
@@ -1219,11 +1047,7 @@ class SubmitClientWorkRequiredFiles(ModifiedApiview):
                 assigned_file = AssignedWorkRequiredFiles.objects.get(id=file_data.get("id"), is_active=True)
                 attachment_file = file_data.get("file")
                 if attachment_file:
-                    ext = os.path.splitext(attachment_file)[1]
-                    short_unique_filename = f"{uuid.uuid4().hex}{ext}"
-                    fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'requiredfiles'))
-                    logo_path = fs.save(short_unique_filename, attachment_file)
-                    attachments_url = posixpath.join('media/invoice_attachments', logo_path)
+                    attachments_url = storage.save(attachment_file, 'requiredfiles')
                 else:
                     attachments_url = None
                 assigned_file.file_path = attachments_url
@@ -1244,14 +1068,16 @@ class SubmitClientWorkActivityList(ModifiedApiview):
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id, is_active=True)
             data = request.data
-            for file_data in data.get("required_files", []):
-                assigned_file = AssignedWorkActivity.objects.get(id=file_data.get("id"), is_active=True)
-                assigned_file.status = file_data.get("status")
-                assigned_file.note = file_data.get("note")
-                if file_data.get("status") == "completed":
-                    assigned_file.completion_date = datetime.now()
-                assigned_file.updated_date = datetime.now()
-                assigned_file.save()
+            with transaction.atomic():
+                for file_data in data.get("required_files", []):
+                    assigned_file = AssignedWorkActivity.objects.get(id=file_data.get("id"), assignment=assignment, is_active=True)
+                    assigned_file.status = file_data.get("status")
+                    assigned_file.note = file_data.get("note")
+                    if file_data.get("status") == "completed":
+                        assigned_file.completion_date = datetime.now()
+                    assigned_file.updated_date = datetime.now()
+                    assigned_file.save()
+                refresh_progress([assignment.assignment_id])
 
             return Response({"message": "Assignment updated successfully"}, status=status.HTTP_200_OK)
         except ClientWorkCategoryAssignment.DoesNotExist:
@@ -1268,11 +1094,13 @@ class SubmitClientWorkActivityStage(ModifiedApiview):
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id, is_active=True)
             data = request.data
-            for file_data in data.get("required_files", []):
-                assigned_file = AssignedWorkActivityStages.objects.get(id=file_data.get("id"), is_active=True)
-                assigned_file.status = file_data.get("status")
-                assigned_file.note = file_data.get("note")
-                assigned_file.save()
+            with transaction.atomic():
+                for file_data in data.get("required_files", []):
+                    assigned_file = AssignedWorkActivityStages.objects.get(id=file_data.get("id"), assignment=assignment, is_active=True)
+                    assigned_file.status = file_data.get("status")
+                    assigned_file.note = file_data.get("note")
+                    assigned_file.save()
+                refresh_progress([assignment.assignment_id])
 
             return Response({"message": "Assignment updated successfully"}, status=status.HTTP_200_OK)
         except ClientWorkCategoryAssignment.DoesNotExist:
@@ -1298,7 +1126,7 @@ class SubmitClientWorkOutputFiles(ModifiedApiview):
                 attachment_file = file_data.get("file")
 
                 if attachment_file:
-                    assigned_file.file_path = upload_to_cloudinary(attachment_file)
+                    assigned_file.file_path = storage.save(attachment_file, 'output_files', backend="cloudinary")
                 else:
                     assigned_file.file_path = None
 
@@ -1312,6 +1140,112 @@ class SubmitClientWorkOutputFiles(ModifiedApiview):
             return Response({"error": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class SubmitClientWorkChecklist(ModifiedApiview):
+    """
+    GET returns the assignment's checklist rows with their versions; PUT
+    applies a batch of changes to them (see workflow.checklist) and answers
+    409 with the conflicting rows when any of them changed since it was read.
+    """
+    def get(self, request, assignment_id):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id, is_active=True)
+            return Response(checklist_state(assignment), status=status.HTTP_200_OK)
+        except ClientWorkCategoryAssignment.DoesNotExist:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def put(self, request, assignment_id):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id, is_active=True)
+            if not isinstance(request.data, dict):
+                return Response({"error": "Expected an object of checklist sections"}, status=status.HTTP_400_BAD_REQUEST)
+            state = submit_checklist(assignment, request.data)
+            return Response(state, status=status.HTTP_200_OK)
+        except ClientWorkCategoryAssignment.DoesNotExist:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        except StaleChecklist as e:
+            return Response({"error": str(e), "conflicts": e.conflicts}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ClientWorkFileUploadView(ModifiedApiview):
+    """
+    Starts a background upload of a required or output file. Send the
+    whole `file` to have it queued at once (202), or file_name and
+    total_size to open a resumable session (201) and PUT its chunks to
+    ClientWorkFileUploadChunkView.
+    """
+    def post(self, request):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            target = request.data.get("target")
+            target_id = request.data.get("target_id")
+            if not str(target_id or "").isdigit():
+                return Response({"error": "target_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+            file = request.FILES.get("file")
+            if file:
+                upload = stage_file(target, int(target_id), file, created_by=user)
+                return Response(upload_state(upload), status=status.HTTP_202_ACCEPTED)
+            upload = start_upload(
+                target, int(target_id), request.data.get("file_name"), request.data.get("total_size"), created_by=user
+            )
+            return Response(upload_state(upload), status=status.HTTP_201_CREATED)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ClientWorkFileUploadChunkView(ModifiedApiview):
+    """
+    GET reports an upload's progress (resume from received_size); PUT sends
+    the next `chunk` at `offset`, answering 409 with the expected offset
+    when it does not follow on from what was received.
+    """
+    def get(self, request, token):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            return Response(upload_state(FileUpload.objects.get(token=token)), status=status.HTTP_200_OK)
+        except FileUpload.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def put(self, request, token):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            chunk = request.FILES.get("chunk")
+            if not chunk:
+                return Response({"error": "chunk is required"}, status=status.HTTP_400_BAD_REQUEST)
+            upload = append_chunk(token, request.data.get("offset"), chunk)
+            code = status.HTTP_202_ACCEPTED if upload.status == "pending" else status.HTTP_200_OK
+            return Response(upload_state(upload), status=code)
+        except FileUpload.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        except OffsetMismatch as e:
+            return Response({"error": str(e), "received_size": e.received_size}, status=status.HTTP_409_CONFLICT)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class SubmitClientWorkAdditionalActivity(ModifiedApiview):
     def put(self, request, assignment_id):
         try:
@@ -1320,12 +1254,14 @@ class SubmitClientWorkAdditionalActivity(ModifiedApiview):
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id, is_active=True)
             data = request.data
-            for file_data in data.get("required_files", []):
-                assigned_file = AssignedWorkActivity.objects.create(activity=file_data.get("activity"),
-                                        assignment=assignment, 
-                                        status=file_data.get("status"),
-                                        note=file_data.get("note"),
-                                        is_active=True)
+            with transaction.atomic():
+                for file_data in data.get("required_files", []):
+                    assigned_file = AssignedWorkActivity.objects.create(activity=file_data.get("activity"),
+                                            assignment=assignment,
+                                            status=file_data.get("status"),
+                                            note=file_data.get("note"),
+                                            is_active=True)
+                refresh_progress([assignment.assignment_id])
 
             return Response({"message": "Assignment updated successfully", "id":assigned_file.id}, status=status.HTTP_200_OK)
         except ClientWorkCategoryAssignment.DoesNotExist:
@@ -1345,11 +1281,7 @@ class SubmitClientWorkAdditionalFiles(ModifiedApiview):
             for file_data in data.get("required_files", []):
                 attachment_file = file_data.get("file")
                 if attachment_file:
-                    ext = os.path.splitext(attachment_file)[1]
-                    short_unique_filename = f"{uuid.uuid4().hex}{ext}"
-                    fs = FileSystemStorage(location=os.path.join(settings.MEDIA_ROOT, 'requiredfiles'))
-                    logo_path = fs.save(short_unique_filename, attachment_file)
-                    attachments_url = posixpath.join('media/invoice_attachments', logo_path)
+                    attachments_url = storage.save(attachment_file, 'requiredfiles')
                 else:
                     attachments_url = None
                 assigned_file = AssignedWorkOutputFiles.objects.create(file_name=file_data.get("file_name"),
@@ -1367,6 +1299,10 @@ class SubmitClientWorkAdditionalFiles(ModifiedApiview):
 class SendFilesToClientAPIView(ModifiedApiview):
     def post(self, request):
         try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
             # Extract data from the request
             email_subject = request.data.get('email_subject')
             email_body = request.data.get('email_body')
@@ -1391,34 +1327,30 @@ class SendFilesToClientAPIView(ModifiedApiview):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Get Cloudinary file URLs
-            attachments = []
-            for file in files:
-                if file.file_path:
-                    try:
-                        cloudinary_url = get_cloudinary_file(file.file_path)
-                        attachments.append(cloudinary_url)
-                    except Exception as e:
-                        print(f"Error fetching Cloudinary file: {e}")
-
-            # Send email with attachments
-            email_sent = send_email(
+            # Files are resolved and downloaded in parallel by the outbox worker
+            attachments = [file.file_path for file in files if file.file_path]
+
+            # Queue email with attachments
+            email = enqueue_email(
                 subject=email_subject,
                 body=email_body,
                 to_emails=to_email,
-                attachment=attachments
+                attachment=attachments,
+                created_by=user
             )
+            return Response({"message": "Email queued successfully.", "email_id": email.id}, status=status.HTTP_202_ACCEPTED)
 
-            if email_sent:
-                return Response({"message": "Email sent successfully."}, status=status.HTTP_200_OK)
-            else:
-                return Response({"error": "Failed to send email."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class SendActivityReportPDFAPIView(ModifiedApiview):
+    """
+    Emails an assignment's activity report PDF. The PDF is rendered on the
+    server unless the request still uploads one as `task_update`.
+    """
     def post(self, request, assignment_id):
         try:
             # Get user
@@ -1426,11 +1358,16 @@ class SendActivityReportPDFAPIView(ModifiedApiview):
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             attachments = request.FILES.get("task_update")
-            if not attachments:
-                Response({"message":"Error while fetching file"}, status=status.HTTP_400_BAD_REQUEST)
-            extension = os.path.splitext(attachments.name)[1]
-            if extension != ".pdf":
-                Response({"message":"Unsupported file format"}, status=status.HTTP_400_BAD_REQUEST)
+            if attachments:
+                extension = os.path.splitext(attachments.name)[1]
+                if extension.lower() != ".pdf":
+                    return Response({"message":"Unsupported file format"}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                assignment = report_assignments(
+                    ClientWorkCategoryAssignment.objects.filter(assignment_id=assignment_id, is_active=True)
+                ).get()
+                report = report_data(assignment)
+                attachments = ContentFile(render_report(report), name=report["file_name"])
             email_body = request.data.get("email_body")
             email_subject = request.data.get("email_subject")
             to_email = request.data.get("to_email")
@@ -1438,15 +1375,15 @@ class SendActivityReportPDFAPIView(ModifiedApiview):
                 to_email = to_email.split(",")
             else:
                 to_email = to_email
-            email = send_email(subject=email_subject,
-                               body=email_body,
-                               to_emails=to_email,
-                               attachment=attachments
-                               )
-            if email:
-                return Response({"message":"Email sent successfully"}, status=status.HTTP_200_OK)
-            else:
-                return Response({"message":"Error while sending email"}, status=status.HTTP_400_BAD_REQUEST)
+            email = enqueue_email(subject=email_subject,
+                                  body=email_body,
+                                  to_emails=to_email,
+                                  attachment=attachments,
+                                  created_by=user
+                                  )
+            return Response({"message":"Email queued successfully", "email_id": email.id}, status=status.HTTP_202_ACCEPTED)
+        except ClientWorkCategoryAssignment.DoesNotExist:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1462,36 +1399,20 @@ class SendActivityReportAPIView(ModifiedApiview):
             to_email = request.data.get("to_email")
             to_email = str(to_email)
             to_email = to_email.split(",")
-            # Fetch assignment
-            assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id, is_active=True)
-
-            # Get activities
-            completed_activities = AssignedWorkActivity.objects.filter(assignment=assignment, status="completed", is_active=True)
-            incomplete_activities = AssignedWorkActivity.objects.filter(assignment=assignment).exclude(status="completed").filter(is_active=True)
-
-            # Prepare email content
-            email_subject = f"Activity Report - {assignment.task_name} - {assignment.customer.name_of_business}"
-            email_body = f"Activity Report for {assignment.customer.name_of_business}\n\n"
-
-            email_body += "**Completed Activities:**\n"
-            for activity in completed_activities:
-                email_body += f"- {activity.activity} (Completed on: {activity.completion_date})\n"
-
-            email_body += "\n**Incomplete Activities:**\n"
-            for activity in incomplete_activities:
-                email_body += f"- {activity.activity} (Status: {activity.status}, Note: {activity.note})\n"
-
-            # Send email
-            email_sent = send_email(
-                subject=email_subject,
-                body=email_body,
-                to_emails=to_email
+            # Fetch assignment with its activities and stages
+            assignment = report_assignments(
+                ClientWorkCategoryAssignment.objects.filter(assignment_id=assignment_id, is_active=True)
+            ).get()
+            report = report_data(assignment)
+
+            # Queue email
+            email = enqueue_email(
+                subject=report["title"],
+                body=report_body(report),
+                to_emails=to_email,
+                created_by=user
             )
-
-            if email_sent:
-                return Response({"message": "Report sent successfully."}, status=status.HTTP_200_OK)
-            else:
-                return Response({"error": "Failed to send email."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({"message": "Report queued successfully.", "email_id": email.id}, status=status.HTTP_202_ACCEPTED)
 
         except ClientWorkCategoryAssignment.DoesNotExist:
             return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -1499,6 +1420,60 @@ class SendActivityReportAPIView(ModifiedApiview):
             return Response({"error": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ActivityReportPDFView(ModifiedApiview):
+    """Downloads an assignment's activity report as a PDF rendered on the server."""
+    def get(self, request, assignment_id):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            assignment = report_assignments(
+                ClientWorkCategoryAssignment.objects.filter(assignment_id=assignment_id, is_active=True)
+            ).get()
+            report = report_data(assignment)
+            response = HttpResponse(render_report(report), content_type="application/pdf")
+            response["Content-Disposition"] = f'attachment; filename="{report["file_name"]}"'
+            return response
+        except ClientWorkCategoryAssignment.DoesNotExist:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ActivityReportArchiveView(ModifiedApiview):
+    """
+    Downloads a zip with the activity report PDF of every active assignment
+    of a customer (customer_id) or department (department_id), optionally
+    narrowed to a start_date range.
+    """
+    def get(self, request):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            customer_id = request.query_params.get("customer_id")
+            department_id = request.query_params.get("department_id")
+            if not customer_id and not department_id:
+                return Response({"error": "customer_id or department_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+            assignments = ClientWorkCategoryAssignment.objects.filter(is_active=True)
+            if customer_id:
+                assignments = assignments.filter(customer_id=customer_id)
+            if department_id:
+                assignments = assignments.filter(work_category__department_id=department_id)
+            start_date_from = date_param(request.query_params, "start_date_from")
+            start_date_to = date_param(request.query_params, "start_date_to")
+            if start_date_from:
+                assignments = assignments.filter(start_date__gte=start_date_from)
+            if start_date_to:
+                assignments = assignments.filter(start_date__lte=start_date_to)
+            archive = report_archive(assignments)
+            return FileResponse(archive, as_attachment=True, filename="activity-reports.zip", content_type="application/zip")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # class SendInvoiceAPIView(ModifiedApiview):
 #     def put(self, request, assignment_id):
 #         try:
@@ -1671,34 +1646,11 @@ class RetrieveAssignedTaskView(ModifiedApiview):
             user = self.get_user_from_token(request)
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            assignments = ClientWorkCategoryAssignment.objects.all()
             if assignment_id:
-                assignment = ClientWorkCategoryAssignment.objects.get(assignment_id=assignment_id)
-                data = {
-                    "id": assignment.id,
-                    "customer": assignment.customer.name_of_business,
-                    "customer_id": assignment.customer.id,
-                    "work_category": assignment.work_category.name,
-                    "assigned_to": assignment.assigned_to.username if assignment.assigned_to else None,
-                    "assigned_by": assignment.assigned_by.username if assignment.assigned_by else None,
-                    "created_date": assignment.created_date,
-                    "updated_date": assignment.updated_date,
-                    "is_active": assignment.is_active,
-                }
+                data = ASSIGNMENT_SUMMARY.get(assignments, assignment_id=assignment_id)
             else:
-                assignments = ClientWorkCategoryAssignment.objects.all()
-                data = [
-                    {
-                        "id": a.id,
-                        "customer": a.customer.name_of_business,
-                        "work_category": a.work_category.name,
-                        "assigned_to": a.assigned_to.username if a.assigned_to else None,
-                        "assigned_by": a.assigned_by.username if a.assigned_by else None,
-                        "created_date": a.created_date,
-                        "updated_date": a.updated_date,
-                        "is_active": a.is_active,
-                    }
-                    for a in assignments
-                ]
+                data = ASSIGNMENT_SUMMARY.apply(assignments)
 
             return Response(data, status=status.HTTP_200_OK)
         except ClientWorkCategoryAssignment.DoesNotExist:
@@ -1715,22 +1667,10 @@ class RetrieveAssignedTaskByUserView(ModifiedApiview):
             user = self.get_user_from_token(request)
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
-            user = CustomUser.objects.get(id=user_id)
-            assignments = ClientWorkCategoryAssignment.objects.filter(assigned_to=user, is_active=True)
-            data = [
-                {
-                    "id": a.id,
-                    "customer": a.customer.name_of_business,
-                    "work_category": a.work_category.name,
-                    "assigned_to": a.assigned_to.username if a.assigned_to else None,
-                    "assigned_by": a.assigned_by.username if a.assigned_by else None,
-                    "created_date": a.created_date,
-                    "updated_date": a.updated_date,
-                    "progress": a.progress,
-                    "is_active": a.is_active,
-                }
-                for a in assignments
-            ]
+            if not CustomUser.objects.filter(id=user_id).exists():
+                return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+            assignments = ClientWorkCategoryAssignment.objects.filter(assigned_to_id=user_id, is_active=True)
+            data = ASSIGNMENT_SUMMARY.apply(assignments)
 
             return Response(data, status=status.HTTP_200_OK)
         except CustomUser.DoesNotExist:
@@ -1748,20 +1688,7 @@ class RetrieveAssignedTaskByReviewByView(ModifiedApiview):
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             assignments = ClientWorkCategoryAssignment.objects.filter(review_by=user, is_active=True)
-            data = [
-                {
-                    "id": a.id,
-                    "customer": a.customer.name_of_business,
-                    "work_category": a.work_category.name,
-                    "assigned_to": a.assigned_to.username if a.assigned_to else None,
-                    "assigned_by": a.assigned_by.username if a.assigned_by else None,
-                    "created_date": a.created_date,
-                    "updated_date": a.updated_date,
-                    "progress": a.progress,
-                    "is_active": a.is_active,
-                }
-                for a in assignments
-            ]
+            data = ASSIGNMENT_SUMMARY.apply(assignments)
 
             return Response(data, status=status.HTTP_200_OK)
         except CustomUser.DoesNotExist:
@@ -1838,44 +1765,25 @@ class WorkCategoryUploadDocumentRequiredBulkCreateAPIView(ModifiedApiview):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Read the XLSX file using pandas
-            df = pd.read_excel(uploaded_file)
-
-            # Validate the required columns
-            if "File Name" not in df.columns:
-                return Response(
-                    {"error": "The XLSX file must contain a 'File Name' column"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Prepare a list to hold the records to be created
-            records_to_create = []
-
-            # Iterate through the rows in the DataFrame
-            for _, row in df.iterrows():
-                file_name = row.get("File Name")
-                display_order = row.get("Display Order", 0)  # Default to 0 if missing
-
-                # Validate the row data
-                if not file_name:
-                    continue  # Skip rows with missing file_name
-
-                # Create a new WorkCategoryFilesRequired instance
-                record = WorkCategoryFilesRequired(
-                    work_category=work_category,
-                    file_name=file_name,
-                    display_order=display_order,
-                    created_by=user,
-                )
-                records_to_create.append(record)
-            # Bulk create the records
-            WorkCategoryFilesRequired.objects.bulk_create(records_to_create)
+            result = run_import(
+                FILES_REQUIRED_IMPORT, uploaded_file,
+                defaults={"work_category": work_category, "created_by": user},
+                dry_run=is_dry_run(request),
+            )
+            if not result.ok:
+                return Response({"error": "One or more rows are invalid.", **result.report()}, status=status.HTTP_400_BAD_REQUEST)
+            if result.dry_run:
+                return Response(result.report(), status=status.HTTP_200_OK)
+            # bulk_create sends no post_save
+            invalidate_templates()
 
             return Response(
-                {"message": f"{len(records_to_create)} records created successfully"},
+                {"message": f"{result.created} records created successfully"},
                 status=status.HTTP_201_CREATED,
             )
 
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -1907,42 +1815,25 @@ class WorkCategoryActivityListBulkCreateAPIView(ModifiedApiview):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Read the XLSX file using pandas
-            df = pd.read_excel(uploaded_file)
-
-            # Validate the required columns
-            if not all(col in df.columns for col in ["Activity Name", "Activity Percentage", "Display Order"]):
-                return Response(
-                    {"error": "The XLSX file must contain a 'Activity Name', 'Activity Percentage' and 'Display Order' column"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Prepare a list to hold the records to be created
-            records_to_create = []
-
-            # Iterate through the rows in the DataFrame
-            for _, row in df.iterrows():
-                activity_name = row.get("Activity Name")
-                assigned_percentage = row.get("Activity Percentage")
-                display_order = row.get("Display Order", 0)  # Default to 0 if missing
-
-                # Create a new WorkCategoryFilesRequired instance
-                record = WorkCategoryActivityList(
-                    work_category=work_category,
-                    activity_name=activity_name,
-                    assigned_percentage=assigned_percentage,
-                    display_order=display_order,
-                    created_by=user,
-                )
-                records_to_create.append(record)
-            # Bulk create the records
-            WorkCategoryActivityList.objects.bulk_create(records_to_create)
+            result = run_import(
+                ACTIVITY_LIST_IMPORT, uploaded_file,
+                defaults={"work_category": work_category, "created_by": user},
+                dry_run=is_dry_run(request),
+            )
+            if not result.ok:
+                return Response({"error": "One or more rows are invalid.", **result.report()}, status=status.HTTP_400_BAD_REQUEST)
+            if result.dry_run:
+                return Response(result.report(), status=status.HTTP_200_OK)
+            # bulk_create sends no post_save
+            invalidate_templates()
 
             return Response(
-                {"message": f"{len(records_to_create)} records created successfully"},
+                {"message": f"{result.created} records created successfully"},
                 status=status.HTTP_201_CREATED,
             )
 
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -1974,128 +1865,98 @@ class WorkCategoryOutputFileBulkCreateAPIView(ModifiedApiview):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Read the XLSX file using pandas
-            df = pd.read_excel(uploaded_file)
-
-            # Validate the required columns
-            if "File Name" not in df.columns:
-                return Response(
-                    {"error": "The XLSX file must contain a 'File Name' and 'Display Order' column"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Prepare a list to hold the records to be created
-            records_to_create = []
-
-            # Iterate through the rows in the DataFrame
-            for _, row in df.iterrows():
-                file_name = row.get("File Name")
-                display_order = row.get("Display Order", 0)  # Default to 0 if missing
-
-                # Validate the row data
-                if not file_name:
-                    continue  # Skip rows with missing file_name
-
-                # Create a new WorkCategoryFilesRequired instance
-                record = WorkCategoryUploadDocumentRequired(
-                    work_category=work_category,
-                    file_name=file_name,
-                    display_order=display_order,
-                    created_by=user,
-                )
-                records_to_create.append(record)
-            # Bulk create the records
-            WorkCategoryUploadDocumentRequired.objects.bulk_create(records_to_create)
+            result = run_import(
+                OUTPUT_FILES_IMPORT, uploaded_file,
+                defaults={"work_category": work_category, "created_by": user},
+                dry_run=is_dry_run(request),
+            )
+            if not result.ok:
+                return Response({"error": "One or more rows are invalid.", **result.report()}, status=status.HTTP_400_BAD_REQUEST)
+            if result.dry_run:
+                return Response(result.report(), status=status.HTTP_200_OK)
+            # bulk_create sends no post_save
+            invalidate_templates()
 
             return Response(
-                {"message": f"{len(records_to_create)} records created successfully"},
+                {"message": f"{result.created} records created successfully"},
                 status=status.HTTP_201_CREATED,
             )
 
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 
 class ConsolidatedTaskDetailsWithExpensesAndBillingView(ModifiedApiview):
+    """
+    Task profitability, read from the TaskProfitability ledger.
+    Filters: customer_id, assigned_to, work_category_id, progress,
+    start_date_from / start_date_to, margin_lt / margin_gte and
+    billed=true|false. Sort with ordering (e.g. "-margin"); keyset paginated
+    with cursor / limit.
+    """
+    ORDERING = ("assignment_id", "margin", "billed_amount", "received_amount", "labour_cost", "expenses", "hours_spent")
+    FILTERS = {
+        "customer_id": "assignment__customer_id",
+        "assigned_to": "assignment__assigned_to_id",
+        "work_category_id": "assignment__work_category_id",
+        "progress": "assignment__progress",
+        "start_date_from": "assignment__start_date__gte",
+        "start_date_to": "assignment__start_date__lte",
+        "margin_lt": "margin__lt",
+        "margin_gte": "margin__gte",
+    }
+
     def get(self, request):
         try:
             user = self.get_user_from_token(request)
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
 
-            # Subquery to calculate total expenses for each task
-            total_expenses_subquery = Expense.objects.filter(
-                work_id=OuterRef('assignment_id')
-            ).values('work_id').annotate(
-                total_expenses=Sum('expense_amount')
-            ).values('total_expenses')
-
-            # Subquery to calculate total hours spent on each task
-            hours_spent_subquery = TimeTracking.objects.filter(
-                work_id=OuterRef('assignment_id')
-            ).values('work_id').annotate(
-                total_hours_spent=Sum(F('duration'))
-            ).values('total_hours_spent')
-
-            # Prefetch related billing and receipt data
-            billing_prefetch = Prefetch(
-                'bill_task',
-                queryset=Billing.objects.annotate(
-                    total_paid=Sum('paid_amount')
+            ledger = TaskProfitability.objects.all()
+            for param, lookup in self.FILTERS.items():
+                value = request.query_params.get(param)
+                if value not in (None, ""):
+                    ledger = ledger.filter(**{lookup: value})
+            billed = request.query_params.get("billed")
+            if billed in ("true", "false"):
+                ledger = ledger.filter(billed_amount__gt=0) if billed == "true" else ledger.filter(billed_amount=0)
+
+            ordering = request.query_params.get("ordering") or "-assignment_id"
+            if ordering.lstrip("-") not in self.ORDERING:
+                return Response(
+                    {"error": f"ordering must be one of {', '.join(self.ORDERING)}"}, status=status.HTTP_400_BAD_REQUEST
                 )
+            page = paginate_keyset(
+                request,
+                ledger.values(
+                    "assignment_id", "hours_spent", "billable_hours", "labour_cost", "expenses",
+                    "billed_amount", "received_amount", "margin",
+                    customer_name=F("assignment__customer__name_of_business"),
+                    task_title=F("assignment__task_name"),
+                    start_date=F("assignment__start_date"),
+                    completion_date=F("assignment__completion_date"),
+                    assigned_to_username=F("assignment__assigned_to__username"),
+                    allocated_hours=F("assignment__allocated_hours"),
+                    progress=F("assignment__progress"),
+                    priority=F("assignment__priority"),
+                ),
+                sort_key=ordering.lstrip("-"),
+                descending=ordering.startswith("-"),
             )
 
-            # Fetch all tasks with consolidated details
-            tasks = ClientWorkCategoryAssignment.objects.annotate(
-                customer_name=F('customer__name_of_business'),
-                task_title=F('task_name'),
-                assigned_to_username=F('assigned_to__username'),
-                total_hours_spent=Subquery(hours_spent_subquery, output_field=models.DurationField()),
-                total_expenses=Subquery(total_expenses_subquery, output_field=models.FloatField())
-            ).prefetch_related(
-                billing_prefetch,
-                Prefetch('task_expense', queryset=Expense.objects.all())
-            ).values(
-                'assignment_id',
-                'customer_name',
-                'task_title',
-                'start_date',
-                'completion_date',
-                'assigned_to_username',
-                'allocated_hours',
-                'total_hours_spent',
-                'total_expenses',
-                'progress',
-                'priority'
-            )
-
-            # Convert duration to hours and add billing and expense details
             consolidated_data = []
-            for task in tasks:
-                task_data = dict(task)
-                task_data['total_hours_spent'] = task_data['total_hours_spent'].total_seconds() / 3600 if task_data['total_hours_spent'] else 0
-                task_data['total_expenses'] = task_data['total_expenses'] or 0
-
-                # Fetch billing details for the task
-                # billing_details = []
-                # for bill in ClientWorkCategoryAssignment.objects.get(assignment_id=task['assignment_id']).bill_task.all():
-                #     billing_details.append({
-                #         'bill_id': bill.id,
-                #         'invoice_date': bill.invoice_date,
-                #         'total_amount': bill.total,
-                #         'paid_amount': bill.paid_amount,
-                #         'unpaid_amount': bill.unpaid_amount,
-                #         'payment_status': bill.payment_status,
-                #         'invoice_status': 'Paid' if bill.payment_status == 'paid' else 'Unpaid'
-                #     })
-
-                # task_data['billing_details'] = billing_details
-                consolidated_data.append(task_data)
-
-            return Response(consolidated_data, status=status.HTTP_200_OK)
+            for task in page.items:
+                # Keys of the pre-ledger response
+                task["total_hours_spent"] = task["hours_spent"]
+                task["total_expenses"] = task["expenses"]
+                consolidated_data.append(task)
+            return Response(consolidated_data, status=status.HTTP_200_OK, headers=page.headers())
+        except (InvalidCursor, ValidationError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
 
 class ScheduleTaskTimeCreateView(ModifiedApiview):
     def post(self, request):
@@ -2125,8 +1986,11 @@ class ScheduleTaskTimeCreateView(ModifiedApiview):
             if task_id:
                 task = ClientWorkCategoryAssignment.objects.get(assignment_id=task_id)
             assigned_to = CustomUser.objects.get(id=data.get("assigned_to_id")) if data.get("assigned_to_id") else None
+            start_time, end_time = clean_interval(start_time, end_time)
 
             with transaction.atomic():
+                if str(data.get("allow_overlap", "")).lower() != "true":
+                    check_conflicts(assigned_to.id if assigned_to else None, start_time, end_time)
                 schedule = ScheduleTaskTime.objects.create(
                     customer=customer,
                     task=task,
@@ -2150,6 +2014,8 @@ class ScheduleTaskTimeCreateView(ModifiedApiview):
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
         except CustomUser.DoesNotExist:
             return Response({"error": "Assigned user not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ScheduleConflict as e:
+            return Response({"error": str(e), "conflicts": e.conflicts}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -2162,10 +2028,11 @@ class ScheduleTaskTimeListView(ModifiedApiview):
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             
             # You can add filters here based on request parameters
-            schedules = ScheduleTaskTime.objects.all().order_by('-created_date')
-            
+            schedules = ScheduleTaskTime.objects.select_related("customer", "task", "assigned_to", "created_by")
+            page = paginate_keyset(request, schedules, sort_key="created_date")
+
             result = []
-            for schedule in schedules:
+            for schedule in page.items:
                 result.append({
                     "id": schedule.id,
                     "customer": schedule.customer.name_of_business,
@@ -2178,11 +2045,29 @@ class ScheduleTaskTimeListView(ModifiedApiview):
                     "created_by": schedule.created_by.username if schedule.created_by else None
                 })
             
-            return Response({"schedules": result}, status=status.HTTP_200_OK)
+            return Response({"schedules": result, **page.meta()}, status=status.HTTP_200_OK, headers=page.headers())
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ScheduleCalendarView(ModifiedApiview):
+    """
+    Day or week calendar of bookings between `start` and `end` for the
+    employees in `assigned_to` (comma separated) or the whole team; see
+    workflow.schedules.schedule_calendar.
+    """
+    def get(self, request):
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+            return Response(schedule_calendar(request.query_params), status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class ScheduleTaskTimeDetailView(ModifiedApiview):
     def get(self, request, id):
         try:
@@ -2231,12 +2116,15 @@ class ScheduleTaskTimeUpdateView(ModifiedApiview):
             if "task_id" in data:
                 task_details = ClientWorkCategoryAssignment.objects.get(assignment_id=data["task_id"])
             
+            start_time, end_time = clean_interval(data["start_time"], data["end_time"])
             with transaction.atomic():
                 schedule.customer = Customer.objects.get(id=data["customer_id"])
                 schedule.task = task_details
                 schedule.assigned_to = CustomUser.objects.get(id=data["assigned_to_id"]) if data["assigned_to_id"] else None
-                schedule.start_time = data["start_time"]
-                schedule.end_time = data["end_time"]
+                if str(data.get("allow_overlap", "")).lower() != "true":
+                    check_conflicts(schedule.assigned_to_id, start_time, end_time, exclude_id=schedule.id)
+                schedule.start_time = start_time
+                schedule.end_time = end_time
                 schedule.mode_of_communication = data["mode_of_communication"]
                 schedule.activities = data.get("activities", schedule.activities)
                 schedule.instructions = data.get("instructions", schedule.instructions)
@@ -2252,6 +2140,8 @@ class ScheduleTaskTimeUpdateView(ModifiedApiview):
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
         except CustomUser.DoesNotExist:
             return Response({"error": "Assigned user not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ScheduleConflict as e:
+            return Response({"error": str(e), "conflicts": e.conflicts}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -2296,12 +2186,21 @@ class ClientWorkReminderCreateView(ModifiedApiview):
             if data.get("task_id"):
                 task = ClientWorkCategoryAssignment.objects.get(assignment_id=data.get("task_id"))
 
+            # The assignee is emailed on reminder_date by send_due_reminders
+            if data.get("assigned_to_id"):
+                assigned_to = CustomUser.objects.get(id=data.get("assigned_to_id"))
+            else:
+                assigned_to = (task.assigned_to if task else None) or user
+
             with transaction.atomic():
                 reminder = ClientWorkReminder.objects.create(
                     client=client,
                     task=task,
                     reminder_note=data.get("reminder_note", ""),
-                    status=data.get("status", ""),
+                    # Blank means the model default; only open reminders are notified
+                    status=data.get("status") or "open",
+                    reminder_date=date_param(data, "reminder_date"),
+                    assigned_to=assigned_to,
                     created_by=user,
                     updated_by=user
                 )
@@ -2314,6 +2213,8 @@ class ClientWorkReminderCreateView(ModifiedApiview):
             return Response({"error": "Client not found"}, status=status.HTTP_404_NOT_FOUND)
         except ClientWorkCategoryAssignment.DoesNotExist:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+        except CustomUser.DoesNotExist:
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -2334,6 +2235,9 @@ class ClientWorkReminderRetrieveView(ModifiedApiview):
                 "task_name": reminder.task.task_name if reminder.task else None,
                 "reminder_note": reminder.reminder_note,
                 "status": reminder.status,
+                "reminder_date": reminder.reminder_date,
+                "assigned_to": reminder.assigned_to_id,
+                "notified_at": reminder.notified_at,
                 "created_date": reminder.created_date,
                 "created_by": reminder.created_by.id,
                 "updated_date": reminder.updated_date,
@@ -2364,7 +2268,13 @@ class ClientWorkReminderUpdateView(ModifiedApiview):
                 if "reminder_note" in data:
                     reminder.reminder_note = data.get("reminder_note")
                 if "status" in data:
-                    reminder.status = data.get("status")
+                    reminder.status = data.get("status") or "open"
+                if data.get("assigned_to_id"):
+                    reminder.assigned_to = CustomUser.objects.get(id=data.get("assigned_to_id"))
+                if "reminder_date" in data:
+                    reminder.reminder_date = date_param(data, "reminder_date")
+                    # A new date is notified again
+                    reminder.notified_at = None
                 
                 reminder.updated_by = user
                 reminder.save()
@@ -2379,6 +2289,8 @@ class ClientWorkReminderUpdateView(ModifiedApiview):
             return Response({"error": "Client not found"}, status=status.HTTP_404_NOT_FOUND)
         except ClientWorkCategoryAssignment.DoesNotExist:
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+        except CustomUser.DoesNotExist:
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -2390,7 +2302,8 @@ class ClientWorkReminderListView(ModifiedApiview):
             if not user:
                 return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
             
-            reminders = ClientWorkReminder.objects.all()
+            reminders = ClientWorkReminder.objects.select_related("client", "task", "created_by", "updated_by")
+            page = paginate_keyset(request, reminders)
             data = [{
                 "id": reminder.id,
                 "client_id": reminder.client.id,
@@ -2399,13 +2312,16 @@ class ClientWorkReminderListView(ModifiedApiview):
                 "task_name": reminder.task.task_name if reminder.task else None,
                 "reminder_note": reminder.reminder_note,
                 "status": reminder.status,
+                "reminder_date": reminder.reminder_date,
+                "assigned_to": reminder.assigned_to_id,
+                "notified_at": reminder.notified_at,
                 "created_date": reminder.created_date,
                 "created_by": reminder.created_by.id,
                 "updated_date": reminder.updated_date,
                 "updated_by": reminder.updated_by.id
-            } for reminder in reminders]
-            
-            return Response(data, status=status.HTTP_200_OK)
+            } for reminder in page.items]
+
+            return Response(data, status=status.HTTP_200_OK, headers=page.headers())
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -2426,6 +2342,9 @@ class ClientWorkReminderActivityView(ModifiedApiview):
                 "task_name": reminder.task.task_name if reminder.task else None,
                 "reminder_note": reminder.reminder_note,
                 "status": reminder.status,
+                "reminder_date": reminder.reminder_date,
+                "assigned_to": reminder.assigned_to_id,
+                "notified_at": reminder.notified_at,
                 "created_date": reminder.created_date,
                 "created_by": reminder.created_by.id,
                 "updated_date": reminder.updated_date,
@@ -2455,5 +2374,66 @@ class ClientWorkReminderDeleteView(ModifiedApiview):
             return Response({"error": "Reminder not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
 
+
+class RecurringWorkGenerateView(ModifiedApiview):
+    def post(self, request):
+        """
+        Create the missing periods of repetitive assignments due by as_of plus
+        lead_days. Already generated periods are skipped, so it can be re-run.
+        """
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            try:
+                as_of = date_param(request.data, "as_of")
+                lead_days = int(request.data.get("lead_days", RECURRING_WORK_LEAD_DAYS))
+                lookback_days = int(request.data.get("lookback_days", RECURRING_WORK_LOOKBACK_DAYS))
+            except (TypeError, ValueError) as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if not 0 <= lead_days <= RECURRING_WORK_FORECAST_MAX_DAYS or not 0 <= lookback_days <= RECURRING_WORK_FORECAST_MAX_DAYS:
+                return Response(
+                    {"error": f"lead_days and lookback_days must be between 0 and {RECURRING_WORK_FORECAST_MAX_DAYS}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            result = generate_recurring_work(as_of, lead_days, lookback_days, user=user, dry_run=is_dry_run(request))
+            response_status = status.HTTP_200_OK if result["dry_run"] else status.HTTP_201_CREATED
+            return Response(result, status=response_status)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class RecurringWorkForecastView(ModifiedApiview):
+    def get(self, request):
+        """
+        Periods of repetitive assignments that will be generated between as_of
+        (default today) and until (default as_of plus 30 days).
+        """
+        try:
+            user = self.get_user_from_token(request)
+            if not user:
+                return Response({"Error": "You don't have permissions"}, status=status.HTTP_401_UNAUTHORIZED)
+
+            try:
+                as_of = date_param(request.query_params, "as_of") or timezone.localdate()
+                until = date_param(request.query_params, "until") or as_of + timedelta(days=30)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if until < as_of:
+                return Response({"error": "until must not be before as_of"}, status=status.HTTP_400_BAD_REQUEST)
+            if (until - as_of).days > RECURRING_WORK_FORECAST_MAX_DAYS:
+                return Response(
+                    {"error": f"The forecast may cover at most {RECURRING_WORK_FORECAST_MAX_DAYS} days"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            periods = forecast_recurring_work(as_of, until)
+            return Response(
+                {"as_of": as_of, "until": until, "count": len(periods), "periods": periods},
+                status=status.HTTP_200_OK
+            )
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)